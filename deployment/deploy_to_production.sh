@@ -15,7 +15,7 @@ then
 	VERSION=$1
 	make dbbackup
 	make mediasync
-	ssh ppcr-tralard.digiprophets.com "cd /home/ppcr-tralard/deployment && git fetch --tags && git checkout $VERSION && make collectstatic && make reload"
+	ssh ppcr-tralard.digiprophets.com "cd /home/ppcr-tralard/deployment && git fetch --tags && git checkout $VERSION && make collectstatic && make schema && make reload"
 else
 	echo "Deploy to production aborted."
 fi
@@ -26,7 +26,7 @@ then
 	git push --tags upstream 
     # Check it out on the server
     # No migrations are run - you should do that manually for now
-	ssh staging.ppcr-tralard.digiprophets.com "cd /home/ppcr-tralard/deployment && git fetch --tags && git checkout $VERSION && make collectstatic && make reload"
+	ssh staging.ppcr-tralard.digiprophets.com "cd /home/ppcr-tralard/deployment && git fetch --tags && git checkout $VERSION && make collectstatic && make schema && make reload"
 else
 	echo "Tag and deploy to staging aborted."
 fi
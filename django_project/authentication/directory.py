@@ -0,0 +1,172 @@
+# -*- encoding: utf-8 -*-
+"""Queries behind the user management list.
+
+Users are listed newest first and paged with a keyset on
+``(date_joined, id)``: a page link carries the position of the last (or
+first) row shown instead of a page number, so neither an ``OFFSET`` nor a
+``COUNT`` of the matching rows is needed. Searching matches the start of
+the username, names and email, and falls back to trigram similarity when
+nothing starts with the term. Both are served by the indexes created in
+``base/migrations/0003_user_search_indexes.py``.
+"""
+
+from datetime import datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import CharField, Count, Q
+from django.db.models.functions import Greatest, Upper
+from django.utils import timezone
+
+# Lets the trigram lookups run on UPPER(column), the indexed expression.
+CharField.register_lookup(Upper)
+
+PAGE_SIZE = 7
+SEARCH_FIELDS = ('username', 'first_name', 'last_name', 'email')
+# pg_trgm needs three characters to build a trigram.
+TRIGRAM_MIN_LENGTH = 3
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def user_counts():
+    """Total, superuser and staff counts in a single query.
+
+    :rtype: dict
+    """
+    return User.objects.aggregate(
+        total=Count('id'),
+        superusers=Count('id', filter=Q(is_superuser=True)),
+        staff=Count('id', filter=Q(is_staff=True)),
+    )
+
+
+def encode_cursor(user):
+    """Position of a user in the ``date_joined, id`` ordering.
+
+    :rtype: str
+    """
+    micros = (user.date_joined - _EPOCH) // timedelta(microseconds=1)
+    return '%s.%s' % (micros, user.pk)
+
+
+def decode_cursor(value):
+    """Inverse of :func:`encode_cursor`, ``None`` when malformed.
+
+    :rtype: tuple of (datetime, int) or None
+    """
+    try:
+        micros, pk = (int(part) for part in value.split('.'))
+    except (AttributeError, ValueError):
+        return None
+    return _EPOCH + timedelta(microseconds=micros), pk
+
+
+def after_filter(cursor):
+    """Users listed after ``cursor``, i.e. joined earlier."""
+    date_joined, pk = cursor
+    return Q(date_joined__lt=date_joined) | Q(
+        date_joined=date_joined, pk__lt=pk)
+
+
+def before_filter(cursor):
+    """Users listed before ``cursor``, i.e. joined later."""
+    date_joined, pk = cursor
+    return Q(date_joined__gt=date_joined) | Q(
+        date_joined=date_joined, pk__gt=pk)
+
+
+def prefix_filter(term):
+    return Q(*[
+        Q(**{'%s__istartswith' % field: term}) for field in SEARCH_FIELDS
+    ], _connector=Q.OR)
+
+
+def similar_filter(term):
+    return Q(*[
+        Q(**{'%s__upper__trigram_similar' % field: term.upper()})
+        for field in SEARCH_FIELDS
+    ], _connector=Q.OR)
+
+
+class UserPage(object):
+    """One page of users with the cursors of its neighbours.
+
+    A page found by trigram similarity is ranked by relevance and has no
+    neighbours.
+    """
+
+    def __init__(self, users, next_cursor=None, previous_cursor=None,
+                 similar=False):
+        self.users = users
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.similar = similar
+
+    def __iter__(self):
+        return iter(self.users)
+
+    def __len__(self):
+        return len(self.users)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def user_page(queryset, after=None, before=None, term='',
+              page_size=PAGE_SIZE):
+    """The page of ``queryset`` following ``after`` or preceding ``before``.
+
+    :param queryset: Users to list, in any order.
+    :type queryset: QuerySet
+
+    :param after: Cursor of the last row of the previous page.
+    :type after: str
+
+    :param before: Cursor of the first row of the next page.
+    :type before: str
+
+    :param term: Optional search term.
+    :type term: str
+
+    :rtype: UserPage
+    """
+    term = (term or '').strip()
+    matches = queryset.filter(prefix_filter(term)) if term else queryset
+    after, before = decode_cursor(after), decode_cursor(before)
+
+    if before is not None:
+        rows = list(matches.filter(before_filter(before)).order_by(
+            'date_joined', 'pk')[:page_size + 1])
+        has_more, rows = len(rows) > page_size, rows[:page_size]
+        rows.reverse()
+        return UserPage(
+            rows,
+            next_cursor=encode_cursor(rows[-1]) if rows else None,
+            previous_cursor=encode_cursor(rows[0]) if has_more else None)
+
+    if after is not None:
+        matches = matches.filter(after_filter(after))
+    rows = list(matches.order_by('-date_joined', '-pk')[:page_size + 1])
+    has_more, rows = len(rows) > page_size, rows[:page_size]
+
+    if not rows and after is None and len(term) >= TRIGRAM_MIN_LENGTH:
+        similarity = Greatest(*[
+            TrigramSimilarity(Upper(field), term.upper())
+            for field in SEARCH_FIELDS])
+        rows = list(
+            queryset.filter(similar_filter(term))
+            .annotate(similarity=similarity)
+            .order_by('-similarity', '-date_joined')[:page_size])
+        return UserPage(rows, similar=True)
+
+    return UserPage(
+        rows,
+        next_cursor=encode_cursor(rows[-1]) if has_more else None,
+        previous_cursor=(
+            encode_cursor(rows[0]) if rows and after is not None else None))
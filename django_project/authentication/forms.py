@@ -2,16 +2,10 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from tralard.utils import get_available_roles
 
-ALL_USER_ROLES = []
-role_storage = get_available_roles()
-for cleaned_role_appearance in enumerate(role_storage):
-    original_role_appearance = cleaned_role_appearance[1].replace(' ', "_").lower()
-    ALL_USER_ROLES.append(
-        (f"{cleaned_role_appearance[0]+1}", cleaned_role_appearance[1])
-    )
-    
+from roles.choices import role_choices
+
+
 class LoginForm(forms.Form):
     username = forms.CharField(
         widget=forms.TextInput(
@@ -32,7 +26,7 @@ class LoginForm(forms.Form):
 class SignUpForm(UserCreationForm):
     groups = forms.MultipleChoiceField(
         widget=forms.SelectMultiple(),
-        choices=ALL_USER_ROLES
+        choices=role_choices
     )
     
     class Meta:
@@ -74,7 +68,7 @@ class UserUpdateForm(UserCreationForm):
         ))
     groups = forms.MultipleChoiceField(
         widget=forms.SelectMultiple(),
-        choices=ALL_USER_ROLES
+        choices=role_choices
     )
     password1 = forms.CharField(
         label='password', 
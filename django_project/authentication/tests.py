@@ -1,4 +1,54 @@
 # -*- encoding: utf-8 -*-
-from django.test import TestCase
+from datetime import datetime
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from .directory import (
+    UserPage,
+    after_filter,
+    before_filter,
+    decode_cursor,
+    encode_cursor,
+    prefix_filter,
+)
+
+
+class UserDirectoryTest(SimpleTestCase):
+    joined = datetime(2021, 3, 4, 5, 6, 7, 890123, tzinfo=timezone.utc)
+
+    def test_cursor_round_trip(self):
+        user = User(pk=42, date_joined=self.joined)
+        self.assertEqual(
+            decode_cursor(encode_cursor(user)), (self.joined, 42))
+
+    def test_malformed_cursor_is_ignored(self):
+        for value in (None, '', 'abc', '1.2.3', '12'):
+            self.assertIsNone(decode_cursor(value))
+
+    def test_keyset_filters(self):
+        cursor = (self.joined, 42)
+        earlier = Q(date_joined__lt=self.joined)
+        earlier |= Q(date_joined=self.joined, pk__lt=42)
+        later = Q(date_joined__gt=self.joined)
+        later |= Q(date_joined=self.joined, pk__gt=42)
+        self.assertEqual(after_filter(cursor), earlier)
+        self.assertEqual(before_filter(cursor), later)
+
+    def test_prefix_filter_covers_names_and_email(self):
+        condition = prefix_filter('jo')
+        self.assertEqual(condition.connector, Q.OR)
+        self.assertEqual(
+            [child.children[0] for child in condition.children], [
+                ('username__istartswith', 'jo'),
+                ('first_name__istartswith', 'jo'),
+                ('last_name__istartswith', 'jo'),
+                ('email__istartswith', 'jo'),
+            ])
+
+    def test_page_neighbours(self):
+        page = UserPage([], next_cursor='1.2')
+        self.assertTrue(page.has_next)
+        self.assertFalse(page.has_previous)
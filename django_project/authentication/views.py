@@ -7,12 +7,13 @@ from django.shortcuts import (
     HttpResponse
 )
 from django.contrib import messages
-from django.core.paginator import Paginator
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.decorators import login_required
 
+from .directory import user_counts, user_page
 from .forms import LoginForm, SignUpForm
+from roles.choices import role_options
 
 from rolepermissions.roles import assign_role
 from rolepermissions.checkers import has_role
@@ -123,33 +124,34 @@ def list_user(request):
             messages.add_message(request, messages.SUCCESS, "user created successfully")
             return redirect("/accounts/user/management/list/")
 
-    users = User.objects.all().order_by("-date_joined")
-    try:
-        username = request.GET.get("username")
-        users = User.objects.get(username=username)
-    except:
-        pass
-    try:
-        user_paginator = Paginator(users, 7)
-        user_page_number = request.GET.get('user_page_number', '')
-        user_paginator_list = user_paginator.get_page(user_page_number)
-    except:
-        user_paginator_list = [users]
-    superusers = User.objects.all().filter(is_superuser=True)
-    staffs = User.objects.all().filter(is_staff=True)
+    # "username" is sent by the search buttons of the superuser and staff
+    # modals.
+    query = request.GET.get("q") or request.GET.get("username") or ""
+    users = user_page(
+        User.objects.select_related("profile").prefetch_related("groups"),
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+        term=query,
+    )
+    counts = user_counts()
+    modal_fields = ("username", "first_name", "last_name", "email")
+    superusers = User.objects.filter(is_superuser=True).only(*modal_fields)
+    staffs = User.objects.filter(is_staff=True).only(*modal_fields)
     context = {
-        "all_users": user_paginator_list,
+        "all_users": users,
+        "query": query,
         "users": {
-            'count': User.objects.all().count(), 
-            'all_users': user_paginator_list
+            'count': counts['total'],
+            'all_users': users
         },
         "superusers": {
-            'count': superusers.count(),
+            'count': counts['superusers'],
             'all_superusers': superusers,
         },
         "staffs": {
-            'count': staffs.count(),
+            'count': counts['staff'],
             'all_staffs': staffs,
         },
+        "available_roles": role_options(),
     }
     return render(request, 'accounts/includes/system-user-list.html', context)
@@ -0,0 +1,57 @@
+# coding=utf-8
+from django.contrib import admin
+
+from base.models import (
+    AdminBoundary,
+    SmsDeadLetter,
+    Survey,
+    SurveyQuestion,
+    SurveyResponse,
+)
+
+
+class SurveyQuestionInline(admin.TabularInline):
+    model = SurveyQuestion
+    extra = 1
+
+
+@admin.register(Survey)
+class SurveyAdmin(admin.ModelAdmin):
+    list_display = ('name', 'keyword', 'active', 'created')
+    list_filter = ('active',)
+    search_fields = ('name', 'keyword')
+    inlines = (SurveyQuestionInline,)
+
+
+@admin.register(SurveyResponse)
+class SurveyResponseAdmin(admin.ModelAdmin):
+    list_display = (
+        'message_id', 'survey', 'sender', 'text', 'district', 'received')
+    list_filter = ('survey',)
+    list_select_related = ('survey',)
+    # Filtering on received lets Postgres skip the other partitions,
+    # narrow a search with it.
+    date_hierarchy = 'received'
+    search_fields = ('=message_id', '=sender')
+    readonly_fields = (
+        'survey', 'message_id', 'sender', 'text', 'answers', 'district',
+        'received', 'created')
+    # Counting every response for the paginator is not worth it.
+    show_full_result_count = False
+
+
+@admin.register(SmsDeadLetter)
+class SmsDeadLetterAdmin(admin.ModelAdmin):
+    list_display = ('message_id', 'reason', 'created')
+    search_fields = ('=message_id', 'reason')
+    readonly_fields = ('message_id', 'payload', 'reason', 'created')
+
+
+@admin.register(AdminBoundary)
+class AdminBoundaryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'level', 'code', 'parent')
+    list_filter = ('level',)
+    list_select_related = ('parent',)
+    search_fields = ('name', '=code')
+    # Full resolution polygons are loaded with manage.py load_boundaries.
+    exclude = ('geom',)
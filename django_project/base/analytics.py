@@ -0,0 +1,245 @@
+# coding=utf-8
+"""Columnar frames and vectorized indicator metrics for the reports.
+
+Each source table of the indicator reports is read with a single
+``values_list`` query into a pandas frame with compact column types:
+categoricals for names and slugs, ``int32`` counts and ``float32``
+ratios; amounts stay ``float64`` as their totals need the precision.
+Metrics are then computed with grouped aggregations over the
+whole frame instead of Python loops over model instances.
+
+Frames are kept in a small per-process cache keyed by the version of the
+``tralard`` cache namespace, which :mod:`base.signals` bumps on every
+write to the tralard models, so a report never reads stale data and
+consecutive reports reuse the frames loaded for the first one.
+
+pandas is imported on first use only, see :func:`base.startup.lazy_import`,
+to keep it out of the start up of processes that never build a report.
+"""
+
+import threading
+from collections import OrderedDict
+
+from django.apps import apps
+from django.conf import settings
+
+from base.cache import TRALARD_NAMESPACE, cache_version
+from base.startup import lazy_import
+
+pd = lazy_import('pandas')
+
+_SUB_PROJECT = 'sub_project__'
+_SUBCOMPONENT = _SUB_PROJECT + 'subcomponent__'
+
+# Frame name: (tralard model, [(column, lookup, dtype), ...]).
+FRAMES = {
+    'beneficiaries': ('Beneficiary', [
+        ('id', 'pk', 'int32'),
+        ('project', _SUBCOMPONENT + 'project__slug', 'category'),
+        ('subcomponent', _SUBCOMPONENT + 'name', 'category'),
+        ('sub_project', _SUB_PROJECT + 'name', 'category'),
+        ('ward', 'ward__name', 'category'),
+        ('org_type', 'org_type', 'category'),
+        ('total', 'total_beneficiaries', 'int32'),
+        ('females', 'total_females', 'int32'),
+        ('males', 'total_males', 'int32'),
+        ('registered', 'registered_date', 'datetime64[ns]'),
+    ]),
+    'funds': ('Fund', [
+        ('id', 'pk', 'int32'),
+        ('project', _SUBCOMPONENT + 'project__slug', 'category'),
+        ('subcomponent', _SUBCOMPONENT + 'name', 'category'),
+        ('sub_project', _SUB_PROJECT + 'name', 'category'),
+        ('amount', 'amount', 'float64'),
+        ('currency', 'amount_currency', 'category'),
+        ('approved', 'approved', 'bool'),
+        ('funded', 'funding_date', 'datetime64[ns]'),
+    ]),
+    'trainings': ('Training', [
+        ('id', 'pk', 'int32'),
+        ('project', _SUBCOMPONENT + 'project__slug', 'category'),
+        ('subcomponent', _SUBCOMPONENT + 'name', 'category'),
+        ('sub_project', _SUB_PROJECT + 'name', 'category'),
+        ('training_type', 'training_type', 'category'),
+        ('completed', 'completed', 'bool'),
+        ('start', 'start_date', 'datetime64[ns]'),
+        ('end', 'end_date', 'datetime64[ns]'),
+    ]),
+}
+
+_frames = OrderedDict()
+_frames_lock = threading.Lock()
+
+
+def analytics_setting(name):
+    """Read an ``ANALYTICS_*`` setting, falling back to its default."""
+    defaults = {
+        # Frames kept per process, across names and data versions.
+        'FRAME_CACHE_SIZE': 6,
+    }
+    return getattr(settings, 'ANALYTICS_%s' % name, defaults[name])
+
+
+def typed_frame(rows, columns):
+    """Build a frame with compact column types from rows of values.
+
+    :param rows: Tuples of values, in the order of ``columns``.
+    :type rows: iterable
+
+    :param columns: ``(column, lookup, dtype)`` as in :data:`FRAMES`.
+    :type columns: list
+
+    :rtype: pandas.DataFrame
+    """
+    names = [column for column, _, _ in columns]
+    frame = pd.DataFrame.from_records(list(rows), columns=names)
+    for column, _, dtype in columns:
+        values = frame[column]
+        if dtype.startswith(('int', 'float')):
+            # Decimals and NULLs come back as objects.
+            values = pd.to_numeric(values, errors='coerce')
+            if dtype.startswith('int'):
+                values = values.fillna(0)
+            frame[column] = values.astype(dtype)
+        elif dtype == 'bool':
+            frame[column] = values.fillna(False).astype(bool)
+        elif dtype.startswith('datetime'):
+            frame[column] = pd.to_datetime(values)
+        else:
+            frame[column] = values.astype(dtype)
+    return frame
+
+
+def query_frame(name):
+    """Load a frame of :data:`FRAMES` from the database, in one query.
+
+    :rtype: pandas.DataFrame
+    """
+    model_name, columns = FRAMES[name]
+    model = apps.get_model('tralard', model_name)
+    rows = model.objects.order_by().values_list(
+        *[lookup for _, lookup, _ in columns])
+    return typed_frame(rows, columns)
+
+
+def load_frame(name):
+    """A frame of :data:`FRAMES`, from the cache when the data is unchanged.
+
+    The same frame is handed to every caller, it must not be modified in
+    place.
+
+    :rtype: pandas.DataFrame
+    """
+    key = (name, cache_version(TRALARD_NAMESPACE))
+    with _frames_lock:
+        frame = _frames.get(key)
+        if frame is not None:
+            _frames.move_to_end(key)
+            return frame
+    frame = query_frame(name)
+    with _frames_lock:
+        _frames[key] = frame
+        while len(_frames) > analytics_setting('FRAME_CACHE_SIZE'):
+            _frames.popitem(last=False)
+    return frame
+
+
+def clear_frames():
+    with _frames_lock:
+        _frames.clear()
+
+
+def for_project(frame, project_slug=None):
+    """Rows of a single project, or all rows when no slug is given."""
+    if project_slug is None:
+        return frame
+    return frame[frame['project'] == project_slug]
+
+
+def _share(part, whole):
+    return (part / whole.where(whole > 0)).fillna(0).astype('float32')
+
+
+def beneficiary_indicators(frame, by='subcomponent'):
+    """Organisations and people reached per ``by`` column.
+
+    :rtype: pandas.DataFrame
+    """
+    result = frame.groupby(by, observed=True).agg(
+        organisations=('id', 'size'),
+        beneficiaries=('total', 'sum'),
+        females=('females', 'sum'),
+        males=('males', 'sum'))
+    result['female_share'] = _share(
+        result['females'], result['beneficiaries'])
+    return result
+
+
+def beneficiaries_over_time(frame, freq='Q'):
+    """People reached per period of registration and in total so far.
+
+    :param freq: pandas offset alias, ``M`` for months, ``Q`` for
+        quarters.
+    :type freq: str
+
+    :rtype: pandas.DataFrame
+    """
+    result = frame.dropna(subset=['registered']).groupby(
+        pd.Grouper(key='registered', freq=freq)
+    ).agg(organisations=('id', 'size'), beneficiaries=('total', 'sum'))
+    result['cumulative'] = result['beneficiaries'].cumsum()
+    return result
+
+
+def fund_indicators(frame, by='subcomponent'):
+    """Funds allocated and approved per ``by`` column and currency.
+
+    Amounts in different currencies are never added up, the result is
+    indexed by ``by`` and ``currency``.
+
+    :rtype: pandas.DataFrame
+    """
+    frame = frame.assign(
+        approved_amount=frame['amount'].where(frame['approved'], 0))
+    result = frame.groupby([by, 'currency'], observed=True).agg(
+        fundings=('id', 'size'),
+        amount=('amount', 'sum'),
+        approved_amount=('approved_amount', 'sum'))
+    result['approved_share'] = _share(
+        result['approved_amount'], result['amount'])
+    return result
+
+
+def training_indicators(frame, by='training_type'):
+    """Trainings held and completed per ``by`` column.
+
+    :rtype: pandas.DataFrame
+    """
+    result = frame.groupby(by, observed=True).agg(
+        trainings=('id', 'size'), completed=('completed', 'sum'))
+    result['completion_rate'] = _share(
+        result['completed'], result['trainings'])
+    return result
+
+
+def indicator_report(project_slug=None):
+    """Every indicator table of the report of a project.
+
+    :param project_slug: Project to report on, all projects when omitted.
+    :type project_slug: str
+
+    :rtype: OrderedDict of pandas.DataFrame
+    """
+    beneficiaries = for_project(load_frame('beneficiaries'), project_slug)
+    funds = for_project(load_frame('funds'), project_slug)
+    trainings = for_project(load_frame('trainings'), project_slug)
+    return OrderedDict([
+        ('beneficiaries', beneficiary_indicators(beneficiaries)),
+        ('beneficiaries_by_ward', beneficiary_indicators(
+            beneficiaries, by='ward')),
+        ('beneficiaries_by_org_type', beneficiary_indicators(
+            beneficiaries, by='org_type')),
+        ('beneficiaries_over_time', beneficiaries_over_time(beneficiaries)),
+        ('funds', fund_indicators(funds)),
+        ('trainings', training_indicators(trainings)),
+    ])
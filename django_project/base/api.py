@@ -0,0 +1,139 @@
+# coding=utf-8
+"""Survey results API, read from :class:`base.models.SurveyAnswerCounter`.
+
+Every endpoint sums the counters of the requested days, so the cost of a
+request does not depend on the number of responses received.
+"""
+
+import json
+
+from django.contrib.gis.db.models.functions import AsGeoJSON, Transform
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from base import counters
+from base.boundaries import simplified_boundaries
+from base.models import AdminBoundary, Survey
+
+
+def _date_param(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        date = parse_date(value)
+    except ValueError:
+        date = None
+    if date is None:
+        raise ValidationError({name: 'Expected a date as YYYY-MM-DD.'})
+    return date
+
+
+class SurveyResultsMixin(object):
+
+    def filters(self, request, *names):
+        """Query parameters shared by the results endpoints."""
+        filters = {
+            'start': _date_param(request, 'start'),
+            'end': _date_param(request, 'end'),
+        }
+        for name in names:
+            value = request.query_params.get(name)
+            if value is not None:
+                filters[name] = value.upper() if name == 'answer' else value
+        return filters
+
+    def get_survey(self, pk):
+        try:
+            return get_object_or_404(Survey, pk=int(pk))
+        except ValueError:
+            raise Http404
+
+
+class SurveyResultsView(SurveyResultsMixin, APIView):
+    """Number of responses and answer counts per question of a survey.
+
+    Filter with ``start`` and ``end`` (``YYYY-MM-DD``, inclusive) and
+    ``district``.
+    """
+
+    def get(self, request, pk):
+        survey = self.get_survey(pk)
+        results = counters.results(
+            survey.pk, **self.filters(request, 'district'))
+        results.update(survey=survey.pk, keyword=survey.keyword)
+        return Response(results)
+
+
+class SurveyDailyResultsView(SurveyResultsMixin, APIView):
+    """Responses per day, or responses giving ``answer`` to ``question``.
+
+    Filter with ``start``, ``end`` and ``district``.
+    """
+
+    def get(self, request, pk):
+        survey = self.get_survey(pk)
+        rows = counters.daily(
+            survey.pk,
+            **self.filters(request, 'question', 'answer', 'district'))
+        return Response([
+            {'day': day.isoformat(), 'count': count} for day, count in rows])
+
+
+class SurveyDistrictResultsView(SurveyResultsMixin, APIView):
+    """Responses per district, or responses giving ``answer`` to
+    ``question``.
+
+    Filter with ``start`` and ``end``.
+    """
+
+    def get(self, request, pk):
+        survey = self.get_survey(pk)
+        totals = counters.by_district(
+            survey.pk, **self.filters(request, 'question', 'answer'))
+        return Response([
+            {'district': district, 'count': count}
+            for district, count in totals.items()])
+
+
+class BoundaryListView(SurveyResultsMixin, APIView):
+    """Province or district outlines for maps and choropleths.
+
+    ``level`` is ``province`` or ``district`` (the default) and ``zoom``
+    the map zoom the outlines are drawn at, which picks geometries
+    simplified to its pixel size. With ``survey``, district features also
+    carry the number of responses, filtered with ``start`` and ``end``.
+    """
+
+    def get(self, request):
+        level = request.query_params.get('level', AdminBoundary.DISTRICT)
+        if level not in dict(AdminBoundary.LEVEL_CHOICES):
+            raise ValidationError({'level': 'Unknown level.'})
+        try:
+            zoom = int(request.query_params.get('zoom', 6))
+        except ValueError:
+            raise ValidationError({'zoom': 'Expected an integer.'})
+        responses = None
+        if request.query_params.get('survey'):
+            survey = self.get_survey(request.query_params['survey'])
+            responses = counters.by_district(
+                survey.pk, **self.filters(request))
+
+        rows = simplified_boundaries(level, zoom).annotate(
+            geojson=AsGeoJSON(Transform('geom', 4326), precision=5)
+        ).values_list('boundary__code', 'boundary__name', 'geojson')
+        features = []
+        for code, name, geojson in rows:
+            properties = {'code': code, 'name': name}
+            if responses is not None:
+                properties['responses'] = responses.get(name, 0)
+            features.append({
+                'type': 'Feature',
+                'geometry': json.loads(geojson),
+                'properties': properties,
+            })
+        return Response({'type': 'FeatureCollection', 'features': features})
@@ -0,0 +1,25 @@
+# coding=utf-8
+from django.urls import path
+
+from base.api import (
+    BoundaryListView,
+    SurveyDailyResultsView,
+    SurveyDistrictResultsView,
+    SurveyResultsView,
+)
+
+urlpatterns = [
+    path('boundaries/', BoundaryListView.as_view(), name='boundaries'),
+    path(
+        'surveys/<int:pk>/results/',
+        SurveyResultsView.as_view(),
+        name='survey-results'),
+    path(
+        'surveys/<int:pk>/results/daily/',
+        SurveyDailyResultsView.as_view(),
+        name='survey-results-daily'),
+    path(
+        'surveys/<int:pk>/results/districts/',
+        SurveyDistrictResultsView.as_view(),
+        name='survey-results-districts'),
+]
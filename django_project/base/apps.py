@@ -0,0 +1,15 @@
+# -*- coding: utf-8
+from django.apps import AppConfig
+
+
+class BaseConfig(AppConfig):
+    name = 'base'
+
+    def ready(self):
+        from base import db, signals
+        from base.version import get_version
+        signals.connect_rollup_signals()
+        signals.connect_cache_signals()
+        db.connect_connection_signals()
+        # Read the release while starting rather than on the first render
+        get_version()
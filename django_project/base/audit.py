@@ -0,0 +1,105 @@
+# coding=utf-8
+"""Buffered logging backend for django-easy-audit.
+
+Easy audit writes one row per request, login and model change from inside
+the request. :class:`BufferedAuditBackend` instead appends the event to a
+Redis list and lets the Celery worker bulk insert it with
+:func:`base.tasks.flush_audit_events`.
+"""
+
+import logging
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+from easyaudit.backends import ModelBackend
+from easyaudit.models import CRUDEvent, LoginEvent, RequestEvent
+from redis.exceptions import RedisError
+
+from base.buffers import RedisBuffer
+
+logger = logging.getLogger(__name__)
+
+EVENT_MODELS = {
+    'request': RequestEvent,
+    'crud': CRUDEvent,
+    'login': LoginEvent,
+}
+
+audit_buffer = RedisBuffer('audit-events')
+# Batches the flush could not write, kept for flush_audit_events(failed=True).
+audit_failed_buffer = RedisBuffer('audit-events-failed')
+
+
+def audit_setting(name):
+    """Read an ``AUDIT_BUFFER_*`` setting, falling back to its default."""
+    defaults = {
+        # Number of events inserted per bulk insert.
+        'BATCH_SIZE': 500,
+        # Past this many queued events, writes happen synchronously again.
+        'MAX_LENGTH': 100000,
+        # Seconds an event may wait before a flush is forced.
+        'FLUSH_INTERVAL': 10,
+        # Seconds a flush claims new batches for before handing the rest
+        # of the buffer to a new task, below its time limits.
+        'RUN_SECONDS': 30,
+    }
+    return getattr(settings, 'AUDIT_BUFFER_%s' % name, defaults[name])
+
+
+def build_events(documents):
+    """Turn buffered documents back into unsaved event instances.
+
+    :param documents: Documents as produced by the backend.
+    :type documents: list
+
+    :returns: Unsaved instances grouped by event model.
+    :rtype: dict
+    """
+    events = {}
+    for document in documents:
+        model = EVENT_MODELS[document['kind']]
+        info = document['info']
+        for field in model._meta.concrete_fields:
+            value = info.get(field.attname)
+            if field.get_internal_type() == 'DateTimeField' and value:
+                info[field.attname] = parse_datetime(value)
+        events.setdefault(model, []).append(model(**info))
+    return events
+
+
+class BufferedAuditBackend(ModelBackend):
+    """Queue audit events in Redis instead of inserting them immediately.
+
+    When Redis is unreachable, or the queue grows past
+    ``AUDIT_BUFFER_MAX_LENGTH`` because the worker cannot keep up, events
+    are written synchronously by the default model backend. Producers are
+    slowed down rather than events being dropped.
+    """
+
+    def _enqueue(self, kind, info):
+        from base.tasks import flush_audit_events
+
+        try:
+            length = audit_buffer.push({'kind': kind, 'info': info})
+        except RedisError:
+            logger.warning('Audit buffer unavailable, writing %s event', kind)
+            return getattr(super(BufferedAuditBackend, self), kind)(info)
+
+        if length > audit_setting('MAX_LENGTH'):
+            logger.warning(
+                'Audit buffer holds %s events, flushing inline', length)
+            flush_audit_events(max_batches=1)
+        elif length == 1:
+            flush_audit_events.apply_async(
+                countdown=audit_setting('FLUSH_INTERVAL'))
+        elif length % audit_setting('BATCH_SIZE') == 0:
+            flush_audit_events.delay()
+
+    def request(self, request_info):
+        self._enqueue('request', request_info)
+
+    def crud(self, crud_info):
+        self._enqueue('crud', crud_info)
+
+    def login(self, login_info):
+        self._enqueue('login', login_info)
@@ -0,0 +1,203 @@
+# coding=utf-8
+"""Province and district boundaries, and locating points in them.
+
+Boundaries are stored once at full resolution in
+:class:`base.models.AdminBoundary`, with a GiST index used by every point
+in polygon lookup, and once per zoom level in
+:class:`base.models.SimplifiedBoundary`, simplified to the size of a
+pixel at that zoom, which is what maps and choropleths draw.
+
+Points are located in bulk SQL: a batch of incoming SMS in one query by
+:func:`districts_of_points`, stored responses and beneficiaries in one
+statement each by :func:`assign_responses` and
+:func:`assign_beneficiaries`.
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from base.maptiles import WORLD_SIZE, layer_source
+from base.models import (
+    AdminBoundary,
+    BeneficiaryBoundary,
+    SimplifiedBoundary,
+    SurveyResponse,
+)
+
+logger = logging.getLogger(__name__)
+
+TILE_SIZE = 256
+
+# First boundary of a level containing a point, a point on a shared
+# border belongs to the boundary with the lowest id.
+_CONTAINING = (
+    '(SELECT boundary.{column} FROM base_adminboundary AS boundary '
+    'WHERE boundary.level = %s AND ST_Intersects(boundary.geom, {point}) '
+    'ORDER BY boundary.id LIMIT 1)')
+
+
+def boundary_setting(name):
+    """Read a ``BOUNDARY_*`` setting, falling back to its default."""
+    defaults = {
+        # Zoom levels simplified geometries are stored for.
+        'ZOOMS': [4, 6, 8, 10, 12],
+    }
+    return getattr(settings, 'BOUNDARY_%s' % name, defaults[name])
+
+
+def pixel_size(zoom):
+    """Width of a map pixel at ``zoom``, in Web Mercator metres."""
+    return WORLD_SIZE / TILE_SIZE / 2 ** zoom
+
+
+def simplify_boundaries(zooms=None, boundary_ids=None):
+    """Rebuild the simplified geometries of every zoom level.
+
+    :returns: Number of simplified geometries written.
+    :rtype: int
+    """
+    zooms = zooms or boundary_setting('ZOOMS')
+    simplified = SimplifiedBoundary.objects.all()
+    where = ''
+    params = []
+    if boundary_ids is not None:
+        simplified = simplified.filter(boundary_id__in=boundary_ids)
+        where = 'WHERE id = ANY(%s)'
+        params.append(list(boundary_ids))
+    with transaction.atomic(), connection.cursor() as cursor:
+        simplified.delete()
+        cursor.execute(
+            'INSERT INTO base_simplifiedboundary (boundary_id, zoom, geom) '
+            'SELECT id, zoom.level, ST_Multi(ST_SimplifyPreserveTopology('
+            'ST_Transform(geom, 3857), zoom.tolerance)) '
+            'FROM base_adminboundary, '
+            'unnest(%s::smallint[], %s::float8[]) AS zoom(level, tolerance) '
+            '{where}'.format(where=where),
+            [list(zooms), [pixel_size(zoom) for zoom in zooms]] + params)
+        return cursor.rowcount
+
+
+def simplified_boundaries(level, zoom):
+    """Boundaries of a level simplified for ``zoom``.
+
+    Uses the closest stored zoom level that is not more detailed than
+    needed, or the least detailed one.
+
+    :rtype: QuerySet of SimplifiedBoundary
+    """
+    zooms = sorted(boundary_setting('ZOOMS'))
+    stored = [level_zoom for level_zoom in zooms if level_zoom <= zoom]
+    return SimplifiedBoundary.objects.filter(
+        boundary__level=level,
+        zoom=stored[-1] if stored else zooms[0],
+    ).select_related('boundary').order_by('boundary__name')
+
+
+def districts_of_points(points):
+    """Names of the districts containing each point, in one query.
+
+    :param points: ``(longitude, latitude)`` pairs, or ``None``.
+    :type points: list
+
+    :returns: District names, ``''`` for points outside every district.
+    :rtype: list
+    """
+    located = [
+        (index, point) for index, point in enumerate(points) if point]
+    names = [''] * len(points)
+    if not located:
+        return names
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT point.idx, {district} '
+            'FROM unnest(%s::integer[], %s::float8[], %s::float8[]) '
+            'AS point(idx, x, y)'.format(district=_CONTAINING.format(
+                column='name',
+                point='ST_SetSRID(ST_MakePoint(point.x, point.y), 4326)')),
+            [AdminBoundary.DISTRICT,
+             [index for index, _ in located],
+             [point[0] for _, point in located],
+             [point[1] for _, point in located]])
+        for index, name in cursor.fetchall():
+            names[index] = name or ''
+    return names
+
+
+def assign_responses(reassign=False):
+    """Set the district of the responses from their location.
+
+    Counters of the surveys and days affected are rebuilt, see
+    :func:`base.counters.rebuild`.
+
+    :param reassign: Also update responses that already have a district.
+    :type reassign: bool
+
+    :returns: Number of responses updated.
+    :rtype: int
+    """
+    from base.counters import rebuild
+
+    condition = '' if reassign else " AND response.district = ''"
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            'WITH located AS (SELECT response.id, response.received, '
+            '{district} AS district FROM {table} AS response '
+            'WHERE response.location IS NOT NULL{condition}) '
+            'UPDATE {table} AS response SET district = located.district '
+            'FROM located WHERE response.id = located.id '
+            'AND response.received = located.received '
+            'AND located.district IS NOT NULL '
+            'AND response.district <> located.district '
+            'RETURNING response.survey_id, response.received'.format(
+                table=SurveyResponse._meta.db_table, condition=condition,
+                district=_CONTAINING.format(
+                    column='name', point='response.location')),
+            [AdminBoundary.DISTRICT])
+        rows = cursor.fetchall()
+        if rows:
+            rebuild(
+                survey_ids={survey_id for survey_id, _ in rows},
+                since=min(received for _, received in rows).date())
+    logger.info('Assigned districts to %s responses', len(rows))
+    return len(rows)
+
+
+def assign_beneficiaries():
+    """Refresh the province and district of every located beneficiary.
+
+    Reads the beneficiaries from the ``beneficiaries`` map layer, see
+    :mod:`base.maptiles`.
+
+    :returns: Number of beneficiaries located.
+    :rtype: int
+    """
+    table, geometry, srid, columns = layer_source('beneficiaries')
+    quote = connection.ops.quote_name
+    pk = 'source.%s' % quote(columns[0])
+    point = 'source.%s' % quote(geometry)
+    if srid != 4326:
+        point = 'ST_Transform(%s, 4326)' % point
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO {target} (beneficiary_id, province_id, district_id) '
+            'SELECT {pk}, {province}, {district} '
+            'FROM {table} AS source WHERE {point} IS NOT NULL '
+            'ON CONFLICT (beneficiary_id) DO UPDATE SET '
+            'province_id = EXCLUDED.province_id, '
+            'district_id = EXCLUDED.district_id'.format(
+                target=BeneficiaryBoundary._meta.db_table,
+                table=quote(table), point=point, pk=pk,
+                province=_CONTAINING.format(column='id', point=point),
+                district=_CONTAINING.format(column='id', point=point)),
+            [AdminBoundary.PROVINCE, AdminBoundary.DISTRICT])
+        located = cursor.rowcount
+        cursor.execute(
+            'DELETE FROM {target} WHERE NOT EXISTS (SELECT 1 FROM {table} '
+            'AS source WHERE {pk} = beneficiary_id '
+            'AND {point} IS NOT NULL)'.format(
+                target=BeneficiaryBoundary._meta.db_table,
+                table=quote(table), point=point, pk=pk))
+    logger.info('Located %s beneficiaries', located)
+    return located
@@ -0,0 +1,141 @@
+# coding=utf-8
+"""Redis lists used to hand work from the web tier to the Celery worker."""
+
+import json
+import time
+import uuid
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django_redis import get_redis_connection
+
+# Moves up to ARGV[1] documents from the head of the buffer to the claim
+# list and registers the claim with its time, ARGV[2].
+CLAIM_SCRIPT = """
+local documents = redis.call('LRANGE', KEYS[1], 0, ARGV[1] - 1)
+if #documents == 0 then
+    return documents
+end
+redis.call('RPUSH', KEYS[2], unpack(documents))
+redis.call('LTRIM', KEYS[1], #documents, -1)
+redis.call('ZADD', KEYS[3], ARGV[2], KEYS[2])
+return documents
+"""
+
+# Moves the documents of the claim list to the head of the buffer, in
+# their order, or to its tail when ARGV[1] is not "head".
+RELEASE_SCRIPT = """
+local documents = redis.call('LRANGE', KEYS[1], 0, -1)
+if #documents > 0 then
+    if ARGV[1] == 'head' then
+        for index = #documents, 1, -1 do
+            redis.call('LPUSH', KEYS[2], documents[index])
+        end
+    else
+        redis.call('RPUSH', KEYS[2], unpack(documents))
+    end
+end
+redis.call('DEL', KEYS[1])
+redis.call('ZREM', KEYS[3], KEYS[1])
+return #documents
+"""
+
+
+class RedisBuffer(object):
+    """A FIFO of JSON documents stored in a Redis list.
+
+    Producers append with :meth:`push`, which is a single ``RPUSH`` and
+    therefore cheap enough for the request path. A consumer moves a batch
+    of documents to a list of its own with :meth:`claim` and removes it
+    with :meth:`ack` once the batch is written, or hands it back with
+    :meth:`release`. The batches of a consumer that died before doing
+    either are put back in the buffer by :meth:`recover`, so documents
+    are delivered at least once.
+    """
+
+    def __init__(self, name, alias=None):
+        """
+        :param name: Name of the Redis list, without the key prefix.
+        :type name: str
+
+        :param alias: Cache alias whose Redis connection is used, defaults
+            to the ``REDIS_BUFFER_CACHE_ALIAS`` setting.
+        :type alias: str
+        """
+        self.key = 'buffer:%s' % name
+        self.claims_key = '%s:claims' % self.key
+        self.alias = alias or getattr(
+            settings, 'REDIS_BUFFER_CACHE_ALIAS', 'select2')
+
+    @property
+    def client(self):
+        return get_redis_connection(self.alias)
+
+    def push(self, *documents):
+        """Append documents to the buffer.
+
+        :returns: Length of the buffer after the push.
+        :rtype: int
+        """
+        return self.client.rpush(
+            self.key,
+            *[json.dumps(doc, cls=DjangoJSONEncoder) for doc in documents])
+
+    def claim(self, batch_size):
+        """Atomically move up to ``batch_size`` documents from the head to
+        a claim list only this consumer knows.
+
+        :returns: Key of the claim, ``None`` when the buffer is empty, and
+            the claimed documents, oldest first.
+        :rtype: tuple
+        """
+        claim = '%s:claim:%s' % (self.key, uuid.uuid4().hex)
+        script = self.client.register_script(CLAIM_SCRIPT)
+        documents = script(
+            keys=[self.key, claim, self.claims_key],
+            args=[batch_size, time.time()])
+        if not documents:
+            return None, []
+        return claim, [json.loads(doc) for doc in documents]
+
+    def ack(self, claim):
+        """Drop a claimed batch once it has been written."""
+        pipeline = self.client.pipeline()
+        pipeline.delete(claim)
+        pipeline.zrem(self.claims_key, claim)
+        pipeline.execute()
+
+    def release(self, claim, target=None):
+        """Hand a claimed batch back.
+
+        :param target: Buffer whose tail receives the documents, they go
+            back to the head of this buffer when not given.
+        :type target: RedisBuffer
+
+        :returns: Number of documents released.
+        :rtype: int
+        """
+        script = self.client.register_script(RELEASE_SCRIPT)
+        return script(
+            keys=[claim, (target or self).key, self.claims_key],
+            args=['tail' if target else 'head'])
+
+    def recover(self, timeout=None):
+        """Put back in the buffer the batches claimed more than
+        ``timeout`` seconds ago and never acknowledged.
+
+        :param timeout: Defaults to the ``REDIS_BUFFER_CLAIM_TIMEOUT``
+            setting, it must exceed the time a consumer may hold a batch.
+        :type timeout: int
+
+        :returns: Number of documents put back.
+        :rtype: int
+        """
+        if timeout is None:
+            timeout = getattr(settings, 'REDIS_BUFFER_CLAIM_TIMEOUT', 600)
+        claims = self.client.zrangebyscore(
+            self.claims_key, '-inf', time.time() - timeout)
+        return sum(self.release(claim) for claim in claims)
+
+    def __len__(self):
+        return self.client.llen(self.key)
@@ -0,0 +1,55 @@
+# coding=utf-8
+"""Versioned namespaces for the shared cache.
+
+Cached fragments include the current version of the namespace they depend
+on in their key. Bumping the version on writes makes every uWSGI worker
+miss on its next read, without having to know which keys were stored.
+"""
+
+import time
+
+from django.core.cache import cache
+
+# Namespace covering everything rendered from the tralard models.
+TRALARD_NAMESPACE = 'tralard'
+
+
+def _version_key(namespace):
+    return 'cache-version:%s' % namespace
+
+
+def _initial_version():
+    # Seeded from the clock so a version key lost from the cache can never
+    # come back with a number that older fragments were stored under.
+    return int(time.time() * 1000)
+
+
+def cache_version(namespace):
+    """Current version of a namespace.
+
+    :param namespace: Name of the namespace.
+    :type namespace: str
+
+    :rtype: int
+    """
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        version = _initial_version()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_cache_version(namespace):
+    """Invalidate everything cached under a namespace.
+
+    :param namespace: Name of the namespace.
+    :type namespace: str
+    """
+    key = _version_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Nothing cached under the namespace yet.
+        cache.add(key, _initial_version(), timeout=None)
@@ -0,0 +1,39 @@
+# coding=utf-8
+"""Cache backends reporting hits and misses to the request recorder."""
+
+from django.core.cache.backends.locmem import LocMemCache
+from django_redis.cache import RedisCache
+
+from base.instrumentation import current_recorder
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin(object):
+    """Count the hits and misses of ``get`` and ``get_many``."""
+
+    def get(self, key, default=None, version=None, **kwargs):
+        value = super(InstrumentedCacheMixin, self).get(
+            key, _MISSING, version=version, **kwargs)
+        hit = value is not _MISSING
+        recorder = current_recorder()
+        if recorder is not None:
+            recorder.record_cache(int(hit), int(not hit))
+        return value if hit else default
+
+    def get_many(self, keys, version=None, **kwargs):
+        keys = list(keys)
+        values = super(InstrumentedCacheMixin, self).get_many(
+            keys, version=version, **kwargs)
+        recorder = current_recorder()
+        if recorder is not None:
+            recorder.record_cache(len(values), len(keys) - len(values))
+        return values
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    pass
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
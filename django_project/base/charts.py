@@ -0,0 +1,235 @@
+# coding=utf-8
+"""Indicator report charts, rendered off the request path.
+
+:func:`render_charts` builds the Altair charts of a project's indicator
+report from :func:`base.analytics.indicator_report` and writes each one
+to ``MEDIA_ROOT/charts/`` twice: as a Vega-Lite specification and as a
+standalone page embedding it. File names carry the hash of the
+specification, so nginx serves them with far future expiry and
+unchanged charts are never rewritten.
+
+Charts are re-rendered by :func:`base.tasks.render_report_charts` once the
+version of the ``tralard`` cache namespace moved on, which
+:mod:`base.signals` schedules after writes to the tralard models.
+Previews only read :class:`base.models.ReportChart` rows.
+"""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from base.cache import TRALARD_NAMESPACE, cache_version
+from base.models import ReportChart
+from base.startup import lazy_import
+
+alt = lazy_import('altair')
+
+logger = logging.getLogger(__name__)
+
+CHART_DIR = 'charts'
+# Superseded files are kept this long for pages still referencing them.
+STALE_FILE_SECONDS = 24 * 60 * 60
+
+_SCHEDULED_KEY = 'charts:render-scheduled'
+
+
+def chart_setting(name):
+    """Read a ``CHARTS_*`` setting, falling back to its default."""
+    defaults = {
+        # Seconds to wait after a write, so a burst renders only once.
+        'RENDER_DELAY': 60,
+        # Seconds the rendering of one project report may take.
+        'RENDER_TIME_LIMIT': 2 * 60,
+    }
+    return getattr(settings, 'CHARTS_%s' % name, defaults[name])
+
+
+def _table(frame):
+    # Altair wants the grouping keys as plain columns.
+    return frame.reset_index()
+
+
+def build_charts(tables):
+    """Altair charts of the indicator tables of a report.
+
+    :param tables: Tables returned by
+        :func:`base.analytics.indicator_report`.
+    :type tables: dict
+
+    :returns: Charts keyed by name.
+    :rtype: dict
+    """
+    beneficiaries = _table(tables['beneficiaries']).melt(
+        id_vars=['subcomponent'], value_vars=['females', 'males'],
+        var_name='sex', value_name='people')
+    return {
+        'beneficiaries': alt.Chart(beneficiaries).mark_bar().encode(
+            x=alt.X('sum(people):Q', title='Beneficiaries'),
+            y=alt.Y('subcomponent:N', title=None),
+            color=alt.Color('sex:N', title=None),
+        ).properties(title='Beneficiaries per subcomponent'),
+        'beneficiaries_by_org_type': alt.Chart(
+            _table(tables['beneficiaries_by_org_type'])
+        ).mark_bar().encode(
+            x=alt.X('organisations:Q', title='Organisations'),
+            y=alt.Y('org_type:N', title=None, sort='-x'),
+        ).properties(title='Organisations per type'),
+        'beneficiaries_over_time': alt.Chart(
+            _table(tables['beneficiaries_over_time'])
+        ).mark_line(point=True).encode(
+            x=alt.X('registered:T', title=None),
+            y=alt.Y('cumulative:Q', title='Beneficiaries'),
+        ).properties(title='Beneficiaries reached'),
+        'funds': alt.Chart(_table(tables['funds']).melt(
+            id_vars=['subcomponent', 'currency'],
+            value_vars=['amount', 'approved_amount'],
+            var_name='kind', value_name='total')
+        ).mark_bar().encode(
+            x=alt.X('total:Q', title='Amount'),
+            y=alt.Y('kind:N', title=None),
+            row=alt.Row('subcomponent:N', title=None),
+            column=alt.Column('currency:N', title=None),
+            tooltip=['currency', 'total'],
+        ).resolve_scale(x='independent').properties(
+            title='Funds per subcomponent and currency'),
+        'trainings': alt.Chart(
+            _table(tables['trainings'])
+        ).mark_bar().encode(
+            x=alt.X('completion_rate:Q', title='Completed',
+                    axis=alt.Axis(format='%')),
+            y=alt.Y('training_type:N', title=None),
+            tooltip=['trainings', 'completed'],
+        ).properties(title='Training completion'),
+    }
+
+
+def _write(relative_path, content):
+    """Write a content-addressed file unless it is already there."""
+    path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    if os.path.exists(path):
+        os.utime(path)
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = '%s.%s.part' % (path, os.getpid())
+    with open(partial, 'w', encoding='utf-8') as output:
+        output.write(content)
+    os.rename(partial, path)
+
+
+def save_chart(directory, name, chart):
+    """Write the specification and page of a chart.
+
+    :returns: Paths of the specification and the page, relative to
+        ``MEDIA_ROOT``.
+    :rtype: tuple
+    """
+    spec = json.dumps(chart.to_dict(), sort_keys=True)
+    digest = hashlib.sha256(spec.encode('utf-8')).hexdigest()[:16]
+    spec_path = '%s/%s.%s.json' % (directory, name, digest)
+    html_path = '%s/%s.%s.html' % (directory, name, digest)
+    _write(spec_path, spec)
+    if not os.path.exists(os.path.join(settings.MEDIA_ROOT, html_path)):
+        page = io.StringIO()
+        chart.save(page, format='html')
+        _write(html_path, page.getvalue())
+    return spec_path, html_path
+
+
+def _remove_stale_files(directory, keep):
+    root = os.path.join(settings.MEDIA_ROOT, directory)
+    cutoff = time.time() - STALE_FILE_SECONDS
+    for entry in os.scandir(root):
+        relative = '%s/%s' % (directory, entry.name)
+        if relative not in keep and entry.stat().st_mtime < cutoff:
+            os.remove(entry.path)
+
+
+def render_charts(project_slug=None, force=False):
+    """Render the charts of a project report if its data changed.
+
+    :param project_slug: Project of the report, every project when
+        omitted.
+    :type project_slug: str
+
+    :param force: Render even when the charts are up to date.
+    :type force: bool
+
+    :returns: Whether the charts were rendered.
+    :rtype: bool
+    """
+    from base.analytics import indicator_report
+
+    project_slug = project_slug or ''
+    version = cache_version(TRALARD_NAMESPACE)
+    current = ReportChart.objects.filter(project_slug=project_slug)
+    if not force and current.exists() and not current.exclude(
+            data_version=version).exists():
+        return False
+
+    directory = '%s/%s' % (CHART_DIR, project_slug or '_all')
+    charts = build_charts(indicator_report(project_slug or None))
+    paths = {}
+    for name, chart in charts.items():
+        paths[name] = save_chart(directory, name, chart)
+
+    with transaction.atomic():
+        for name, (spec_path, html_path) in paths.items():
+            ReportChart.objects.update_or_create(
+                project_slug=project_slug, name=name, defaults={
+                    'data_version': version,
+                    'spec_path': spec_path,
+                    'html_path': html_path,
+                })
+        current.exclude(name__in=list(paths)).delete()
+    _remove_stale_files(
+        directory, {path for pair in paths.values() for path in pair})
+    logger.info('Rendered %s charts of %s', len(paths), directory)
+    return True
+
+
+def report_projects():
+    """Slugs of the projects with a report, ``''`` standing for all."""
+    Project = apps.get_model('tralard', 'Project')
+    return [''] + list(Project.objects.order_by(
+        'slug').values_list('slug', flat=True))
+
+
+def project_charts(project_slug=None):
+    """The rendered charts of a project report, and whether they are
+    current.
+
+    Stale charts are still returned, they are replaced once the worker
+    rendered the new ones.
+
+    :rtype: tuple of (list of ReportChart, bool)
+    """
+    charts = list(ReportChart.objects.filter(
+        project_slug=project_slug or ''))
+    version = cache_version(TRALARD_NAMESPACE)
+    current = bool(charts) and all(
+        chart.data_version == version for chart in charts)
+    if not current:
+        schedule_render(countdown=0)
+    return charts, current
+
+
+def schedule_render(countdown=None):
+    """Have the worker re-render the charts, at most once per delay."""
+    from base.tasks import render_report_charts
+
+    if countdown is None:
+        countdown = chart_setting('RENDER_DELAY')
+    try:
+        if cache.add(_SCHEDULED_KEY, True, timeout=max(countdown, 10)):
+            render_report_charts.apply_async(countdown=countdown)
+    except Exception:
+        # The charts stay stale until the next write schedules them.
+        logger.exception('Could not schedule the chart rendering')
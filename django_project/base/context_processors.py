@@ -0,0 +1,17 @@
+# coding=utf-8
+from django.conf import settings
+
+from base.version import get_version
+
+
+def datatables(request):
+    """Tells the table templates whether to page on the server."""
+    return {
+        'DATATABLES_SERVER_SIDE': getattr(
+            settings, 'DATATABLES_SERVER_SIDE', False),
+    }
+
+
+def version(request):
+    """Exposes the project release as ``version``."""
+    return {'version': get_version()}
@@ -0,0 +1,209 @@
+# coding=utf-8
+"""Incremental survey result counters.
+
+:func:`base.sms.ingest` passes every batch of new responses to
+:func:`apply`, which turns them into per survey, question, answer,
+district and day increments and upserts them into
+:class:`base.models.SurveyAnswerCounter` in the same transaction. A
+response is therefore counted exactly once, and reads only sum a few
+counter rows per day, however many responses were received.
+
+:func:`rebuild` recomputes the counters from the responses, e.g. after
+districts were assigned to past responses.
+"""
+
+from collections import Counter, OrderedDict
+
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from base.models import SurveyAnswerCounter
+
+TABLE = SurveyAnswerCounter._meta.db_table
+KEY = ('survey_id', 'question', 'answer', 'district', 'day')
+ANSWER_LENGTH = SurveyAnswerCounter._meta.get_field('answer').max_length
+
+_UPSERT = '''
+INSERT INTO {table} ({columns}, count)
+SELECT * FROM unnest(
+    %s::integer[], %s::varchar[], %s::varchar[], %s::varchar[], %s::date[],
+    %s::integer[])
+ON CONFLICT ({columns})
+DO UPDATE SET count = {table}.count + EXCLUDED.count
+'''.format(table=TABLE, columns=', '.join(KEY))
+
+_REBUILD = '''
+INSERT INTO {table} ({columns}, count)
+SELECT survey_id, '', '', district, (received AT TIME ZONE 'UTC')::date,
+       count(*)
+FROM base_surveyresponse
+WHERE {where}
+GROUP BY 1, 2, 3, 4, 5
+UNION ALL
+SELECT survey_id, answer.key, left(answer.value, {answer_length}), district,
+       (received AT TIME ZONE 'UTC')::date, count(*)
+FROM base_surveyresponse, jsonb_each_text(answers) AS answer
+WHERE {where}
+GROUP BY 1, 2, 3, 4, 5
+'''
+
+
+def increments(responses):
+    """Counter increments for a batch of responses.
+
+    :param responses: Survey responses, saved or not.
+    :type responses: iterable
+
+    :rtype: Counter
+    """
+    counts = Counter()
+    for response in responses:
+        day = response.received.astimezone(timezone.utc).date()
+        district = response.district or ''
+        counts[(response.survey_id, '', '', district, day)] += 1
+        for question, answer in response.answers.items():
+            counts[(response.survey_id, question, answer, district, day)] += 1
+    return counts
+
+
+def apply(responses):
+    """Add a batch of new responses to the counters.
+
+    Increments are upserted in a single statement and in key order, so
+    that concurrent consumers lock shared counter rows in the same order
+    and cannot deadlock.
+
+    :returns: Number of counter rows touched.
+    :rtype: int
+    """
+    counts = increments(responses)
+    if not counts:
+        return 0
+    keys = sorted(counts)
+    columns = [list(column) for column in zip(*keys)]
+    with connection.cursor() as cursor:
+        cursor.execute(_UPSERT, columns + [[counts[key] for key in keys]])
+    return len(keys)
+
+
+def rebuild(survey_ids=None, since=None):
+    """Recompute the counters from the stored responses.
+
+    Responses of archived partitions are no longer stored, pass ``since``
+    to keep the counters of the days before it.
+
+    :param survey_ids: Only rebuild these surveys.
+    :type survey_ids: list
+
+    :param since: Only rebuild the days from this date on.
+    :type since: date
+    """
+    counter_filter = {}
+    conditions = ['TRUE']
+    params = []
+    if survey_ids is not None:
+        counter_filter['survey_id__in'] = survey_ids
+        conditions.append('survey_id = ANY(%s)')
+        params.append(list(survey_ids))
+    if since is not None:
+        counter_filter['day__gte'] = since
+        conditions.append("(received AT TIME ZONE 'UTC')::date >= %s")
+        params.append(since)
+    where = ' AND '.join(conditions)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Ingestion waits until the rebuild committed, its responses are
+        # then counted on top of the rebuilt rows.
+        cursor.execute(
+            'LOCK TABLE %s IN SHARE ROW EXCLUSIVE MODE' % TABLE)
+        SurveyAnswerCounter.objects.filter(**counter_filter).delete()
+        cursor.execute(
+            _REBUILD.format(
+                table=TABLE, columns=', '.join(KEY), where=where,
+                answer_length=ANSWER_LENGTH),
+            params * 2)
+        return cursor.rowcount
+
+
+def _counters(survey_id, start=None, end=None, district=None, **filters):
+    queryset = SurveyAnswerCounter.objects.filter(
+        survey_id=survey_id, **filters)
+    if start is not None:
+        queryset = queryset.filter(day__gte=start)
+    if end is not None:
+        queryset = queryset.filter(day__lte=end)
+    if district is not None:
+        queryset = queryset.filter(district=district)
+    return queryset
+
+
+def results(survey_id, start=None, end=None, district=None):
+    """Response count and answer counts of every question of a survey.
+
+    :param start: First day to include.
+    :type start: date
+
+    :param end: Last day to include.
+    :type end: date
+
+    :param district: Only count responses of this district.
+    :type district: str
+
+    :returns: ``{'responses': n, 'questions': {code: {answer: n}}}``
+    :rtype: dict
+    """
+    rows = _counters(
+        survey_id, start, end, district
+    ).values('question', 'answer').annotate(
+        total=Sum('count')
+    ).order_by('question', '-total', 'answer')
+
+    summary = {'responses': 0, 'questions': OrderedDict()}
+    for row in rows:
+        if not row['question']:
+            summary['responses'] = row['total']
+        else:
+            summary['questions'].setdefault(
+                row['question'], OrderedDict())[row['answer']] = row['total']
+    return summary
+
+
+def daily(survey_id, question='', answer='', start=None, end=None,
+          district=None):
+    """Responses, or responses giving ``answer`` to ``question``, per day.
+
+    :rtype: list of (date, int)
+    """
+    rows = _counters(
+        survey_id, start, end, district, question=question, answer=answer
+    ).values('day').annotate(total=Sum('count')).order_by('day')
+    return [(row['day'], row['total']) for row in rows]
+
+
+def by_district(survey_id, question='', answer='', start=None, end=None):
+    """Responses, or responses giving ``answer`` to ``question``, per
+    district.
+
+    :rtype: dict
+    """
+    rows = _counters(
+        survey_id, start, end, question=question, answer=answer
+    ).values('district').annotate(total=Sum('count')).order_by('district')
+    return OrderedDict((row['district'], row['total']) for row in rows)
+
+
+def totals(survey_ids, start=None, end=None):
+    """Responses of several surveys, in one query.
+
+    :rtype: dict
+    """
+    queryset = SurveyAnswerCounter.objects.filter(
+        survey_id__in=survey_ids, question='', answer='')
+    if start is not None:
+        queryset = queryset.filter(day__gte=start)
+    if end is not None:
+        queryset = queryset.filter(day__lte=end)
+    rows = queryset.values('survey_id').annotate(
+        total=Sum('count')).order_by()
+    return {row['survey_id']: row['total'] for row in rows}
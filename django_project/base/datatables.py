@@ -0,0 +1,328 @@
+# coding=utf-8
+"""Server-side processing for DataTables.
+
+Translates the parameters sent by DataTables (``draw``, ``start``,
+``length``, ``order``, ``search``, per column searches and the
+SearchBuilder criteria) into a filtered, ordered queryset and returns only
+the rows of the requested page.
+
+Paging is done with a keyset whenever the client asks for the page right
+after the previous one: the response carries a ``cursor`` describing its
+last row and the client sends it back as ``after``. Only jumps to an
+arbitrary page fall back to ``OFFSET``.
+"""
+
+import base64
+import json
+import re
+from functools import reduce
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+MAX_PAGE_LENGTH = 500
+
+_KEY_PART = re.compile(r'\[([^\]]*)\]')
+
+
+def parse_nested(query_dict, prefix):
+    """Rebuild the nested structure jQuery encodes with bracketed keys.
+
+    ``searchBuilder[criteria][0][value][]=a`` becomes
+    ``{'criteria': [{'value': ['a']}]}``.
+
+    :param query_dict: Request parameters.
+    :type query_dict: QueryDict
+
+    :param prefix: Name of the top level parameter, e.g. ``searchBuilder``.
+    :type prefix: str
+
+    :rtype: dict
+    """
+    root = {}
+    for key in query_dict:
+        if not key.startswith(prefix + '['):
+            continue
+        parts = _KEY_PART.findall(key[len(prefix):])
+        values = query_dict.getlist(key)
+        node = root
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        last = parts[-1] if parts else ''
+        if last == '':
+            node.setdefault('', []).extend(values)
+        else:
+            node[last] = values[-1]
+    return _listify(root)
+
+
+def _listify(node):
+    """Turn dicts with numeric keys, and ``[]`` leaves, into lists."""
+    if not isinstance(node, dict):
+        return node
+    if set(node) == {''}:
+        return node['']
+    if node and all(key.isdigit() for key in node):
+        return [_listify(node[key]) for key in sorted(node, key=int)]
+    return {key: _listify(value) for key, value in node.items()}
+
+
+class Column(object):
+    """A column of a server-side table.
+
+    :param data: Name of the column in the JSON rows; matches the
+        ``columns[i][data]`` sent by DataTables.
+    :param field: ORM path used for filtering and ordering, defaults to
+        ``data``.
+    :param render: Callable building the cell value from an object,
+        defaults to following ``field``.
+    """
+
+    def __init__(self, data, field=None, searchable=True, orderable=True,
+                 render=None):
+        self.data = data
+        self.field = field or data
+        self.searchable = searchable
+        self.orderable = orderable
+        self._render = render
+
+    def render(self, obj):
+        if self._render is not None:
+            return self._render(obj)
+        value = obj
+        for attr in self.field.split('__'):
+            value = getattr(value, attr, None)
+            if value is None:
+                break
+        return value
+
+
+# SearchBuilder condition -> (lookup, negate)
+SEARCH_BUILDER_LOOKUPS = {
+    '=': ('exact', False),
+    '!=': ('exact', True),
+    '<': ('lt', False),
+    '<=': ('lte', False),
+    '>': ('gt', False),
+    '>=': ('gte', False),
+    'starts': ('istartswith', False),
+    '!starts': ('istartswith', True),
+    'contains': ('icontains', False),
+    '!contains': ('icontains', True),
+    'ends': ('iendswith', False),
+    '!ends': ('iendswith', True),
+}
+
+
+class DataTablesQuery(object):
+    """Applies the DataTables parameters of a request to a queryset."""
+
+    def __init__(self, params, columns):
+        """
+        :param params: The request parameters.
+        :type params: QueryDict
+
+        :param columns: Columns of the table, in display order.
+        :type columns: list of Column
+        """
+        self.params = params
+        self.columns = {column.data: column for column in columns}
+        self.draw = self._int('draw', 0)
+        self.start = max(self._int('start', 0), 0)
+        length = self._int('length', 10)
+        self.length = MAX_PAGE_LENGTH if length < 0 else min(
+            length, MAX_PAGE_LENGTH)
+
+    def _int(self, name, default):
+        try:
+            return int(self.params.get(name, default))
+        except (TypeError, ValueError):
+            return default
+
+    def _column_at(self, index):
+        data = self.params.get('columns[%s][data]' % index)
+        return self.columns.get(data)
+
+    def ordering(self):
+        """Columns to order by, as ``(field, descending)`` pairs.
+
+        The primary key always comes last so that the order is total,
+        which the keyset pagination relies on.
+        """
+        ordering = []
+        index = 0
+        while 'order[%s][column]' % index in self.params:
+            column = self._column_at(
+                self.params.get('order[%s][column]' % index))
+            if column is not None and column.orderable:
+                descending = self.params.get(
+                    'order[%s][dir]' % index) == 'desc'
+                ordering.append((column.field, descending))
+            index += 1
+        ordering.append(('pk', ordering[0][1] if ordering else False))
+        return ordering
+
+    def search_filter(self):
+        """Global and per column search, matching on value prefixes."""
+        condition = Q()
+        value = self.params.get('search[value]', '').strip()
+        if value:
+            searchable = [
+                column for column in self.columns.values()
+                if column.searchable]
+            if searchable:
+                condition &= reduce(lambda a, b: a | b, [
+                    Q(**{'%s__istartswith' % column.field: value})
+                    for column in searchable])
+
+        index = 0
+        while 'columns[%s][data]' % index in self.params:
+            column = self._column_at(index)
+            value = self.params.get(
+                'columns[%s][search][value]' % index, '').strip()
+            if column is not None and column.searchable and value:
+                condition &= Q(**{'%s__istartswith' % column.field: value})
+            index += 1
+        return condition
+
+    def search_builder_filter(self):
+        """Translate the SearchBuilder criteria tree into a ``Q``."""
+        tree = parse_nested(self.params, 'searchBuilder')
+        if not tree:
+            return Q()
+        return self._criteria_group(tree)
+
+    def _criteria_group(self, group):
+        conditions = []
+        for criterion in group.get('criteria') or []:
+            if 'criteria' in criterion:
+                conditions.append(self._criteria_group(criterion))
+            else:
+                condition = self._criterion(criterion)
+                if condition is not None:
+                    conditions.append(condition)
+        if not conditions:
+            return Q()
+        if group.get('logic') == 'OR':
+            return reduce(lambda a, b: a | b, conditions)
+        return reduce(lambda a, b: a & b, conditions)
+
+    def _criterion(self, criterion):
+        column = self.columns.get(criterion.get('origData'))
+        operator = criterion.get('condition')
+        if column is None or not column.searchable:
+            return None
+        field = column.field
+
+        if operator in ('null', '!null'):
+            condition = Q(**{'%s__isnull' % field: True})
+            return ~condition if operator == '!null' else condition
+
+        values = [
+            criterion.get(key) for key in ('value1', 'value2')
+            if criterion.get(key) not in (None, '')]
+        if not values:
+            values = [
+                value for value in criterion.get('value') or []
+                if value != '']
+        if not values:
+            return None
+
+        if operator in ('between', '!between'):
+            if len(values) < 2:
+                return None
+            condition = Q(**{'%s__range' % field: values[:2]})
+            return ~condition if operator == '!between' else condition
+
+        if operator not in SEARCH_BUILDER_LOOKUPS:
+            return None
+        lookup, negate = SEARCH_BUILDER_LOOKUPS[operator]
+        condition = Q(**{'%s__%s' % (field, lookup): values[0]})
+        return ~condition if negate else condition
+
+    def keyset_filter(self, ordering, cursor):
+        """Rows strictly after ``cursor`` in the given ordering.
+
+        For ``a ASC, pk ASC`` and a cursor ``(x, y)`` this is
+        ``a > x OR (a = x AND pk > y)``, which the database answers from
+        an index on ``(a, pk)`` without scanning the skipped rows.
+        """
+        condition = Q()
+        equal = Q()
+        for (field, descending), value in zip(ordering, cursor):
+            lookup = '%s__lt' % field if descending else '%s__gt' % field
+            condition |= equal & Q(**{lookup: value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def encode_cursor(self, obj, ordering):
+        values = []
+        for field, _ in ordering:
+            value = obj
+            for attr in field.split('__'):
+                value = getattr(value, attr)
+            values.append(value)
+        payload = json.dumps(
+            {'values': values, 'ordering': ordering, 'start': self.start,
+             'length': self.length},
+            cls=DjangoJSONEncoder)
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, ordering):
+        """Return the cursor values when they fit the requested page."""
+        raw = self.params.get('after')
+        if not raw:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(raw.encode()))
+        except (ValueError, TypeError):
+            return None
+        ordering_matches = [
+            list(item) for item in ordering] == payload.get('ordering')
+        # The page of the cursor, whatever the length of the requested one.
+        follows = (
+            payload.get('start', 0) + payload.get('length', 0) == self.start)
+        values = payload.get('values') or []
+        if not ordering_matches or not follows or None in values:
+            return None
+        return values
+
+    def response(self, queryset):
+        """Evaluate the page and build the JSON expected by DataTables.
+
+        :param queryset: All rows of the table before any filtering.
+        :type queryset: QuerySet
+
+        :rtype: dict
+        """
+        records_total = queryset.count()
+        condition = self.search_filter() & self.search_builder_filter()
+        filtered = queryset.filter(condition)
+        records_filtered = filtered.count() if condition else records_total
+
+        ordering = self.ordering()
+        filtered = filtered.order_by(*[
+            '-%s' % field if descending else field
+            for field, descending in ordering])
+        cursor = self.decode_cursor(ordering)
+        if cursor is not None:
+            page = list(filtered.filter(
+                self.keyset_filter(ordering, cursor))[:self.length])
+        else:
+            page = list(filtered[self.start:self.start + self.length])
+
+        data = []
+        for obj in page:
+            row = {
+                name: column.render(obj)
+                for name, column in self.columns.items()}
+            row['DT_RowId'] = 'row-%s' % obj.pk
+            data.append(row)
+        return {
+            'draw': self.draw,
+            'recordsTotal': records_total,
+            'recordsFiltered': records_filtered,
+            'data': data,
+            'cursor': (
+                self.encode_cursor(page[-1], ordering) if page else None),
+        }
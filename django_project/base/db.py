@@ -0,0 +1,129 @@
+# coding=utf-8
+"""Health checks and metrics for persistent database connections.
+
+With ``CONN_MAX_AGE`` set, a uWSGI or Celery worker reuses its connection
+across requests and tasks. A connection that sat idle may have been cut by
+a database or pgbouncer restart in the meantime; Django 2.2 only notices
+once a query fails. :func:`check_connections` runs before each request and
+task and replaces such connections before they are used.
+"""
+
+import logging
+import os
+import socket
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+METRICS_PREFIX = 'db-pool'
+METRICS = ('connections_created', 'health_checks', 'reconnects')
+
+
+def _health_check_after():
+    # Seconds a connection may stay idle before it is checked again.
+    return getattr(settings, 'DATABASE_HEALTH_CHECK_AFTER', 30)
+
+
+def _metrics_timeout():
+    # Seconds a counter outlives the last increment of its process, so
+    # that the counters of respawned workers expire.
+    return getattr(settings, 'DATABASE_METRICS_TIMEOUT', 60 * 60 * 24)
+
+
+def _metrics_key(name):
+    return '%s:%s:%s-%s' % (
+        METRICS_PREFIX, name, socket.gethostname(), os.getpid())
+
+
+def record_metric(name):
+    """Increment a connection counter of the current process.
+
+    Counters live in the shared cache so that
+    ``manage.py connection_stats`` can report them for every worker. Each
+    increment pushes the expiry back by ``DATABASE_METRICS_TIMEOUT``
+    seconds, the counters of processes gone for that long are dropped.
+    """
+    key = _metrics_key(name)
+    timeout = _metrics_timeout()
+    try:
+        if not cache.add(key, 1, timeout=timeout):
+            cache.incr(key)
+            cache.touch(key, timeout)
+    except Exception:
+        # Metrics must never break a request.
+        logger.debug('Could not record %s', name, exc_info=True)
+
+
+def collect_metrics():
+    """Counters of every process, keyed by metric then process.
+
+    Requires the django-redis cache backend, which can list keys.
+
+    :rtype: dict
+    """
+    metrics = {name: {} for name in METRICS}
+    values = cache.get_many(cache.keys('%s:*' % METRICS_PREFIX))
+    for key, value in values.items():
+        _, name, process = key.split(':', 2)
+        metrics.setdefault(name, {})[process] = value
+    return metrics
+
+
+def check_connections(**kwargs):
+    """Close persistent connections that stopped working while idle.
+
+    Only connections idle for longer than ``DATABASE_HEALTH_CHECK_AFTER``
+    seconds are checked, so busy workers do not pay a round trip per
+    request. A closed connection is transparently reopened by the next
+    query.
+    """
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is None:
+            continue
+        idle = now - getattr(connection, 'last_used', now)
+        if idle < _health_check_after():
+            continue
+        record_metric('health_checks')
+        if not connection.is_usable():
+            logger.warning(
+                'Database connection %s went away after %.0fs idle, '
+                'reconnecting', connection.alias, idle)
+            record_metric('reconnects')
+            connection.close()
+
+
+def mark_connections_used(**kwargs):
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is not None:
+            connection.last_used = now
+
+
+def connection_created(sender, connection, **kwargs):
+    record_metric('connections_created')
+    connection.last_used = time.monotonic()
+
+
+def connect_connection_signals():
+    """Run the health checks around requests and Celery tasks."""
+    from celery.signals import task_postrun, task_prerun
+    from django.core.signals import request_finished, request_started
+    from django.db.backends.signals import connection_created as created
+
+    request_started.connect(
+        check_connections, dispatch_uid='base.db.check_connections')
+    request_finished.connect(
+        mark_connections_used, dispatch_uid='base.db.mark_used')
+    task_prerun.connect(
+        check_connections, dispatch_uid='base.db.task_check_connections',
+        weak=False)
+    task_postrun.connect(
+        mark_connections_used, dispatch_uid='base.db.task_mark_used',
+        weak=False)
+    created.connect(
+        connection_created, dispatch_uid='base.db.connection_created')
@@ -0,0 +1,119 @@
+# coding=utf-8
+"""Refreshing the nginx micro-cache after writes.
+
+nginx keeps anonymous API reads for a few seconds, see
+``deployment/sites-enabled/uwsgi_proxy.inc``. Listings that should not
+lag behind a write that long are fetched again through nginx with an
+``X-Cache-Refresh`` header, which makes nginx bypass its cached copy and
+store the fresh response in its place. By default these are the list
+endpoints of the API routers, see :func:`listing_paths`. Open source
+nginx cannot purge, this is its equivalent.
+"""
+
+import logging
+import urllib.request
+from importlib import import_module
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import NoReverseMatch, reverse
+
+logger = logging.getLogger(__name__)
+
+_SCHEDULED_KEY = 'edge-cache:refresh-scheduled'
+
+
+def edge_cache_setting(name):
+    """Read an ``EDGE_CACHE_*`` setting, falling back to its default."""
+    defaults = {
+        # Base URL of nginx as seen from the workers, refreshing is
+        # disabled without it.
+        'URL': None,
+        # Host header of the refreshes. nginx keys its cache on the host
+        # and Django builds absolute links from it, so this must be the
+        # public host name rather than that of ``URL``.
+        'HOST': None,
+        # Paths fetched again after writes to the tralard models, the
+        # list endpoints of the routers of ``ROUTER_URLCONF`` by default.
+        'REFRESH_PATHS': None,
+        # Module declaring the Django REST framework routers of the API.
+        'ROUTER_URLCONF': 'tralard.api_router',
+        # Seconds to wait for nginx per path.
+        'TIMEOUT': 10,
+    }
+    return getattr(settings, 'EDGE_CACHE_%s' % name, defaults[name])
+
+
+def listing_paths(urlconf=None):
+    """Paths of the list endpoints registered on the routers of an
+    URLconf module.
+
+    Endpoints whose URL needs arguments, e.g. nested routes, are left out.
+
+    :param urlconf: Dotted path of the module, defaults to the
+        ``EDGE_CACHE_ROUTER_URLCONF`` setting.
+    :type urlconf: str
+
+    :rtype: list
+    """
+    from rest_framework.routers import BaseRouter
+
+    try:
+        module = import_module(urlconf or edge_cache_setting('ROUTER_URLCONF'))
+    except ImportError:
+        logger.warning('No API routers to refresh the listings of')
+        return []
+    paths = set()
+    for router in vars(module).values():
+        if not isinstance(router, BaseRouter):
+            continue
+        for prefix, viewset, basename in router.registry:
+            if not hasattr(viewset, 'list'):
+                continue
+            try:
+                paths.add(reverse('%s-list' % basename))
+            except NoReverseMatch:
+                continue
+    return sorted(paths)
+
+
+def refresh(paths=None):
+    """Have nginx replace its cached copy of ``paths``.
+
+    :returns: Number of paths refreshed.
+    :rtype: int
+    """
+    base_url = edge_cache_setting('URL')
+    if not base_url:
+        return 0
+    headers = {'X-Cache-Refresh': '1'}
+    host = edge_cache_setting('HOST')
+    if host:
+        headers['Host'] = host
+    refreshed = 0
+    if not paths:
+        paths = edge_cache_setting('REFRESH_PATHS') or listing_paths()
+    for path in paths:
+        request = urllib.request.Request(
+            base_url.rstrip('/') + path, headers=headers)
+        try:
+            with urllib.request.urlopen(
+                    request, timeout=edge_cache_setting('TIMEOUT')):
+                refreshed += 1
+        except Exception as error:
+            # The cached copy expires on its own within seconds.
+            logger.warning('Could not refresh %s: %s', path, error)
+    return refreshed
+
+
+def schedule_refresh():
+    """Refresh the cached listings on the worker, once per burst."""
+    from base.tasks import refresh_edge_cache
+
+    if not edge_cache_setting('URL'):
+        return
+    try:
+        if cache.add(_SCHEDULED_KEY, True, timeout=5):
+            refresh_edge_cache.apply_async(countdown=1)
+    except Exception:
+        logger.exception('Could not schedule the edge cache refresh')
@@ -0,0 +1,168 @@
+# coding=utf-8
+"""Per request query, template and cache metrics.
+
+:class:`base.middleware.InstrumentationMiddleware` activates a
+:class:`Recorder` for every request. The recorder is fed by a database
+execute wrapper, by the template engine and by the instrumented cache
+backend, and ends up as response headers in debug and as one structured
+log line per request otherwise.
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN \((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Normalise a statement so that repetitions of it compare equal.
+
+    Literals are replaced by placeholders and ``IN`` lists of any length
+    collapse to one, which makes the N queries of an N+1 pattern share a
+    fingerprint.
+
+    :param sql: SQL statement, with or without interpolated parameters.
+    :type sql: str
+
+    :rtype: str
+    """
+    sql = _STRING.sub('%s', sql)
+    sql = _NUMBER.sub('%s', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+class Recorder(object):
+    """Metrics collected while handling one request."""
+
+    def __init__(self):
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.fingerprints = Counter()
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    # Database execute wrapper, see Django's "Database instrumentation".
+    def __call__(self, execute, sql, params, many, context):
+        start = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.monotonic() - start
+            self.query_count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def record_cache(self, hits, misses):
+        self.cache_hits += hits
+        self.cache_misses += misses
+
+    @property
+    def duplicates(self):
+        """Fingerprints executed more than once, most repeated first.
+
+        :rtype: list of (str, int)
+        """
+        return [
+            (sql, count) for sql, count in self.fingerprints.most_common()
+            if count > 1]
+
+    @property
+    def duplicate_count(self):
+        return sum(count - 1 for _, count in self.duplicates)
+
+    @property
+    def cache_hit_ratio(self):
+        lookups = self.cache_hits + self.cache_misses
+        return round(self.cache_hits / lookups, 3) if lookups else None
+
+    def as_dict(self):
+        return {
+            'queries': self.query_count,
+            'duplicate_queries': self.duplicate_count,
+            'sql_ms': round(self.sql_time * 1000, 1),
+            'template_ms': round(self.template_time * 1000, 1),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'cache_hit_ratio': self.cache_hit_ratio,
+        }
+
+    def as_headers(self):
+        headers = {
+            'X-Query-Count': self.query_count,
+            'X-Duplicate-Query-Count': self.duplicate_count,
+            'X-SQL-Time-Ms': '%.1f' % (self.sql_time * 1000),
+            'X-Template-Time-Ms': '%.1f' % (self.template_time * 1000),
+            'X-Cache-Hits': self.cache_hits,
+            'X-Cache-Misses': self.cache_misses,
+        }
+        return {name: str(value) for name, value in headers.items()}
+
+    def log(self, **extra):
+        """Emit the metrics as a single JSON log line."""
+        record = dict(self.as_dict(), **extra)
+        logger.info(json.dumps(record, sort_keys=True))
+
+
+def current_recorder():
+    """The recorder of the request being handled, if any."""
+    return getattr(_local, 'recorder', None)
+
+
+@contextmanager
+def recording(recorder):
+    """Feed every query and template render of the block to ``recorder``.
+    """
+    previous = current_recorder()
+    _local.recorder = recorder
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            yield recorder
+    finally:
+        _local.recorder = previous
+
+
+def instrument_templates():
+    """Time top level template renders for the active recorder.
+
+    Included templates render inside their parent, so only the outermost
+    render is timed.
+    """
+    from django.template.base import Template
+
+    if getattr(Template.render, 'instrumented', False):
+        return
+    render = Template.render
+
+    def timed_render(self, context):
+        recorder = current_recorder()
+        if recorder is None:
+            return render(self, context)
+        recorder.template_depth += 1
+        start = time.monotonic()
+        try:
+            return render(self, context)
+        finally:
+            recorder.template_depth -= 1
+            if recorder.template_depth == 0:
+                recorder.template_time += time.monotonic() - start
+
+    timed_render.instrumented = True
+    Template.render = timed_render
@@ -0,0 +1,234 @@
+# coding=utf-8
+"""Periodic maintenance and precomputation run by celery beat.
+
+The jobs are plain functions, the tasks of :mod:`base.tasks.maintenance`
+run them on the schedule of ``CELERY_BEAT_SCHEDULE``. Every run holds a
+lock in the shared cache so that a slow run is never overlapped by the
+next one, even with two beat processes, and leaves its outcome and
+duration in the cache, where ``manage.py periodic_tasks`` reports it.
+"""
+
+import logging
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+METRICS_PREFIX = 'periodic'
+
+
+def maintenance_setting(name):
+    """Read a ``MAINTENANCE_*`` setting, falling back to its default."""
+    defaults = {
+        # Directory of MEDIA_ROOT holding temporary files, and the hours
+        # they are kept.
+        'TEMP_DIR': 'temp',
+        'TEMP_FILE_HOURS': 24,
+        # Days of audit log kept, and rows deleted per statement.
+        'AUDIT_LOG_DAYS': 180,
+        'AUDIT_DELETE_BATCH': 5000,
+        # Map tiles up to this zoom are rendered when warming the cache.
+        'WARM_TILE_MAX_ZOOM': 8,
+        # Upper bound of the random delay of a run, in seconds.
+        'JITTER': 5 * 60,
+    }
+    return getattr(settings, 'MAINTENANCE_%s' % name, defaults[name])
+
+
+def _lock_key(name):
+    return '%s:lock:%s' % (METRICS_PREFIX, name)
+
+
+def _metrics_key(name):
+    return '%s:metrics:%s' % (METRICS_PREFIX, name)
+
+
+@contextmanager
+def run_lock(name, timeout):
+    """Hold the lock of a periodic job, yielding whether it was free.
+
+    The lock expires after ``timeout`` seconds, a worker killed in the
+    middle of a run cannot block the job for longer.
+    """
+    key = _lock_key(name)
+    token = uuid.uuid4().hex
+    acquired = cache.add(key, token, timeout)
+    try:
+        yield acquired
+    finally:
+        if acquired and cache.get(key) == token:
+            cache.delete(key)
+
+
+def record_run(name, status, duration=None):
+    """Store the outcome of a run of a periodic job.
+
+    :param status: ``success``, ``failure`` or ``skipped``.
+    :type status: str
+    """
+    key = _metrics_key(name)
+    try:
+        metrics = cache.get(key) or {
+            'runs': 0, 'failures': 0, 'skipped': 0}
+        if status == 'skipped':
+            metrics['skipped'] += 1
+        else:
+            metrics['runs'] += 1
+            metrics['failures'] += status == 'failure'
+            metrics['last_duration'] = duration
+            metrics['last_status'] = status
+            metrics['last_run'] = timezone.now().isoformat()
+        cache.set(key, metrics, timeout=None)
+    except Exception:
+        # Metrics must never fail a job.
+        logger.debug('Could not record the run of %s', name, exc_info=True)
+
+
+def run_metrics(name):
+    """Counters and last outcome of a periodic job, ``{}`` if it never ran.
+
+    :rtype: dict
+    """
+    return cache.get(_metrics_key(name)) or {}
+
+
+@contextmanager
+def measured_run(name):
+    """Record the duration and outcome of the code run in the block."""
+    start = time.monotonic()
+    try:
+        yield
+    except Exception:
+        duration = time.monotonic() - start
+        record_run(name, 'failure', duration)
+        logger.exception('%s failed after %.2fs', name, duration)
+        raise
+    duration = time.monotonic() - start
+    record_run(name, 'success', duration)
+    logger.info('%s ran in %.2fs', name, duration)
+
+
+def clear_temp_files(max_age_hours=None):
+    """Delete the temporary files of ``MEDIA_ROOT`` past their age.
+
+    :returns: Number of files deleted.
+    :rtype: int
+    """
+    if max_age_hours is None:
+        max_age_hours = maintenance_setting('TEMP_FILE_HOURS')
+    root = os.path.join(
+        settings.MEDIA_ROOT, maintenance_setting('TEMP_DIR'))
+    cutoff = time.time() - max_age_hours * 60 * 60
+    deleted = 0
+    for directory, _, files in os.walk(root, topdown=False):
+        for name in files:
+            path = os.path.join(directory, name)
+            try:
+                if os.lstat(path).st_mtime < cutoff:
+                    os.remove(path)
+                    deleted += 1
+            except FileNotFoundError:
+                continue
+        if directory != root and not os.listdir(directory):
+            os.rmdir(directory)
+    return deleted
+
+
+def clear_sessions():
+    """Delete the expired sessions, as ``manage.py clearsessions`` does."""
+    engine = import_module(settings.SESSION_ENGINE)
+    try:
+        engine.SessionStore.clear_expired()
+    except NotImplementedError:
+        # Cache backed sessions expire on their own.
+        logger.info(
+            '%s does not need clearing expired sessions',
+            settings.SESSION_ENGINE)
+
+
+def prune_audit_log(days=None):
+    """Delete the audit events older than ``days``, in small batches.
+
+    Batches keep each statement short, the tables are written to on
+    every request.
+
+    :returns: Number of events deleted.
+    :rtype: int
+    """
+    from easyaudit.models import CRUDEvent, LoginEvent, RequestEvent
+
+    if days is None:
+        days = maintenance_setting('AUDIT_LOG_DAYS')
+    cutoff = timezone.now() - timedelta(days=days)
+    batch = maintenance_setting('AUDIT_DELETE_BATCH')
+    deleted = 0
+    for model in (RequestEvent, CRUDEvent, LoginEvent):
+        expired = model.objects.filter(datetime__lt=cutoff).order_by()
+        while True:
+            ids = list(expired.values_list('pk', flat=True)[:batch])
+            if not ids:
+                break
+            model.objects.filter(pk__in=ids).delete()
+            deleted += len(ids)
+    return deleted
+
+
+def warm_map_tiles(max_zoom=None):
+    """Render the map tiles covering the boundaries into the cache.
+
+    :returns: Number of tiles rendered.
+    :rtype: int
+    """
+    from django.contrib.gis.db.models import Extent
+
+    from base.maptiles import (
+        UnknownLayer,
+        get_tile,
+        map_setting,
+        tiles_covering,
+    )
+    from base.models import AdminBoundary
+
+    if max_zoom is None:
+        max_zoom = maintenance_setting('WARM_TILE_MAX_ZOOM')
+    extent = AdminBoundary.objects.aggregate(extent=Extent('geom'))['extent']
+    if extent is None:
+        return 0
+    rendered = 0
+    for layer in map_setting('LAYERS'):
+        try:
+            for z in range(max_zoom + 1):
+                for x, y in tiles_covering(extent, z):
+                    get_tile(layer, z, x, y)
+                    rendered += 1
+        except UnknownLayer as error:
+            logger.warning('Not warming %s: %s', layer, error)
+    return rendered
+
+
+def warm_dashboard():
+    """Precompute what the first visitors of the day would wait for.
+
+    Renders the report charts whose data changed overnight and the map
+    tiles of the country, both shared by every worker.
+
+    :returns: Reports and tiles rendered.
+    :rtype: dict
+    """
+    from base.charts import render_charts, report_projects
+
+    reports = 0
+    for slug in report_projects():
+        try:
+            reports += render_charts(slug)
+        except Exception:
+            logger.exception('Could not render the charts of %r', slug)
+    return {'reports': reports, 'tiles': warm_map_tiles()}
@@ -0,0 +1,27 @@
+# coding=utf-8
+from django.core.management.base import BaseCommand
+
+from base.boundaries import assign_beneficiaries, assign_responses
+from base.maptiles import UnknownLayer
+
+
+class Command(BaseCommand):
+    """Locate beneficiaries and survey responses in the boundaries."""
+    help = (
+        'Assign provinces and districts to the located beneficiaries and '
+        'survey responses, e.g. after loading boundaries.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reassign', action='store_true',
+            help='Also update responses that already have a district.')
+
+    def handle(self, *args, **options):
+        responses = assign_responses(reassign=options['reassign'])
+        self.stdout.write('Assigned districts to %s responses' % responses)
+        try:
+            beneficiaries = assign_beneficiaries()
+        except UnknownLayer as error:
+            self.stderr.write('Beneficiaries are not located: %s' % error)
+        else:
+            self.stdout.write('Located %s beneficiaries' % beneficiaries)
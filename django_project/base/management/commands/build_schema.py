@@ -0,0 +1,15 @@
+# coding=utf-8
+from django.core.management.base import BaseCommand
+
+from base.schema import build_schema
+
+
+class Command(BaseCommand):
+    """Write the OpenAPI schema served by the API documentation."""
+    help = (
+        'Generate the OpenAPI schema once, as swagger.json and swagger.yaml '
+        'in SCHEMA_ROOT. Run it on every deploy.')
+
+    def handle(self, *args, **options):
+        for path in build_schema():
+            self.stdout.write(self.style.SUCCESS('Wrote %s' % path))
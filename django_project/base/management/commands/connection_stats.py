@@ -0,0 +1,42 @@
+# coding=utf-8
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from base.db import METRICS, collect_metrics
+
+ACTIVITY_SQL = """
+    SELECT application_name, state, count(*)
+    FROM pg_stat_activity
+    WHERE datname = current_database()
+    GROUP BY application_name, state
+    ORDER BY application_name, state
+"""
+
+
+class Command(BaseCommand):
+    """Report how database connections are being used."""
+    help = (
+        'Show the connection counters of the uwsgi and celery workers and '
+        'the server side connections per application.')
+
+    def handle(self, *args, **options):
+        metrics = collect_metrics()
+        processes = sorted(set().union(*metrics.values()))
+        self.stdout.write(self.style.MIGRATE_HEADING('Worker counters'))
+        self.stdout.write('%-32s %s' % ('process', ' '.join(
+            '%20s' % name for name in METRICS)))
+        for process in processes:
+            self.stdout.write('%-32s %s' % (process, ' '.join(
+                '%20s' % metrics[name].get(process, 0)
+                for name in METRICS)))
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            'Server connections (pg_stat_activity)'))
+        with connection.cursor() as cursor:
+            cursor.execute(ACTIVITY_SQL)
+            for application, state, count in cursor.fetchall():
+                self.stdout.write('%-32s %-20s %s' % (
+                    application or '-', state or '-', count))
+            cursor.execute('SHOW max_connections')
+            self.stdout.write(
+                'max_connections: %s' % cursor.fetchone()[0])
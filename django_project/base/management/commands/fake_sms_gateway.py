@@ -0,0 +1,132 @@
+# coding=utf-8
+"""Load test the SMS webhook the way a gateway would call it.
+
+Posts batches of generated survey answers to the webhook from many
+threads and reports the throughput and latency of the web tier, e.g.::
+
+    python manage.py fake_sms_gateway --url http://web/sms/inbound/ \\
+        --keyword FLOOD --messages 100000 --concurrency 32
+
+A share of the messages is sent twice, as gateways do on retries, which
+exercises the deduplication of the consumer.
+"""
+
+import json
+import random
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from base.sms import sms_setting
+
+
+def percentile(values, share):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class Command(BaseCommand):
+    """Simulate an SMS gateway delivering a campaign burst."""
+    help = 'Post generated SMS survey answers to the inbound webhook.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', default='http://localhost/sms/inbound/')
+        parser.add_argument(
+            '--token', default=None,
+            help='Gateway token, SMS_GATEWAY_TOKEN by default.')
+        parser.add_argument('--keyword', default='TEST')
+        parser.add_argument(
+            '--answers', default='YES,NO,1,2,3',
+            help='Comma separated answers to pick from.')
+        parser.add_argument('--questions', type=int, default=3)
+        parser.add_argument('--messages', type=int, default=10000)
+        parser.add_argument(
+            '--batch', type=int, default=100,
+            help='Messages per request.')
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument(
+            '--duplicates', type=float, default=0.05,
+            help='Share of the messages delivered twice.')
+
+    def handle(self, *args, **options):
+        if options['batch'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--batch and --concurrency must be positive.')
+        if options['messages'] < 1:
+            raise CommandError('--messages must be positive.')
+        self.url = options['url']
+        self.token = options['token'] or sms_setting('GATEWAY_TOKEN')
+        answers = options['answers'].split(',')
+
+        messages = []
+        for _ in range(options['messages']):
+            message = {
+                'message_id': uuid.uuid4().hex,
+                'from': '+26097%07d' % random.randint(0, 9999999),
+                'text': ' '.join([options['keyword']] + [
+                    random.choice(answers)
+                    for _ in range(options['questions'])]),
+                'timestamp': timezone.now().isoformat(),
+            }
+            messages.append(message)
+            if random.random() < options['duplicates']:
+                messages.append(message)
+        random.shuffle(messages)
+        batches = [
+            messages[start:start + options['batch']]
+            for start in range(0, len(messages), options['batch'])]
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            results = list(executor.map(self.post, batches))
+        elapsed = time.monotonic() - start
+
+        statuses = Counter(str(status) for status, _, _ in results)
+        latencies = [latency for _, latency, _ in results]
+        accepted = sum(count for _, _, count in results)
+        self.stdout.write(
+            '%s messages in %s requests over %.2fs' % (
+                len(messages), len(batches), elapsed))
+        self.stdout.write(
+            'Throughput: %.0f messages/s, %.0f requests/s' % (
+                len(messages) / elapsed, len(batches) / elapsed))
+        self.stdout.write(
+            'Latency: p50 %.0fms, p95 %.0fms, p99 %.0fms, max %.0fms' % (
+                percentile(latencies, 0.5) * 1000,
+                percentile(latencies, 0.95) * 1000,
+                percentile(latencies, 0.99) * 1000,
+                max(latencies) * 1000))
+        self.stdout.write('Statuses: %s' % ', '.join(
+            '%s x%s' % item for item in sorted(statuses.items())))
+        style = self.style.SUCCESS if accepted == len(messages) else (
+            self.style.WARNING)
+        self.stdout.write(style(
+            '%s of %s messages accepted' % (accepted, len(messages))))
+
+    def post(self, batch):
+        """Send one request, returning its status, latency and accepted
+        message count."""
+        request = Request(
+            self.url, data=json.dumps({'messages': batch}).encode('utf-8'),
+            headers={
+                'Content-Type': 'application/json',
+                'X-Gateway-Token': self.token or '',
+            })
+        start = time.monotonic()
+        try:
+            with urlopen(request, timeout=30) as response:
+                body = json.loads(response.read().decode('utf-8'))
+                status = response.status
+        except HTTPError as error:
+            return error.code, time.monotonic() - start, 0
+        except URLError:
+            return 'error', time.monotonic() - start, 0
+        return status, time.monotonic() - start, body.get('accepted', 0)
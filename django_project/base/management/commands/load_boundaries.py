@@ -0,0 +1,71 @@
+# coding=utf-8
+from django.contrib.gis.gdal import DataSource, GDALException
+from django.contrib.gis.geos import MultiPolygon, Polygon
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from base.boundaries import simplify_boundaries
+from base.models import AdminBoundary
+
+
+class Command(BaseCommand):
+    """Import province or district polygons from any OGR source."""
+    help = (
+        'Load administrative boundaries from a shapefile, GeoJSON or '
+        'GeoPackage and simplify them for the maps.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File readable by GDAL.')
+        parser.add_argument(
+            '--level', required=True,
+            choices=[level for level, _ in AdminBoundary.LEVEL_CHOICES])
+        parser.add_argument(
+            '--name-field', default='name',
+            help='Attribute holding the boundary name.')
+        parser.add_argument(
+            '--code-field', default='code',
+            help='Attribute holding the unique boundary code.')
+        parser.add_argument(
+            '--parent-field',
+            help='Attribute holding the code of the containing province.')
+        parser.add_argument('--layer', type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            layer = DataSource(options['path'])[options['layer']]
+        except (GDALException, IndexError) as error:
+            raise CommandError(error)
+        parents = {}
+        if options['parent_field']:
+            parents = dict(AdminBoundary.objects.filter(
+                level=AdminBoundary.PROVINCE).values_list('code', 'pk'))
+
+        boundary_ids = []
+        with transaction.atomic():
+            for feature in layer:
+                geom = feature.geom.transform(4326, clone=True).geos
+                if isinstance(geom, Polygon):
+                    geom = MultiPolygon(geom, srid=4326)
+                if not isinstance(geom, MultiPolygon):
+                    raise CommandError(
+                        'Feature %s is a %s' % (feature.fid, geom.geom_type))
+                parent_id = None
+                if options['parent_field']:
+                    parent_code = str(feature.get(options['parent_field']))
+                    parent_id = parents.get(parent_code)
+                    if parent_id is None:
+                        raise CommandError(
+                            'Unknown province %s' % parent_code)
+                boundary, _ = AdminBoundary.objects.update_or_create(
+                    code=str(feature.get(options['code_field'])),
+                    defaults={
+                        'level': options['level'],
+                        'name': str(feature.get(options['name_field'])),
+                        'parent_id': parent_id,
+                        'geom': geom,
+                    })
+                boundary_ids.append(boundary.pk)
+            simplified = simplify_boundaries(boundary_ids=boundary_ids)
+        self.stdout.write(self.style.SUCCESS(
+            'Loaded %s boundaries, %s simplified geometries' % (
+                len(boundary_ids), simplified)))
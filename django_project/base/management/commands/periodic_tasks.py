@@ -0,0 +1,28 @@
+# coding=utf-8
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from base.maintenance import run_metrics
+
+COLUMNS = ('runs', 'failures', 'skipped', 'last_status', 'last_duration')
+
+
+class Command(BaseCommand):
+    """Report the periodic tasks and how their last runs went."""
+    help = (
+        'List the tasks of CELERY_BEAT_SCHEDULE with their run counters, '
+        'last outcome and duration.')
+
+    def handle(self, *args, **options):
+        self.stdout.write('%-32s %-32s %s %s' % (
+            'entry', 'task', ' '.join('%12s' % name for name in COLUMNS),
+            'last_run'))
+        for entry, config in sorted(settings.CELERY_BEAT_SCHEDULE.items()):
+            metrics = run_metrics(config['task'])
+            duration = metrics.get('last_duration')
+            if duration is not None:
+                metrics['last_duration'] = '%.2fs' % duration
+            self.stdout.write('%-32s %-32s %s %s' % (
+                entry, config['task'],
+                ' '.join('%12s' % metrics.get(name, '-') for name in COLUMNS),
+                metrics.get('last_run', '-')))
@@ -0,0 +1,105 @@
+# coding=utf-8
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+import base
+
+PHASES = ('settings', 'apps', 'urls', 'wsgi', 'total')
+APP_STEPS = ('import', 'models', 'ready')
+
+
+def fastest(reports):
+    """Merge the reports of several runs, keeping the lowest timings.
+
+    The fastest run is the one least disturbed by the rest of the machine.
+
+    :rtype: dict
+    """
+    merged = {
+        'phases': {}, 'apps': {}, 'packages': {},
+        'modules': reports[0]['modules'],
+        'deferred': reports[0]['deferred'],
+    }
+    for report in reports:
+        for phase, elapsed in report['phases'].items():
+            merged['phases'][phase] = min(
+                elapsed, merged['phases'].get(phase, elapsed))
+        for label, steps in report['apps'].items():
+            merged_steps = merged['apps'].setdefault(label, {})
+            for step, elapsed in steps.items():
+                merged_steps[step] = min(
+                    elapsed, merged_steps.get(step, elapsed))
+        for package, elapsed in report['packages'].items():
+            merged['packages'][package] = min(
+                elapsed, merged['packages'].get(package, elapsed))
+    return merged
+
+
+class Command(BaseCommand):
+    """Report where the start up time of a process goes."""
+    help = (
+        'Set Django up in fresh interpreters and report the time spent in '
+        'each phase, in the import, models and ready() of each app and in '
+        'the imports of each package.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Interpreters to start, the fastest timings are kept.')
+        parser.add_argument(
+            '--limit', type=int, default=15,
+            help='Packages to list, slowest first.')
+        parser.add_argument(
+            '--json', action='store_true',
+            help='Print the merged report as JSON.')
+
+    def profile(self):
+        environment = dict(
+            os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        process = subprocess.run(
+            [sys.executable, '-c',
+             'from base.startup import main; main()'],
+            cwd=os.path.dirname(os.path.dirname(base.__file__)),
+            env=environment, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True)
+        if process.returncode:
+            raise CommandError(
+                'Could not profile the start up:\n%s' % process.stderr)
+        return json.loads(process.stdout.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        report = fastest([
+            self.profile() for _ in range(max(options['repeat'], 1))])
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+            return
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Phases'))
+        for phase in PHASES:
+            self.stdout.write('%-32s %8.3fs' % (
+                phase, report['phases'].get(phase, 0)))
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Apps'))
+        self.stdout.write('%-32s %s' % ('app', ' '.join(
+            '%9s' % step for step in APP_STEPS)))
+        apps = sorted(
+            report['apps'].items(),
+            key=lambda item: -sum(item[1].values()))
+        for label, steps in apps:
+            self.stdout.write('%-32s %s' % (label, ' '.join(
+                '%8.3fs' % steps.get(step, 0) for step in APP_STEPS)))
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            'Imports (%s modules), slowest packages' % report['modules']))
+        packages = sorted(
+            report['packages'].items(), key=lambda item: -item[1])
+        for package, elapsed in packages[:options['limit']]:
+            self.stdout.write('%-32s %8.3fs' % (package, elapsed))
+        if report['deferred']:
+            self.stdout.write('Deferred until first use: %s' % ', '.join(
+                report['deferred']))
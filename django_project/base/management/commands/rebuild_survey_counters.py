@@ -0,0 +1,29 @@
+# coding=utf-8
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from base.counters import rebuild
+
+
+class Command(BaseCommand):
+    """Recompute the survey counters from the stored responses."""
+    help = 'Recompute the per question survey result counters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--survey', type=int, action='append', default=[],
+            help='Only rebuild the given survey id (repeatable).')
+        parser.add_argument(
+            '--since',
+            help='Only rebuild the days from this date on (YYYY-MM-DD), '
+                 'e.g. to keep the counts of archived partitions.')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_date(options['since'])
+            if since is None:
+                raise CommandError('Invalid date %s' % options['since'])
+        rows = rebuild(options['survey'] or None, since)
+        self.stdout.write(self.style.SUCCESS(
+            'Rebuilt %s survey counters' % rows))
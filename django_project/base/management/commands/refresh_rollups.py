@@ -0,0 +1,24 @@
+# coding=utf-8
+from django.core.management.base import BaseCommand
+
+from base.rollups import refresh_all, refresh_subcomponents
+
+
+class Command(BaseCommand):
+    """Rebuild the dashboard rollup table."""
+    help = 'Recompute the precomputed dashboard aggregates.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--subcomponent', type=int, action='append', default=[],
+            help='Only refresh the given subcomponent id (repeatable).')
+
+    def handle(self, *args, **options):
+        subcomponent_ids = options['subcomponent']
+        if subcomponent_ids:
+            refresh_subcomponents(subcomponent_ids)
+            count = len(subcomponent_ids)
+        else:
+            count = refresh_all()
+        self.stdout.write(self.style.SUCCESS(
+            'Refreshed rollups of %s subcomponents' % count))
@@ -0,0 +1,126 @@
+# coding=utf-8
+import json
+import sys
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base.models import SmsDeadLetter, SmsMessageKey
+from base.sms import (
+    InvalidMessage,
+    failed_buffer,
+    ingest,
+    load_surveys,
+    normalize_message,
+    sms_setting,
+)
+
+
+class Command(BaseCommand):
+    """Ingest SMS messages again.
+
+    Messages already stored are skipped, so replaying is always safe.
+    """
+    help = (
+        'Replay SMS messages from the failed buffer, the dead letters or '
+        'a JSON lines file of gateway payloads.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?',
+            help='JSON lines file of messages as posted by the gateway, '
+                 'or - for stdin.')
+        parser.add_argument(
+            '--failed', action='store_true',
+            help='Replay the batches the consumer could not write.')
+        parser.add_argument(
+            '--dead-letters', action='store_true',
+            help='Parse the dead letters again and drop those that now '
+                 'answer a survey.')
+
+    def handle(self, *args, **options):
+        sources = ('path', 'failed', 'dead_letters')
+        if not any(options[source] for source in sources):
+            raise CommandError(
+                'Give a path, --failed or --dead-letters.')
+        self.surveys = load_surveys()
+        self.batch_size = sms_setting('BATCH_SIZE')
+
+        if options['failed']:
+            self.replay_failed()
+        if options['dead_letters']:
+            self.replay_dead_letters()
+        if options['path']:
+            self.replay_file(options['path'])
+
+    def report(self, source, responses, dead_letters):
+        self.stdout.write(self.style.SUCCESS(
+            '%s: %s responses, %s dead letters' % (
+                source, responses, dead_letters)))
+
+    def replay_failed(self):
+        totals = [0, 0]
+        failed_buffer.recover()
+        while True:
+            claim, messages = failed_buffer.claim(self.batch_size)
+            if claim is None:
+                break
+            try:
+                counts = ingest(messages, self.surveys)
+            except Exception:
+                failed_buffer.release(claim)
+                raise
+            failed_buffer.ack(claim)
+            totals = [a + b for a, b in zip(totals, counts)]
+        self.report('Failed buffer', *totals)
+
+    def replay_dead_letters(self):
+        totals = [0, 0]
+        last_pk = 0
+        while True:
+            letters = list(
+                SmsDeadLetter.objects.filter(pk__gt=last_pk)
+                .order_by('pk')[:self.batch_size])
+            if not letters:
+                break
+            last_pk = letters[-1].pk
+            counts = ingest(
+                [letter.payload for letter in letters], self.surveys)
+            totals = [a + b for a, b in zip(totals, counts)]
+            message_ids = [letter.message_id for letter in letters]
+            SmsDeadLetter.objects.filter(
+                message_id__in=SmsMessageKey.objects.filter(
+                    message_id__in=message_ids).values('message_id')
+            ).delete()
+        self.report('Dead letters', *totals)
+
+    def replay_file(self, path):
+        if path == '-':
+            self.replay_lines(path, sys.stdin)
+            return
+        try:
+            stream = open(path, encoding='utf-8')
+        except OSError as error:
+            raise CommandError(error)
+        with stream:
+            self.replay_lines(path, stream)
+
+    def replay_lines(self, source, stream):
+        totals = [0, 0]
+        rejected = 0
+        lines = (line for line in stream if line.strip())
+        while True:
+            batch = list(islice(lines, self.batch_size))
+            if not batch:
+                break
+            messages = []
+            for line in batch:
+                try:
+                    messages.append(normalize_message(json.loads(line)))
+                except (ValueError, InvalidMessage):
+                    rejected += 1
+            counts = ingest(messages, self.surveys)
+            totals = [a + b for a, b in zip(totals, counts)]
+        self.report(source, *totals)
+        if rejected:
+            self.stderr.write('%s lines were not valid messages' % rejected)
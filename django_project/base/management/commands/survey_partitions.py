@@ -0,0 +1,53 @@
+# coding=utf-8
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from base.partitions import (
+    archive_partitions,
+    ensure_partitions,
+    existing_partitions,
+    partition_name,
+    prune_message_keys,
+)
+
+
+class Command(BaseCommand):
+    """Maintain the monthly partitions of the survey responses."""
+    help = (
+        'Create the survey response partitions of the coming months, '
+        'archive the old ones and prune the message ids recorded before '
+        'them.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead', type=int,
+            default=getattr(settings, 'SURVEY_PARTITIONS_AHEAD', 3),
+            help='Months to create partitions for in advance.')
+        parser.add_argument(
+            '--keep', type=int,
+            default=getattr(settings, 'SURVEY_PARTITIONS_KEEP', None),
+            help='Archive the partitions older than this many months.')
+        parser.add_argument(
+            '--drop', action='store_true',
+            help='Drop old partitions instead of archiving them.')
+        parser.add_argument(
+            '--list', action='store_true',
+            help='Only list the existing partitions.')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for month in existing_partitions():
+                self.stdout.write(partition_name(month))
+            return
+
+        for name in ensure_partitions(
+                options['ahead'], keep_months=options['keep']):
+            self.stdout.write('Created %s' % name)
+        if options['keep'] is not None:
+            for name in archive_partitions(
+                    options['keep'], drop=options['drop']):
+                self.stdout.write('%s %s' % (
+                    'Dropped' if options['drop'] else 'Archived', name))
+            self.stdout.write(
+                'Pruned %s message ids' % prune_message_keys())
+        self.stdout.write(self.style.SUCCESS('Partitions are up to date'))
@@ -0,0 +1,176 @@
+# coding=utf-8
+"""Mapbox vector tiles of the project map, built by PostGIS.
+
+Each layer of ``MAP_LAYERS`` is a model with a geometry field. A tile
+only reads the rows inside its envelope through the spatial index and is
+encoded by ``ST_AsMVT``. Below ``MAP_CLUSTER_MAX_ZOOM`` points are
+snapped to a grid and served as clusters carrying a ``point_count``, so a
+tile of the whole country holds a few dozen features instead of every
+beneficiary.
+
+Tiles are cached under the version of the ``tralard`` cache namespace,
+which changes on every write to the tralard models, so they never need
+to be invalidated one by one.
+"""
+
+import math
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection
+
+from base.cache import TRALARD_NAMESPACE, cache_version
+
+# Width of the Web Mercator world, in metres.
+WORLD_SIZE = 40075016.68557849
+EXTENT = 4096
+BUFFER = 64
+
+
+class UnknownLayer(LookupError):
+    """A layer missing from ``MAP_LAYERS`` or from the installed models."""
+
+
+def map_setting(name):
+    """Read a ``MAP_*`` setting, falling back to its default."""
+    defaults = {
+        # Layer name: model, geometry field and the fields sent along.
+        'LAYERS': {
+            'beneficiaries': {
+                'model': 'tralard.Beneficiary',
+                'geometry': 'location',
+                'properties': ['name'],
+            },
+        },
+        # Zoom levels below this one serve clusters instead of points.
+        'CLUSTER_MAX_ZOOM': 12,
+        # Grid cells per tile side points are clustered into.
+        'CLUSTER_CELLS': 16,
+        'MAX_ZOOM': 20,
+        # Seconds a rendered tile stays in the cache.
+        'TILE_TIMEOUT': 24 * 60 * 60,
+    }
+    return getattr(settings, 'MAP_%s' % name, defaults[name])
+
+
+def valid_tile(z, x, y):
+    return 0 <= z <= map_setting('MAX_ZOOM') and 0 <= x < 2 ** z and (
+        0 <= y < 2 ** z)
+
+
+def tiles_covering(extent, z):
+    """``(x, y)`` of the tiles of zoom ``z`` covering an extent.
+
+    :param extent: ``(west, south, east, north)`` in degrees.
+    :type extent: tuple
+
+    :rtype: list
+    """
+    west, south, east, north = extent
+    last = 2 ** z - 1
+
+    def column(longitude):
+        return min(max(int((longitude + 180) / 360 * 2 ** z), 0), last)
+
+    def row(latitude):
+        latitude = math.radians(max(min(latitude, 85.0511), -85.0511))
+        y = (1 - math.asinh(math.tan(latitude)) / math.pi) / 2
+        return min(max(int(y * 2 ** z), 0), last)
+
+    return [
+        (x, y)
+        for x in range(column(west), column(east) + 1)
+        for y in range(row(north), row(south) + 1)]
+
+
+def layer_source(layer):
+    """Table, geometry column, SRID and property columns of a layer.
+
+    :raises UnknownLayer: When the layer cannot be served.
+    """
+    config = map_setting('LAYERS').get(layer)
+    if config is None:
+        raise UnknownLayer(layer)
+    try:
+        model = apps.get_model(config['model'])
+        geometry = model._meta.get_field(config['geometry'])
+        properties = [
+            model._meta.get_field(name) for name in config['properties']]
+    except (LookupError, FieldDoesNotExist) as error:
+        raise UnknownLayer('%s: %s' % (layer, error))
+    return (
+        model._meta.db_table, geometry.column, geometry.srid,
+        [model._meta.pk.column] + [field.column for field in properties])
+
+
+def tile_sql(layer, z):
+    """SQL encoding a tile of ``layer`` at zoom ``z``.
+
+    The statement takes the ``z``, ``x`` and ``y`` of the tile as
+    parameters.
+    """
+    table, geometry, srid, columns = layer_source(layer)
+    quote = connection.ops.quote_name
+    bounds = (
+        'SELECT ST_TileEnvelope(%%(z)s, %%(x)s, %%(y)s) AS mercator, '
+        'ST_Transform(ST_TileEnvelope(%%(z)s, %%(x)s, %%(y)s), %d) AS native'
+        % srid)
+    where = 'source.%s && bounds.native' % quote(geometry)
+    if z < map_setting('CLUSTER_MAX_ZOOM'):
+        cell = WORLD_SIZE / 2 ** z / map_setting('CLUSTER_CELLS')
+        features = (
+            'SELECT ST_Centroid(ST_Collect(point)) AS point, '
+            'count(*) AS point_count FROM ('
+            'SELECT ST_Transform(source.{geometry}, 3857) AS point '
+            'FROM {table} AS source, bounds WHERE {where}) AS points '
+            'GROUP BY ST_SnapToGrid(point, {cell!r})'
+        ).format(
+            geometry=quote(geometry), table=quote(table), where=where,
+            cell=cell)
+        properties = 'point_count'
+    else:
+        properties = ', '.join(
+            'features.%s' % quote(column) for column in columns)
+        features = (
+            'SELECT ST_Transform(source.{geometry}, 3857) AS point, '
+            '1 AS point_count, {columns} '
+            'FROM {table} AS source, bounds WHERE {where}'
+        ).format(
+            geometry=quote(geometry), table=quote(table), where=where,
+            columns=', '.join(
+                'source.%s' % quote(column) for column in columns))
+        properties += ', features.point_count'
+    return (
+        'WITH bounds AS ({bounds}), features AS ({features}) '
+        'SELECT ST_AsMVT(tile, %(layer)s, {extent}, \'geom\') FROM ('
+        'SELECT ST_AsMVTGeom(features.point, bounds.mercator, {extent}, '
+        '{buffer}) AS geom, {properties} FROM features, bounds) AS tile'
+    ).format(
+        bounds=bounds, features=features, properties=properties,
+        extent=EXTENT, buffer=BUFFER)
+
+
+def render_tile(layer, z, x, y):
+    """Encode a tile, straight from the database."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            tile_sql(layer, z), {'z': z, 'x': x, 'y': y, 'layer': layer})
+        row = cursor.fetchone()
+    return bytes(row[0]) if row and row[0] is not None else b''
+
+
+def get_tile(layer, z, x, y):
+    """A tile of ``layer``, from the cache while the data is unchanged.
+
+    :returns: The tile and the data version it was built from.
+    :rtype: tuple
+    """
+    version = cache_version(TRALARD_NAMESPACE)
+    key = 'map-tile:%s:%s:%s/%s/%s' % (version, layer, z, x, y)
+    tile = cache.get(key)
+    if tile is None:
+        tile = render_tile(layer, z, x, y)
+        cache.set(key, tile, map_setting('TILE_TIMEOUT'))
+    return tile, version
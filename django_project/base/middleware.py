@@ -0,0 +1,82 @@
+# coding=utf-8
+import logging
+import time
+
+from django.conf import settings
+
+from base.instrumentation import Recorder, instrument_templates, recording
+
+logger = logging.getLogger('base.instrumentation')
+
+
+class QueryBudgetExceeded(Exception):
+    """A view ran more queries than its entry in ``QUERY_BUDGETS``."""
+
+
+def query_budget(request):
+    """Maximum number of queries allowed for the view of a request.
+
+    ``QUERY_BUDGETS`` is keyed by view name (``'tralard:map'``) or, for
+    views without one, by path (``'/'``).
+
+    :rtype: int or None
+    """
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    match = request.resolver_match
+    if match is not None and match.view_name in budgets:
+        return budgets[match.view_name]
+    return budgets.get(request.path)
+
+
+class InstrumentationMiddleware(object):
+    """Record query, template and cache metrics for every request.
+
+    In debug the metrics are sent back as ``X-*`` response headers,
+    otherwise they are logged as one JSON line on the
+    ``base.instrumentation`` logger. Requests going over their query budget
+    are logged as warnings, or fail when ``QUERY_BUDGETS_STRICT`` is set as
+    it is in the tests.
+
+    Queries run while a streaming response is consumed happen after the
+    middleware returned and are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument_templates()
+
+    def __call__(self, request):
+        recorder = Recorder()
+        request.instrumentation = recorder
+        start = time.monotonic()
+        with recording(recorder):
+            response = self.get_response(request)
+        duration = time.monotonic() - start
+
+        if settings.DEBUG:
+            for header, value in recorder.as_headers().items():
+                response[header] = value
+        else:
+            match = request.resolver_match
+            recorder.log(
+                method=request.method,
+                path=request.path,
+                view=match.view_name if match is not None else None,
+                status=response.status_code,
+                duration_ms=round(duration * 1000, 1))
+
+        if getattr(settings, 'LOGGING_LOG_SQL', False):
+            for sql, count in recorder.duplicates:
+                logger.debug('%s duplicate queries: %s', count, sql)
+
+        budget = query_budget(request)
+        if budget is not None and recorder.query_count > budget:
+            message = '%s ran %s queries, over its budget of %s. %s' % (
+                request.path, recorder.query_count, budget,
+                '; '.join(
+                    '%sx %s' % (count, sql)
+                    for sql, count in recorder.duplicates[:3]))
+            if getattr(settings, 'QUERY_BUDGETS_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
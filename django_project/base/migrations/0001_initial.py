@@ -0,0 +1,36 @@
+# Generated by Django 2.2.16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('project', 'Project'), ('subcomponent', 'Subcomponent')], max_length=16)),
+                ('object_id', models.PositiveIntegerField(help_text='Primary key of the project or subcomponent.')),
+                ('project_pk', models.PositiveIntegerField(blank=True, help_text='Primary key of the project the row belongs to.', null=True)),
+                ('subcomponent_count', models.PositiveIntegerField(default=0)),
+                ('sub_project_count', models.PositiveIntegerField(default=0)),
+                ('approved_sub_project_count', models.PositiveIntegerField(default=0)),
+                ('beneficiary_count', models.PositiveIntegerField(default=0)),
+                ('total_fund', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('scope', 'object_id')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='dashboardrollup',
+            index=models.Index(fields=['scope', 'project_pk'], name='base_rollup_scope_project_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Indexes behind the search and keyset paging of the user management list,
+# see authentication/directory.py.
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+SEARCH_FIELDS = ('username', 'first_name', 'last_name', 'email')
+
+
+def index(name, definition):
+    return migrations.RunSQL(
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS %s ON auth_user %s'
+        % (name, definition),
+        'DROP INDEX CONCURRENTLY IF EXISTS %s' % name)
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('base', '0002_exportjob'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        index(
+            'auth_user_date_joined_id_idx',
+            '(date_joined DESC, id DESC)'),
+    ] + [
+        # istartswith compiles to UPPER(field::text) LIKE UPPER('term%').
+        index(
+            'auth_user_%s_prefix_idx' % field,
+            '(UPPER(%s::text) text_pattern_ops)' % field)
+        for field in SEARCH_FIELDS
+    ] + [
+        index(
+            'auth_user_%s_trgm_idx' % field,
+            'USING gin (UPPER(%s::text) gin_trgm_ops)' % field)
+        for field in SEARCH_FIELDS
+    ]
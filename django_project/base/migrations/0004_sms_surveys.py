@@ -0,0 +1,77 @@
+# Generated by Django 2.2.16
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0003_user_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Survey',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('keyword', models.CharField(help_text='First word of the messages answering the survey.', max_length=32, unique=True)),
+                ('active', models.BooleanField(default=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ('name',),
+            },
+        ),
+        migrations.CreateModel(
+            name='SmsDeadLetter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message_id', models.CharField(max_length=64, unique=True)),
+                ('payload', django.contrib.postgres.fields.jsonb.JSONField()),
+                ('reason', models.CharField(max_length=255)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ('-created',),
+            },
+        ),
+        migrations.CreateModel(
+            name='SurveyQuestion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('code', models.SlugField(help_text='Key of the answer, e.g. households.', max_length=32)),
+                ('text', models.TextField()),
+                ('options', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=32), blank=True, default=list, help_text='Accepted answers, any answer is accepted when empty.', size=None)),
+                ('survey', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='questions', to='base.Survey')),
+            ],
+            options={
+                'ordering': ('survey', 'position'),
+                'unique_together': {('survey', 'position'), ('survey', 'code')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SurveyResponse',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message_id', models.CharField(help_text='Idempotency key, the gateway message id.', max_length=64, unique=True)),
+                ('sender', models.CharField(max_length=32)),
+                ('text', models.CharField(max_length=640)),
+                ('answers', django.contrib.postgres.fields.jsonb.JSONField(default=dict, help_text='Answers keyed by question code.')),
+                ('received', models.DateTimeField(help_text='When the gateway received the message.')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('survey', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='responses', to='base.Survey')),
+            ],
+            options={
+                'ordering': ('-received',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='surveyresponse',
+            index=models.Index(fields=['survey', 'received'], name='base_response_survey_idx'),
+        ),
+    ]
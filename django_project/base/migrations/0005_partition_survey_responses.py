@@ -0,0 +1,91 @@
+# Turns base_surveyresponse into a table partitioned by month of received,
+# see base/partitions.py. Requires PostgreSQL 11 or later.
+
+from django.db import migrations, models
+
+PARTITION = '''
+ALTER TABLE base_surveyresponse RENAME TO base_surveyresponse_heap;
+CREATE TABLE base_surveyresponse (
+    LIKE base_surveyresponse_heap INCLUDING DEFAULTS
+) PARTITION BY RANGE (received);
+CREATE TABLE base_surveyresponse_default
+    PARTITION OF base_surveyresponse DEFAULT;
+INSERT INTO base_surveyresponse SELECT * FROM base_surveyresponse_heap;
+ALTER SEQUENCE base_surveyresponse_id_seq
+    OWNED BY base_surveyresponse.id;
+DROP TABLE base_surveyresponse_heap;
+
+ALTER TABLE base_surveyresponse ADD PRIMARY KEY (id, received);
+ALTER TABLE base_surveyresponse
+    ADD CONSTRAINT base_surveyresponse_survey_id_fk_base_survey_id
+    FOREIGN KEY (survey_id) REFERENCES base_survey (id)
+    DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX base_response_survey_idx
+    ON base_surveyresponse (survey_id, received);
+CREATE INDEX base_response_received_brin
+    ON base_surveyresponse USING brin (received);
+'''
+
+UNPARTITION = '''
+ALTER TABLE base_surveyresponse RENAME TO base_surveyresponse_partitioned;
+CREATE TABLE base_surveyresponse (
+    LIKE base_surveyresponse_partitioned INCLUDING DEFAULTS
+);
+INSERT INTO base_surveyresponse
+    SELECT * FROM base_surveyresponse_partitioned;
+ALTER SEQUENCE base_surveyresponse_id_seq
+    OWNED BY base_surveyresponse.id;
+DROP TABLE base_surveyresponse_partitioned CASCADE;
+
+ALTER TABLE base_surveyresponse ADD PRIMARY KEY (id);
+ALTER TABLE base_surveyresponse
+    ADD CONSTRAINT base_surveyresponse_message_id_key UNIQUE (message_id);
+ALTER TABLE base_surveyresponse
+    ADD CONSTRAINT base_surveyresponse_survey_id_fk_base_survey_id
+    FOREIGN KEY (survey_id) REFERENCES base_survey (id)
+    DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX base_response_survey_idx
+    ON base_surveyresponse (survey_id, received);
+'''
+
+
+def create_partitions(apps, schema_editor):
+    from base.partitions import ensure_partitions
+
+    ensure_partitions(connection=schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0004_sms_surveys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SmsMessageKey',
+            fields=[
+                ('message_id', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.RunSQL(
+            'INSERT INTO base_smsmessagekey (message_id, created) '
+            'SELECT message_id, created FROM base_surveyresponse '
+            'ON CONFLICT DO NOTHING',
+            migrations.RunSQL.noop),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(PARTITION, UNPARTITION),
+                migrations.RunPython(
+                    create_partitions, migrations.RunPython.noop),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='surveyresponse',
+                    name='message_id',
+                    field=models.CharField(help_text='Idempotency key, the gateway message id.', max_length=64),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 2.2.16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Counts the responses received so far, see base/counters.py.
+BACKFILL = '''
+INSERT INTO base_surveyanswercounter
+    (survey_id, question, answer, district, day, count)
+SELECT survey_id, '', '', district, (received AT TIME ZONE 'UTC')::date,
+       count(*)
+FROM base_surveyresponse
+GROUP BY 1, 2, 3, 4, 5
+UNION ALL
+SELECT survey_id, answer.key, answer.value, district,
+       (received AT TIME ZONE 'UTC')::date, count(*)
+FROM base_surveyresponse, jsonb_each_text(answers) AS answer
+GROUP BY 1, 2, 3, 4, 5
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0005_partition_survey_responses'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='surveyresponse',
+            name='district',
+            field=models.CharField(blank=True, default='', help_text='District the response was sent from, when known.', max_length=100),
+        ),
+        migrations.CreateModel(
+            name='SurveyAnswerCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question', models.CharField(blank=True, help_text='Question code.', max_length=32)),
+                ('answer', models.CharField(blank=True, max_length=32)),
+                ('district', models.CharField(blank=True, max_length=100)),
+                ('day', models.DateField(help_text='UTC day the responses arrived.')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('survey', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counters', to='base.Survey')),
+            ],
+            options={
+                'unique_together': {('survey', 'question', 'answer', 'district', 'day')},
+            },
+        ),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0006_survey_answer_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportChart',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project_slug', models.CharField(blank=True, help_text='Project of the report, empty for every project.', max_length=255)),
+                ('name', models.CharField(max_length=64)),
+                ('data_version', models.BigIntegerField(help_text='Version of the tralard data the chart was built from.')),
+                ('spec_path', models.CharField(help_text='Vega-Lite specification in MEDIA_ROOT.', max_length=255)),
+                ('html_path', models.CharField(help_text='Standalone page in MEDIA_ROOT.', max_length=255)),
+                ('rendered', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ('project_slug', 'name'),
+                'unique_together': {('project_slug', 'name')},
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 2.2.16
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0007_reportchart'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminBoundary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.CharField(choices=[('province', 'Province'), ('district', 'District')], max_length=16)),
+                ('name', models.CharField(max_length=100)),
+                ('code', models.CharField(max_length=32, unique=True)),
+                ('geom', django.contrib.gis.db.models.fields.MultiPolygonField(srid=4326)),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='base.AdminBoundary')),
+            ],
+            options={
+                'ordering': ('level', 'name'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='adminboundary',
+            index=models.Index(fields=['level', 'name'], name='base_boundary_level_idx'),
+        ),
+        migrations.CreateModel(
+            name='SimplifiedBoundary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoom', models.PositiveSmallIntegerField()),
+                ('geom', django.contrib.gis.db.models.fields.MultiPolygonField(srid=3857)),
+                ('boundary', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='simplified', to='base.AdminBoundary')),
+            ],
+            options={
+                'unique_together': {('boundary', 'zoom')},
+            },
+        ),
+        migrations.CreateModel(
+            name='BeneficiaryBoundary',
+            fields=[
+                ('beneficiary_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('district', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='beneficiaries', to='base.AdminBoundary')),
+                ('province', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='base.AdminBoundary')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='surveyresponse',
+            name='location',
+            field=django.contrib.gis.db.models.fields.PointField(blank=True, help_text='Where the message was sent from, when the gateway knows.', null=True, srid=4326),
+        ),
+    ]
@@ -0,0 +1,8 @@
+# coding=utf-8
+
+from .rollup import *  # noqa
+from .export import *  # noqa
+from .survey import *  # noqa
+from .counter import *  # noqa
+from .chart import *  # noqa
+from .boundary import *  # noqa
@@ -0,0 +1,76 @@
+# coding=utf-8
+"""Administrative boundaries and the points located in them."""
+
+from django.contrib.gis.db import models
+from django.utils.translation import gettext_lazy as _
+
+__all__ = ['AdminBoundary', 'SimplifiedBoundary', 'BeneficiaryBoundary']
+
+
+class AdminBoundary(models.Model):
+    """A province or district polygon, at full resolution.
+
+    Only used for point in polygon lookups, which go through the GiST
+    index on ``geom``. Maps draw :class:`SimplifiedBoundary` instead.
+    """
+    PROVINCE = 'province'
+    DISTRICT = 'district'
+    LEVEL_CHOICES = (
+        (PROVINCE, _('Province')),
+        (DISTRICT, _('District')),
+    )
+
+    level = models.CharField(max_length=16, choices=LEVEL_CHOICES)
+    name = models.CharField(max_length=100)
+    code = models.CharField(max_length=32, unique=True)
+    parent = models.ForeignKey(
+        'self', on_delete=models.CASCADE, null=True, blank=True,
+        related_name='children')
+    geom = models.MultiPolygonField(srid=4326)
+
+    class Meta:
+        ordering = ('level', 'name')
+        indexes = [
+            models.Index(
+                fields=['level', 'name'], name='base_boundary_level_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class SimplifiedBoundary(models.Model):
+    """A boundary simplified to the pixel size of a zoom level.
+
+    Built by :func:`base.boundaries.simplify_boundaries`, in Web Mercator
+    like the map tiles.
+    """
+    boundary = models.ForeignKey(
+        AdminBoundary, on_delete=models.CASCADE, related_name='simplified')
+    zoom = models.PositiveSmallIntegerField()
+    geom = models.MultiPolygonField(srid=3857)
+
+    class Meta:
+        unique_together = ('boundary', 'zoom')
+
+    def __str__(self):
+        return '%s z%s' % (self.boundary_id, self.zoom)
+
+
+class BeneficiaryBoundary(models.Model):
+    """Province and district a beneficiary is located in.
+
+    The beneficiaries belong to the tralard app, their boundaries are
+    kept here and refreshed in bulk by
+    :func:`base.boundaries.assign_beneficiaries`.
+    """
+    beneficiary_id = models.IntegerField(primary_key=True)
+    province = models.ForeignKey(
+        AdminBoundary, on_delete=models.SET_NULL, null=True,
+        related_name='+')
+    district = models.ForeignKey(
+        AdminBoundary, on_delete=models.SET_NULL, null=True,
+        related_name='beneficiaries')
+
+    def __str__(self):
+        return str(self.beneficiary_id)
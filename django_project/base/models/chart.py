@@ -0,0 +1,44 @@
+# coding=utf-8
+"""Indicator report charts rendered ahead of time by the Celery worker."""
+
+from django.conf import settings
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+__all__ = ['ReportChart']
+
+
+class ReportChart(models.Model):
+    """The current rendering of a chart of a project's indicator report.
+
+    Files are named after the hash of the chart specification, so nginx
+    can serve them with far future expiry: new data gives a new name.
+    :func:`base.charts.render_charts` updates the row when the data
+    version of the tralard models moved on.
+    """
+    project_slug = models.CharField(
+        max_length=255, blank=True,
+        help_text=_('Project of the report, empty for every project.'))
+    name = models.CharField(max_length=64)
+    data_version = models.BigIntegerField(
+        help_text=_('Version of the tralard data the chart was built from.'))
+    spec_path = models.CharField(
+        max_length=255, help_text=_('Vega-Lite specification in MEDIA_ROOT.'))
+    html_path = models.CharField(
+        max_length=255, help_text=_('Standalone page in MEDIA_ROOT.'))
+    rendered = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ('project_slug', 'name')
+        unique_together = ('project_slug', 'name')
+
+    def __str__(self):
+        return '%s %s' % (self.project_slug or 'all', self.name)
+
+    @property
+    def spec_url(self):
+        return settings.MEDIA_URL + self.spec_path
+
+    @property
+    def html_url(self):
+        return settings.MEDIA_URL + self.html_path
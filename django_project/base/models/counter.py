@@ -0,0 +1,33 @@
+# coding=utf-8
+"""Incrementally maintained survey result counters."""
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+__all__ = ['SurveyAnswerCounter']
+
+
+class SurveyAnswerCounter(models.Model):
+    """Number of responses giving ``answer`` to ``question`` on ``day``.
+
+    Rows with an empty ``question`` and ``answer`` count the responses
+    themselves. Counters are incremented by :func:`base.counters.apply`
+    in the transaction inserting the responses, so the dashboards and the
+    API read results from a few rows per day instead of from the raw
+    responses. ``manage.py rebuild_survey_counters`` recomputes them.
+    """
+    survey = models.ForeignKey(
+        'base.Survey', on_delete=models.CASCADE, related_name='counters')
+    question = models.CharField(
+        max_length=32, blank=True, help_text=_('Question code.'))
+    answer = models.CharField(max_length=32, blank=True)
+    district = models.CharField(max_length=100, blank=True)
+    day = models.DateField(help_text=_('UTC day the responses arrived.'))
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('survey', 'question', 'answer', 'district', 'day')
+
+    def __str__(self):
+        return '%s %s=%s %s: %s' % (
+            self.survey_id, self.question, self.answer, self.day, self.count)
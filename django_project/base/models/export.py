@@ -0,0 +1,87 @@
+# coding=utf-8
+"""Exports prepared in the background by the Celery worker."""
+
+import os
+
+from django.conf import settings
+from django.contrib.postgres.fields import JSONField
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+__all__ = ['ExportJob']
+
+
+def reports_root():
+    return getattr(settings, 'REPORTS_ROOT', '/home/web/reports')
+
+
+class ExportJob(models.Model):
+    """An export requested by a user and written to ``REPORTS_ROOT``.
+
+    The worker running :func:`base.tasks.run_export_job` keeps
+    ``status`` and ``rows_written`` up to date, which is what the status
+    endpoint reports while the user waits.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, _('Pending')),
+        (RUNNING, _('Running')),
+        (DONE, _('Done')),
+        (FAILED, _('Failed')),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        related_name='export_jobs')
+    export = models.CharField(
+        max_length=32, help_text=_('Name of the export, e.g. beneficiaries.'))
+    export_format = models.CharField(max_length=8)
+    parameters = JSONField(
+        default=dict, blank=True,
+        help_text=_('Arguments of the export view, e.g. the project slug.'))
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    task_id = models.CharField(max_length=255, blank=True)
+    rows_total = models.PositiveIntegerField(null=True, blank=True)
+    rows_written = models.PositiveIntegerField(default=0)
+    filename = models.CharField(
+        max_length=255, blank=True,
+        help_text=_('Name of the artifact inside REPORTS_ROOT.'))
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['status', 'finished'],
+                name='base_exportjob_status_idx'),
+        ]
+
+    def __str__(self):
+        return '%s.%s #%s' % (self.export, self.export_format, self.pk)
+
+    @property
+    def path(self):
+        if not self.filename:
+            return None
+        return os.path.join(reports_root(), self.filename)
+
+    @property
+    def progress(self):
+        """Share of the rows written so far, from 0 to 100."""
+        if self.status == self.DONE:
+            return 100
+        if not self.rows_total:
+            return 0
+        return min(int(self.rows_written * 100 / self.rows_total), 99)
+
+    def delete_file(self):
+        path = self.path
+        if path and os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,47 @@
+# coding=utf-8
+"""Precomputed aggregates rendered by the dashboard."""
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+__all__ = ['DashboardRollup']
+
+
+class DashboardRollup(models.Model):
+    """Aggregates for a single project or subcomponent.
+
+    Rows are maintained by :mod:`base.rollups` whenever sub projects,
+    beneficiaries or funds change, so that the dashboard can render all of
+    its counters from one indexed read instead of querying per row.
+    """
+    PROJECT = 'project'
+    SUBCOMPONENT = 'subcomponent'
+    SCOPE_CHOICES = (
+        (PROJECT, _('Project')),
+        (SUBCOMPONENT, _('Subcomponent')),
+    )
+
+    scope = models.CharField(max_length=16, choices=SCOPE_CHOICES)
+    object_id = models.PositiveIntegerField(
+        help_text=_('Primary key of the project or subcomponent.'))
+    project_pk = models.PositiveIntegerField(
+        null=True, blank=True,
+        help_text=_('Primary key of the project the row belongs to.'))
+    subcomponent_count = models.PositiveIntegerField(default=0)
+    sub_project_count = models.PositiveIntegerField(default=0)
+    approved_sub_project_count = models.PositiveIntegerField(default=0)
+    beneficiary_count = models.PositiveIntegerField(default=0)
+    total_fund = models.DecimalField(
+        max_digits=20, decimal_places=2, default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('scope', 'object_id')
+        indexes = [
+            models.Index(
+                fields=['scope', 'project_pk'],
+                name='base_rollup_scope_project_idx'),
+        ]
+
+    def __str__(self):
+        return '%s #%s' % (self.scope, self.object_id)
@@ -0,0 +1,183 @@
+# coding=utf-8
+"""SMS surveys and the responses received for them."""
+
+from datetime import datetime, timedelta
+
+from django.contrib.gis.db.models import PointField
+from django.contrib.postgres.fields import ArrayField, JSONField
+from django.db import models
+from django.db.models import Count
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from base.partitions import next_month
+
+__all__ = [
+    'Survey', 'SurveyQuestion', 'SurveyResponse', 'SmsMessageKey',
+    'SmsDeadLetter',
+]
+
+
+class Survey(models.Model):
+    """A survey answered by texting its keyword followed by the answers,
+    e.g. ``FLOOD 3 YES``.
+    """
+    name = models.CharField(max_length=255)
+    keyword = models.CharField(
+        max_length=32, unique=True,
+        help_text=_('First word of the messages answering the survey.'))
+    active = models.BooleanField(default=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ('name',)
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        self.keyword = self.keyword.strip().upper()
+        super(Survey, self).save(*args, **kwargs)
+
+
+class SurveyQuestion(models.Model):
+    """A question of a survey, answered by the word at its ``position``."""
+    survey = models.ForeignKey(
+        Survey, on_delete=models.CASCADE, related_name='questions')
+    position = models.PositiveSmallIntegerField()
+    code = models.SlugField(
+        max_length=32, help_text=_('Key of the answer, e.g. households.'))
+    text = models.TextField()
+    options = ArrayField(
+        models.CharField(max_length=32), default=list, blank=True,
+        help_text=_('Accepted answers, any answer is accepted when empty.'))
+
+    class Meta:
+        ordering = ('survey', 'position')
+        unique_together = (('survey', 'position'), ('survey', 'code'))
+
+    def __str__(self):
+        return '%s %s' % (self.survey.keyword, self.code)
+
+
+class SurveyResponseQuerySet(models.QuerySet):
+    """Queries that Postgres can answer from the partitions they need.
+
+    ``base_surveyresponse`` is partitioned by month of ``received``, see
+    :mod:`base.partitions`. Filtering on ``received`` lets the planner
+    skip every other partition, so prefer these methods to filtering on
+    ``created`` or scanning the whole table.
+    """
+
+    def window(self, start=None, end=None):
+        """Responses received in ``[start, end)``."""
+        queryset = self
+        if start is not None:
+            queryset = queryset.filter(received__gte=start)
+        if end is not None:
+            queryset = queryset.filter(received__lt=end)
+        return queryset
+
+    def month(self, year, month):
+        """Responses of a single partition."""
+        start = datetime(year, month, 1, tzinfo=timezone.utc)
+        return self.window(start, next_month(start))
+
+    def recent(self, days):
+        return self.window(timezone.now() - timedelta(days=days))
+
+    def within(self, boundary):
+        """Responses sent from inside an administrative boundary."""
+        return self.filter(location__intersects=boundary.geom)
+
+    def counts_per(self, kind='day', start=None, end=None):
+        """Number of responses per survey and time bucket.
+
+        :param kind: ``hour``, ``day``, ``week`` or ``month``.
+        :type kind: str
+
+        :returns: Rows of ``survey_id``, ``bucket`` and ``responses``.
+        :rtype: QuerySet
+        """
+        return self.window(start, end).annotate(
+            bucket=Trunc('received', kind)
+        ).values('survey_id', 'bucket').annotate(
+            responses=Count('id')
+        ).order_by('survey_id', 'bucket')
+
+
+class SurveyResponse(models.Model):
+    """A parsed SMS answering a survey.
+
+    Rows are only written by :func:`base.tasks.ingest_sms`, which inserts
+    them in bulk once :class:`SmsMessageKey` confirmed that the gateway
+    did not deliver them before. The table is partitioned by month of
+    ``received`` with a BRIN index on it, query it through the methods of
+    :class:`SurveyResponseQuerySet`.
+    """
+    survey = models.ForeignKey(
+        Survey, on_delete=models.CASCADE, related_name='responses')
+    message_id = models.CharField(
+        max_length=64,
+        help_text=_('Idempotency key, the gateway message id.'))
+    sender = models.CharField(max_length=32)
+    text = models.CharField(max_length=640)
+    answers = JSONField(
+        default=dict, help_text=_('Answers keyed by question code.'))
+    received = models.DateTimeField(
+        help_text=_('When the gateway received the message.'))
+    district = models.CharField(
+        max_length=100, blank=True, default='',
+        help_text=_('District the response was sent from, when known.'))
+    location = PointField(
+        srid=4326, null=True, blank=True,
+        help_text=_('Where the message was sent from, when the gateway '
+                    'knows.'))
+    created = models.DateTimeField(auto_now_add=True)
+
+    objects = SurveyResponseQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('-received',)
+        # Created on the partitioned table by migration 0005.
+        indexes = [
+            models.Index(
+                fields=['survey', 'received'],
+                name='base_response_survey_idx'),
+        ]
+
+    def __str__(self):
+        return self.message_id
+
+
+class SmsMessageKey(models.Model):
+    """Ids of the messages stored as responses.
+
+    Unique constraints on a partitioned table have to include the
+    partition key, so message ids are deduplicated here rather than on
+    :class:`SurveyResponse` itself.
+    """
+    message_id = models.CharField(max_length=64, primary_key=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.message_id
+
+
+class SmsDeadLetter(models.Model):
+    """A message that could not be turned into a survey response.
+
+    ``manage.py replay_sms --dead-letters`` parses them again, e.g. once
+    the survey they answer has been created.
+    """
+    message_id = models.CharField(max_length=64, unique=True)
+    payload = JSONField()
+    reason = models.CharField(max_length=255)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ('-created',)
+
+    def __str__(self):
+        return '%s: %s' % (self.message_id, self.reason)
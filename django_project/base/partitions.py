@@ -0,0 +1,209 @@
+# coding=utf-8
+"""Monthly partitions of the survey response table.
+
+``base_surveyresponse`` is declared ``PARTITION BY RANGE (received)`` with
+one partition per calendar month (UTC) named ``base_surveyresponse_pYYYY_MM``
+and a default partition catching anything outside of them. The partitioned
+table carries a BRIN index on ``received``, which stays tiny because rows
+arrive roughly in time order, and a btree on ``(survey_id, received)``.
+
+:func:`ensure_partitions` creates the partitions of the coming months,
+:func:`archive_partitions` detaches old ones and
+:func:`prune_message_keys` forgets the message ids recorded before the
+oldest partition left, all run by ``manage.py survey_partitions``.
+"""
+
+import logging
+import re
+from datetime import datetime, timedelta
+
+from django.db import connection as default_connection
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'base_surveyresponse'
+DEFAULT_PARTITION = '%s_default' % TABLE
+ARCHIVE_SCHEMA = 'archive'
+
+_PARTITION_NAME = re.compile(r'^%s_p(\d{4})_(\d{2})$' % TABLE)
+
+
+def month_start(date):
+    """First moment of the month of ``date``, in UTC."""
+    date = date.astimezone(timezone.utc) if timezone.is_aware(date) else (
+        date.replace(tzinfo=timezone.utc))
+    return datetime(date.year, date.month, 1, tzinfo=timezone.utc)
+
+
+def next_month(date):
+    """First moment of the month following ``date``."""
+    return (date.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def retention_start(keep_months):
+    """First month left attached when keeping ``keep_months`` months."""
+    cutoff = month_start(timezone.now())
+    for _ in range(keep_months):
+        cutoff = (cutoff - timedelta(days=1)).replace(day=1)
+    return cutoff
+
+
+def partition_name(month):
+    return '%s_p%04d_%02d' % (TABLE, month.year, month.month)
+
+
+def existing_partitions(connection=None):
+    """Months that have a partition, oldest first.
+
+    :rtype: list of datetime
+    """
+    connection = connection or default_connection
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE pg_inherits.inhparent = %s::regclass', [TABLE])
+        names = [row[0] for row in cursor.fetchall()]
+    months = []
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            months.append(datetime(
+                int(match.group(1)), int(match.group(2)), 1,
+                tzinfo=timezone.utc))
+    return sorted(months)
+
+
+def create_partition(month, connection=None):
+    """Create the partition of ``month``.
+
+    Rows of that month already sitting in the default partition, e.g.
+    late messages or rows copied by the migration, are moved into the new
+    partition before it is attached, as Postgres requires.
+    """
+    connection = connection or default_connection
+    name = partition_name(month)
+    bounds = [month.isoformat(), next_month(month).isoformat()]
+    with transaction.atomic(using=connection.alias), \
+            connection.cursor() as cursor:
+        # Deferred foreign key checks would keep ALTER TABLE from running.
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        cursor.execute(
+            'CREATE TABLE %s (LIKE %s INCLUDING DEFAULTS)' % (name, TABLE))
+        cursor.execute(
+            'WITH moved AS (DELETE FROM %s WHERE received >= %%s '
+            'AND received < %%s RETURNING *) '
+            'INSERT INTO %s SELECT * FROM moved' % (DEFAULT_PARTITION, name),
+            bounds)
+        cursor.execute(
+            'ALTER TABLE %s ATTACH PARTITION %s '
+            'FOR VALUES FROM (%%s) TO (%%s)' % (TABLE, name), bounds)
+    logger.info('Created partition %s', name)
+    return name
+
+
+def ensure_partitions(months_ahead=3, start=None, keep_months=None,
+                      connection=None):
+    """Create the missing partitions up to ``months_ahead`` months ahead.
+
+    :param start: First month to cover, the earliest row of the default
+        partition or else the current month by default.
+    :type start: datetime
+
+    :param keep_months: Months kept by :func:`archive_partitions`. No
+        partition is created for older months, their rows stay in the
+        default partition instead of being archived again.
+    :type keep_months: int
+
+    :returns: Names of the partitions created.
+    :rtype: list
+    """
+    connection = connection or default_connection
+    if start is None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT min(received) FROM %s' % DEFAULT_PARTITION)
+            oldest = cursor.fetchone()[0]
+        start = oldest or timezone.now()
+    month = month_start(start)
+    if keep_months is not None:
+        month = max(month, retention_start(keep_months))
+    last = month_start(timezone.now())
+    for _ in range(months_ahead):
+        last = next_month(last)
+
+    existing = set(existing_partitions(connection))
+    created = []
+    while month <= last:
+        if month not in existing:
+            created.append(create_partition(month, connection))
+        month = next_month(month)
+    return created
+
+
+def archive_partitions(keep_months, drop=False, connection=None):
+    """Detach the partitions older than ``keep_months`` months.
+
+    Detached partitions are moved to the ``archive`` schema, where they
+    stay queryable and can be dumped, or dropped when ``drop`` is set. A
+    month archived before, whose partition was created again for late
+    rows, has those rows added to its archived table.
+
+    :returns: Names of the partitions detached.
+    :rtype: list
+    """
+    connection = connection or default_connection
+    cutoff = retention_start(keep_months)
+    archived = []
+    for month in existing_partitions(connection):
+        if month >= cutoff:
+            break
+        name = partition_name(month)
+        with transaction.atomic(using=connection.alias), \
+                connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            cursor.execute(
+                'ALTER TABLE %s DETACH PARTITION %s' % (TABLE, name))
+            if drop:
+                cursor.execute('DROP TABLE %s' % name)
+            else:
+                cursor.execute(
+                    'CREATE SCHEMA IF NOT EXISTS %s' % ARCHIVE_SCHEMA)
+                cursor.execute(
+                    'SELECT to_regclass(%s)',
+                    ['%s.%s' % (ARCHIVE_SCHEMA, name)])
+                if cursor.fetchone()[0] is None:
+                    cursor.execute('ALTER TABLE %s SET SCHEMA %s' % (
+                        name, ARCHIVE_SCHEMA))
+                else:
+                    cursor.execute('INSERT INTO %s.%s SELECT * FROM %s' % (
+                        ARCHIVE_SCHEMA, name, name))
+                    cursor.execute('DROP TABLE %s' % name)
+        logger.info('%s partition %s', 'Dropped' if drop else 'Archived', name)
+        archived.append(name)
+    return archived
+
+
+def prune_message_keys(connection=None):
+    """Delete the message ids recorded before the oldest partition.
+
+    :class:`~base.models.SmsMessageKey` would otherwise keep a row per
+    message ever received. The responses of those months have been
+    archived, and a gateway does not retry a message that old.
+
+    :returns: Number of message ids deleted.
+    :rtype: int
+    """
+    from base.models import SmsMessageKey
+
+    connection = connection or default_connection
+    months = existing_partitions(connection)
+    if not months:
+        return 0
+    deleted, _ = SmsMessageKey.objects.using(connection.alias).filter(
+        created__lt=months[0]).delete()
+    if deleted:
+        logger.info('Pruned %s message ids', deleted)
+    return deleted
@@ -0,0 +1,227 @@
+# coding=utf-8
+"""Maintenance of the dashboard rollup table.
+
+Every counter shown on the dashboard is derived from the tralard models.
+Instead of asking each subcomponent for its counts while rendering, the
+counts are computed here in a handful of grouped queries and stored in
+:class:`base.models.DashboardRollup`. Subcomponent rows are refreshed
+individually; project rows are then summed up from their subcomponent rows.
+
+Rows are written with ``INSERT ... ON CONFLICT DO UPDATE`` in key order, so
+two refreshes of the same subcomponent committing at the same time update
+the rows one after the other instead of failing on the unique key.
+"""
+
+from decimal import Decimal
+
+from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from base.cache import TRALARD_NAMESPACE, bump_cache_version
+from base.models import DashboardRollup
+
+_KEY = ('scope', 'object_id')
+_COUNTERS = (
+    'project_pk', 'subcomponent_count', 'sub_project_count',
+    'approved_sub_project_count', 'beneficiary_count', 'total_fund',
+    'updated')
+# Rows per statement, well below the limit of query parameters.
+_UPSERT_BATCH = 1000
+
+
+def _tralard_model(model_name):
+    return apps.get_model('tralard', model_name)
+
+
+def _grouped(queryset, key, **aggregates):
+    """Run a grouped aggregate and return the rows keyed by ``key``."""
+    rows = queryset.values(key).annotate(**aggregates).order_by()
+    return {row[key]: row for row in rows}
+
+
+def _upsert(rows):
+    """Insert or update rollup rows on their ``(scope, object_id)`` key.
+
+    :param rows: Unsaved rollups.
+    :type rows: list
+    """
+    now = timezone.now()
+    for row in rows:
+        row.updated = now
+    rows = sorted(rows, key=lambda row: (row.scope, row.object_id))
+    columns = _KEY + _COUNTERS
+    quote = connection.ops.quote_name
+    placeholders = '(%s)' % ', '.join(['%s'] * len(columns))
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(rows), _UPSERT_BATCH):
+            batch = rows[start:start + _UPSERT_BATCH]
+            cursor.execute(
+                'INSERT INTO {table} ({columns}) VALUES {values} '
+                'ON CONFLICT ({key}) DO UPDATE SET {updates}'.format(
+                    table=quote(DashboardRollup._meta.db_table),
+                    columns=', '.join(quote(column) for column in columns),
+                    values=', '.join([placeholders] * len(batch)),
+                    key=', '.join(quote(column) for column in _KEY),
+                    updates=', '.join(
+                        '{0} = EXCLUDED.{0}'.format(quote(column))
+                        for column in _COUNTERS)),
+                [getattr(row, column) for row in batch
+                 for column in columns])
+
+
+def _rollups_changed():
+    # Fragments cached from the former rollups must not outlive them.
+    bump_cache_version(TRALARD_NAMESPACE)
+
+
+def refresh_subcomponents(subcomponent_ids):
+    """Recompute the rollups of the given subcomponents and their projects.
+
+    :param subcomponent_ids: Primary keys of the subcomponents to refresh.
+    :type subcomponent_ids: iterable
+
+    :returns: The primary keys of the projects that were refreshed.
+    :rtype: set
+    """
+    subcomponent_ids = {pk for pk in subcomponent_ids if pk is not None}
+    if not subcomponent_ids:
+        return set()
+
+    SubComponent = _tralard_model('SubComponent')
+    SubProject = _tralard_model('SubProject')
+    Beneficiary = _tralard_model('Beneficiary')
+    Fund = _tralard_model('Fund')
+
+    projects = dict(
+        SubComponent.objects.filter(
+            pk__in=subcomponent_ids).values_list('pk', 'project_id'))
+    existing = list(projects)
+    sub_projects = _grouped(
+        SubProject.objects.filter(subcomponent_id__in=existing),
+        'subcomponent_id',
+        total=Count('pk'),
+        approved=Count('pk', filter=Q(approved=True)))
+    beneficiaries = _grouped(
+        Beneficiary.objects.filter(
+            sub_project__subcomponent_id__in=existing),
+        'sub_project__subcomponent_id',
+        total=Count('pk'))
+    funds = _grouped(
+        Fund.objects.filter(sub_project__subcomponent_id__in=existing),
+        'sub_project__subcomponent_id',
+        total=Sum('amount'))
+
+    rows = []
+    for pk, project_pk in projects.items():
+        sub_project_row = sub_projects.get(pk, {})
+        rows.append(DashboardRollup(
+            scope=DashboardRollup.SUBCOMPONENT,
+            object_id=pk,
+            project_pk=project_pk,
+            sub_project_count=sub_project_row.get('total', 0),
+            approved_sub_project_count=sub_project_row.get('approved', 0),
+            beneficiary_count=beneficiaries.get(pk, {}).get('total', 0),
+            total_fund=funds.get(pk, {}).get('total') or Decimal(0),
+        ))
+
+    stale = DashboardRollup.objects.filter(
+        scope=DashboardRollup.SUBCOMPONENT, object_id__in=subcomponent_ids)
+    # Deleted subcomponents still need their former project refreshed.
+    project_ids = set(projects.values()) | set(
+        stale.values_list('project_pk', flat=True))
+
+    with transaction.atomic():
+        stale.exclude(object_id__in=existing).delete()
+        _upsert(rows)
+        refresh_projects(project_ids)
+    return project_ids
+
+
+def refresh_projects(project_ids):
+    """Sum up the subcomponent rollups of the given projects.
+
+    :param project_ids: Primary keys of the projects to refresh.
+    :type project_ids: iterable
+    """
+    project_ids = {pk for pk in project_ids if pk is not None}
+    if not project_ids:
+        return
+
+    totals = _grouped(
+        DashboardRollup.objects.filter(
+            scope=DashboardRollup.SUBCOMPONENT, project_pk__in=project_ids),
+        'project_pk',
+        subcomponents=Count('pk'),
+        sub_projects=Sum('sub_project_count'),
+        approved_sub_projects=Sum('approved_sub_project_count'),
+        beneficiaries=Sum('beneficiary_count'),
+        funds=Sum('total_fund'))
+
+    rows = []
+    for pk in project_ids:
+        total = totals.get(pk, {})
+        rows.append(DashboardRollup(
+            scope=DashboardRollup.PROJECT,
+            object_id=pk,
+            project_pk=pk,
+            subcomponent_count=total.get('subcomponents') or 0,
+            sub_project_count=total.get('sub_projects') or 0,
+            approved_sub_project_count=(
+                total.get('approved_sub_projects') or 0),
+            beneficiary_count=total.get('beneficiaries') or 0,
+            total_fund=total.get('funds') or Decimal(0),
+        ))
+
+    _upsert(rows)
+    transaction.on_commit(_rollups_changed)
+
+
+def refresh_all():
+    """Rebuild the whole rollup table from scratch.
+
+    :returns: Number of subcomponents that were refreshed.
+    :rtype: int
+    """
+    SubComponent = _tralard_model('SubComponent')
+    subcomponent_ids = set(SubComponent.objects.values_list('pk', flat=True))
+    with transaction.atomic():
+        DashboardRollup.objects.all().delete()
+        refresh_subcomponents(subcomponent_ids)
+    return len(subcomponent_ids)
+
+
+def subcomponent_rollups(subcomponent_ids):
+    """Fetch the rollups of several subcomponents in a single query.
+
+    :param subcomponent_ids: Primary keys of the subcomponents.
+    :type subcomponent_ids: iterable
+
+    :returns: Rollups keyed by subcomponent primary key.
+    :rtype: dict
+    """
+    return {
+        rollup.object_id: rollup
+        for rollup in DashboardRollup.objects.filter(
+            scope=DashboardRollup.SUBCOMPONENT,
+            object_id__in=list(subcomponent_ids))
+    }
+
+
+def dashboard_totals():
+    """Totals displayed on the dashboard header cards.
+
+    :returns: Aggregated counters over every project rollup.
+    :rtype: dict
+    """
+    totals = DashboardRollup.objects.filter(
+        scope=DashboardRollup.PROJECT
+    ).aggregate(
+        subcomponent_count=Sum('subcomponent_count'),
+        subproject_count=Sum('sub_project_count'),
+        approved_subproject_count=Sum('approved_sub_project_count'),
+        beneficiary_count=Sum('beneficiary_count'),
+        total_subproject_funds=Sum('total_fund'),
+    )
+    return {key: value or 0 for key, value in totals.items()}
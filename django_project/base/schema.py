@@ -0,0 +1,89 @@
+# coding=utf-8
+"""The OpenAPI schema, generated once per deploy.
+
+``manage.py build_schema`` introspects the API with the drf-yasg2
+generator and writes ``swagger.json`` and ``swagger.yaml`` to
+``SCHEMA_ROOT``. :func:`base.views.schema.schema_file` serves those files
+with an ETag, so clients revalidate with a ``304`` instead of having
+every serializer and route introspected again.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+
+from django.conf import settings
+from drf_yasg2 import openapi
+
+logger = logging.getLogger(__name__)
+
+api_info = openapi.Info(
+    title="sms-survery-dashboard PPCR - TRALARD API",
+    default_version='v1',
+    description="PPCR - TRALARD Program Data sharing API.",
+)
+
+SCHEMA_FORMATS = {
+    'json': 'application/json',
+    'yaml': 'application/yaml',
+}
+
+_artifacts = {}
+_build_lock = threading.Lock()
+
+
+def schema_root():
+    return getattr(settings, 'SCHEMA_ROOT', '/home/web/schema')
+
+
+def schema_path(schema_format):
+    return os.path.join(schema_root(), 'swagger.%s' % schema_format)
+
+
+def build_schema():
+    """Generate the schema and write it in every format.
+
+    :returns: Paths of the files written.
+    :rtype: list
+    """
+    from drf_yasg2.codecs import OpenAPICodecJson, OpenAPICodecYaml
+    from drf_yasg2.generators import OpenAPISchemaGenerator
+
+    schema = OpenAPISchemaGenerator(info=api_info).get_schema(
+        request=None, public=True)
+    codecs = {'json': OpenAPICodecJson, 'yaml': OpenAPICodecYaml}
+    os.makedirs(schema_root(), exist_ok=True)
+    paths = []
+    for schema_format, codec in codecs.items():
+        path = schema_path(schema_format)
+        partial = '%s.%s.part' % (path, os.getpid())
+        with open(partial, 'wb') as output:
+            output.write(codec(validators=[]).encode(schema))
+        os.rename(partial, path)
+        paths.append(path)
+    return paths
+
+
+def load_schema(schema_format):
+    """Content and ETag of a schema file, read once per change.
+
+    The schema is built on the spot when no file was deployed, e.g. in
+    development.
+
+    :rtype: tuple of (bytes, str)
+    """
+    path = schema_path(schema_format)
+    if not os.path.exists(path):
+        with _build_lock:
+            if not os.path.exists(path):
+                logger.warning('No schema in %s, building it', path)
+                build_schema()
+    mtime = os.stat(path).st_mtime
+    artifact = _artifacts.get(path)
+    if artifact is None or artifact[0] != mtime:
+        with open(path, 'rb') as schema_file:
+            content = schema_file.read()
+        artifact = _artifacts[path] = (
+            mtime, content, hashlib.sha256(content).hexdigest()[:32])
+    return artifact[1], artifact[2]
@@ -0,0 +1,124 @@
+# coding=utf-8
+"""Signal handlers keeping the dashboard rollups and caches up to date."""
+
+import threading
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+
+_pending = threading.local()
+
+
+def _flush_pending_rollups():
+    from base.rollups import refresh_subcomponents
+
+    subcomponent_ids = getattr(_pending, 'subcomponent_ids', set())
+    _pending.subcomponent_ids = set()
+    refresh_subcomponents(subcomponent_ids)
+
+
+def schedule_rollup_refresh(subcomponent_ids):
+    """Refresh the given subcomponents once the transaction commits.
+
+    Changes made within a single transaction are coalesced so that bulk
+    edits only refresh each subcomponent once; later callbacks find nothing
+    left to do.
+
+    :param subcomponent_ids: Primary keys of the affected subcomponents.
+    :type subcomponent_ids: iterable
+    """
+    pending = getattr(_pending, 'subcomponent_ids', None)
+    if pending is None:
+        pending = _pending.subcomponent_ids = set()
+    pending.update(pk for pk in subcomponent_ids if pk is not None)
+    transaction.on_commit(_flush_pending_rollups)
+
+
+def _subcomponents_of_sub_projects(sub_project_ids):
+    SubProject = apps.get_model('tralard', 'SubProject')
+    return SubProject.objects.filter(
+        pk__in=[pk for pk in sub_project_ids if pk is not None]
+    ).values_list('subcomponent_id', flat=True)
+
+
+def remember_parent(sender, instance, raw=False, **kwargs):
+    """Record the parent a row had before it is saved, so that moving it
+    refreshes the rollups of the parent it left as well.
+    """
+    previous = None
+    if instance.pk is not None and not raw:
+        previous = sender._default_manager.filter(pk=instance.pk).values_list(
+            PARENT_FIELDS[sender._meta.model_name], flat=True).first()
+    instance._rollup_previous_parent = previous
+
+
+def _previous_parent(instance):
+    return instance.__dict__.pop('_rollup_previous_parent', None)
+
+
+def subcomponent_changed(sender, instance, **kwargs):
+    schedule_rollup_refresh([instance.pk])
+
+
+def sub_project_changed(sender, instance, **kwargs):
+    schedule_rollup_refresh(
+        [instance.subcomponent_id, _previous_parent(instance)])
+
+
+def sub_project_child_changed(sender, instance, **kwargs):
+    """Handles beneficiaries and funds, which both hang off a sub project."""
+    schedule_rollup_refresh(_subcomponents_of_sub_projects(
+        {instance.sub_project_id, _previous_parent(instance)}))
+
+
+ROLLUP_HANDLERS = (
+    ('SubComponent', subcomponent_changed),
+    ('SubProject', sub_project_changed),
+    ('Beneficiary', sub_project_child_changed),
+    ('Fund', sub_project_child_changed),
+)
+
+# Field holding the parent of the models that can move, by model name.
+PARENT_FIELDS = {
+    'subproject': 'subcomponent_id',
+    'beneficiary': 'sub_project_id',
+    'fund': 'sub_project_id',
+}
+
+
+def _tralard_data_changed():
+    from base.cache import TRALARD_NAMESPACE, bump_cache_version
+    from base.charts import schedule_render
+    from base.edge_cache import schedule_refresh
+
+    bump_cache_version(TRALARD_NAMESPACE)
+    schedule_render()
+    schedule_refresh()
+
+
+def tralard_changed(sender, **kwargs):
+    """Invalidate the cached fragments, charts and API listings built
+    from the tralard models.
+    """
+    if sender._meta.app_label == 'tralard':
+        transaction.on_commit(_tralard_data_changed)
+
+
+def connect_cache_signals():
+    post_save.connect(tralard_changed, dispatch_uid='base-cache-tralard')
+    post_delete.connect(tralard_changed, dispatch_uid='base-cache-tralard')
+
+
+def connect_rollup_signals():
+    """Connect the rollup handlers to the tralard models, when installed."""
+    for model_name, handler in ROLLUP_HANDLERS:
+        try:
+            model = apps.get_model('tralard', model_name)
+        except LookupError:
+            continue
+        uid = 'base-rollup-%s' % model_name.lower()
+        if model._meta.model_name in PARENT_FIELDS:
+            pre_save.connect(remember_parent, sender=model, dispatch_uid=uid)
+        post_save.connect(handler, sender=model, dispatch_uid=uid)
+        post_delete.connect(handler, sender=model, dispatch_uid=uid)
@@ -0,0 +1,344 @@
+# coding=utf-8
+"""Ingestion of inbound SMS survey responses.
+
+The gateway posts messages to :func:`base.views.sms.sms_inbound`, which
+only validates them with :func:`normalize_message` and appends them to
+``inbound_buffer``. :func:`base.tasks.ingest_sms` drains the buffer on the
+Celery worker, parses the messages with :func:`parse_message` and bulk
+inserts them with :func:`ingest`. A message is answered as::
+
+    <KEYWORD> <answer 1> <answer 2> ...
+
+Every message carries an idempotency key, the gateway message id, which
+is claimed in :class:`~base.models.SmsMessageKey` with ``ON CONFLICT DO
+NOTHING`` before the response is inserted, so gateway retries and replays
+never produce duplicates.
+"""
+
+import hashlib
+import logging
+import re
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from base.buffers import RedisBuffer
+from base.partitions import retention_start
+
+logger = logging.getLogger(__name__)
+
+inbound_buffer = RedisBuffer('sms-inbound')
+# Batches the consumer could not write, see ``manage.py replay_sms``.
+failed_buffer = RedisBuffer('sms-failed')
+
+_SEPARATORS = re.compile(r'[\s,;]+')
+
+# Field names used by common gateways for each part of a message.
+_ALIASES = {
+    'message_id': ('message_id', 'id', 'messageId', 'MessageSid'),
+    'sender': ('sender', 'from', 'From', 'msisdn'),
+    'text': ('text', 'message', 'body', 'Body'),
+    'received': ('received', 'timestamp', 'date', 'received_at'),
+    'district': ('district',),
+    'latitude': ('latitude', 'lat'),
+    'longitude': ('longitude', 'lon', 'lng'),
+}
+
+
+class InvalidMessage(ValueError):
+    """A message that is malformed or does not answer a known survey."""
+
+
+def sms_setting(name):
+    """Read an ``SMS_*`` setting, falling back to its default."""
+    defaults = {
+        # Messages parsed and inserted per batch by the consumer.
+        'BATCH_SIZE': 1000,
+        # Seconds a message may wait in the buffer before it is ingested.
+        'FLUSH_INTERVAL': 2,
+        # Messages accepted by a single webhook request.
+        'MAX_MESSAGES': 1000,
+        # Shared secret sent by the gateway in the X-Gateway-Token header.
+        'GATEWAY_TOKEN': None,
+        # Oldest timestamp accepted, in days, also bounded by the months
+        # SURVEY_PARTITIONS_KEEP keeps. Rejects gateways without a clock.
+        'MAX_AGE_DAYS': 3650,
+        # Seconds ingest_sms claims new batches for before handing the
+        # rest of the buffer to a new task, below its time limits.
+        'RUN_SECONDS': 30,
+        # Seconds a timestamp may be ahead of the server clock.
+        'MAX_CLOCK_SKEW': 60 * 60,
+    }
+    return getattr(settings, 'SMS_%s' % name, defaults[name])
+
+
+def _pick(data, name):
+    for key in _ALIASES[name]:
+        value = data.get(key)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def _parse_received(value):
+    if isinstance(value, (int, float)):
+        try:
+            received = datetime.fromtimestamp(value, tz=timezone.utc)
+        except (ValueError, OverflowError, OSError):
+            received = None
+    else:
+        try:
+            received = parse_datetime(str(value))
+        except ValueError:
+            received = None
+    if received is None:
+        raise InvalidMessage('invalid timestamp %r' % value)
+    if timezone.is_naive(received):
+        received = timezone.make_aware(received, timezone.utc)
+
+    # Responses older than the partitions kept would be stored in the
+    # default partition, after their message ids were pruned.
+    now = timezone.now()
+    earliest = now - timedelta(days=sms_setting('MAX_AGE_DAYS'))
+    keep = getattr(settings, 'SURVEY_PARTITIONS_KEEP', None)
+    if keep is not None:
+        earliest = max(earliest, retention_start(keep))
+    if received < earliest:
+        raise InvalidMessage('timestamp %s is too old' % received.isoformat())
+    if received > now + timedelta(seconds=sms_setting('MAX_CLOCK_SKEW')):
+        raise InvalidMessage(
+            'timestamp %s is in the future' % received.isoformat())
+    return received
+
+
+def _parse_location(data):
+    latitude = _pick(data, 'latitude')
+    longitude = _pick(data, 'longitude')
+    if latitude is None or longitude is None:
+        return None
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        raise InvalidMessage('invalid location')
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise InvalidMessage('invalid location')
+    return [longitude, latitude]
+
+
+def normalize_message(data):
+    """Validate a message posted by the gateway.
+
+    Messages without an id get one derived from their sender, timestamp
+    and text, so that a retried delivery gets the same key. Messages
+    with neither an id nor a timestamp cannot be told apart from a
+    resend and are rejected.
+
+    :param data: Message as posted by the gateway.
+    :type data: dict
+
+    :returns: The message in the form queued for the consumer.
+    :rtype: dict
+
+    :raises InvalidMessage: When a required part is missing, or the
+        timestamp is too old or in the future.
+    """
+    if not isinstance(data, dict):
+        raise InvalidMessage('message must be an object')
+    sender = _pick(data, 'sender')
+    text = _pick(data, 'text')
+    if not sender or not text:
+        raise InvalidMessage('sender and text are required')
+    message_id = _pick(data, 'message_id')
+    received = _pick(data, 'received')
+    if message_id is None and received is None:
+        raise InvalidMessage('message id or timestamp is required')
+    received = (
+        timezone.now() if received is None else _parse_received(received))
+    if message_id is None:
+        message_id = hashlib.sha1(
+            '\n'.join([str(sender), received.isoformat(), str(text)])
+            .encode('utf-8')).hexdigest()
+    return {
+        'message_id': str(message_id)[:64],
+        'sender': str(sender)[:32],
+        'text': str(text)[:640],
+        'received': received.isoformat(),
+        'district': str(_pick(data, 'district') or '')[:100],
+        'location': _parse_location(data),
+    }
+
+
+def load_surveys():
+    """Active surveys keyed by keyword, with their questions.
+
+    :rtype: dict
+    """
+    from base.models import Survey
+
+    return {
+        survey.keyword: survey
+        for survey in Survey.objects.filter(
+            active=True).prefetch_related('questions')
+    }
+
+
+def parse_message(text, surveys):
+    """Match the words of a message with the questions of its survey.
+
+    :param text: Body of the SMS.
+    :type text: str
+
+    :param surveys: Surveys keyed by keyword, see :func:`load_surveys`.
+    :type surveys: dict
+
+    :returns: The survey and the answers keyed by question code.
+    :rtype: tuple
+
+    :raises InvalidMessage: When the message does not answer a survey.
+    """
+    from base.counters import ANSWER_LENGTH
+
+    words = [word for word in _SEPARATORS.split(text.strip()) if word]
+    if not words:
+        raise InvalidMessage('empty message')
+    survey = surveys.get(words[0].upper())
+    if survey is None:
+        raise InvalidMessage('unknown keyword %s' % words[0][:32])
+    questions = list(survey.questions.all())
+    answers = [word.upper() for word in words[1:]]
+    if not answers:
+        raise InvalidMessage('no answers')
+    if len(answers) > len(questions):
+        raise InvalidMessage('%s answers to %s questions' % (
+            len(answers), len(questions)))
+
+    parsed = {}
+    for question, answer in zip(questions, answers):
+        options = [option.upper() for option in question.options]
+        if options and answer not in options:
+            raise InvalidMessage('invalid answer %s to %s' % (
+                answer[:32], question.code))
+        # Longer answers would not fit the survey counters.
+        if len(answer) > ANSWER_LENGTH:
+            raise InvalidMessage('answer to %s longer than %s characters' % (
+                question.code, ANSWER_LENGTH))
+        parsed[question.code] = answer
+    return survey, parsed
+
+
+def claim_message_ids(message_ids):
+    """Record message ids, returning those that were not known yet.
+
+    A single ``INSERT ... ON CONFLICT DO NOTHING RETURNING`` against
+    :class:`~base.models.SmsMessageKey`, so concurrent consumers can never
+    both claim the same message.
+
+    :rtype: set
+    """
+    from base.models import SmsMessageKey
+
+    if not message_ids:
+        return set()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO %s (message_id, created) '
+            'SELECT unnest(%%s::varchar[]), now() '
+            'ON CONFLICT DO NOTHING RETURNING message_id'
+            % SmsMessageKey._meta.db_table,
+            [list(message_ids)])
+        return {row[0] for row in cursor.fetchall()}
+
+
+def _point(location):
+    from django.contrib.gis.geos import Point
+
+    return Point(*location, srid=4326) if location else None
+
+
+def ingest(messages, surveys=None):
+    """Store normalized messages as responses or dead letters.
+
+    Runs in one transaction. Messages already stored, including those
+    repeated within ``messages``, are skipped. The survey counters are
+    incremented in the same transaction, see :mod:`base.counters`.
+    Located messages without a district get the district containing
+    them, see :mod:`base.boundaries`.
+
+    :param messages: Messages as returned by :func:`normalize_message`.
+    :type messages: list
+
+    :param surveys: Surveys keyed by keyword, loaded when not given.
+    :type surveys: dict
+
+    :returns: Number of responses stored and of dead letters handled.
+    :rtype: tuple
+    """
+    from base import counters
+    from base.boundaries import districts_of_points
+    from base.models import SmsDeadLetter, SurveyResponse
+
+    if surveys is None:
+        surveys = load_surveys()
+    responses = {}
+    dead_letters = []
+    for message in messages:
+        try:
+            survey, answers = parse_message(message['text'], surveys)
+        except InvalidMessage as error:
+            dead_letters.append(SmsDeadLetter(
+                message_id=message['message_id'],
+                payload=message,
+                reason=str(error)[:255]))
+            continue
+        responses[message['message_id']] = SurveyResponse(
+            survey=survey,
+            message_id=message['message_id'],
+            sender=message['sender'],
+            text=message['text'],
+            answers=answers,
+            received=parse_datetime(message['received']),
+            district=message.get('district', ''),
+            location=_point(message.get('location')))
+
+    unplaced = [
+        response for response in responses.values()
+        if response.location is not None and not response.district]
+    if unplaced:
+        districts = districts_of_points(
+            [response.location.coords for response in unplaced])
+        for response, district in zip(unplaced, districts):
+            response.district = district
+
+    with transaction.atomic():
+        new_ids = claim_message_ids(responses)
+        new_responses = [
+            response for message_id, response in responses.items()
+            if message_id in new_ids]
+        SurveyResponse.objects.bulk_create(new_responses)
+        counters.apply(new_responses)
+        SmsDeadLetter.objects.bulk_create(
+            dead_letters, ignore_conflicts=True)
+    return len(new_responses), len(dead_letters)
+
+
+def schedule_ingest(length, pushed):
+    """Start the consumer for a buffer that just grew to ``length``.
+
+    The first messages of a burst wait ``SMS_FLUSH_INTERVAL`` seconds so
+    that they are ingested together; every full batch after that is
+    ingested right away.
+    """
+    from base.tasks import ingest_sms
+
+    batch_size = sms_setting('BATCH_SIZE')
+    try:
+        if length == pushed:
+            ingest_sms.apply_async(countdown=sms_setting('FLUSH_INTERVAL'))
+        elif length // batch_size > (length - pushed) // batch_size:
+            ingest_sms.delay()
+    except Exception:
+        # The messages are queued, the next push schedules the consumer.
+        logger.exception('Could not schedule the SMS consumer')
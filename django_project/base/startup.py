@@ -0,0 +1,223 @@
+# coding=utf-8
+"""What processes pay for while starting, and deferring what they can.
+
+:func:`lazy_import` hands out a module that is only executed when one of
+its attributes is first read. Heavy libraries used by a few code paths,
+pandas and altair for the reports, are imported this way so that uWSGI
+workers, celery workers and management commands that never build a
+report do not load them.
+
+:func:`profile_setup` sets Django up while timing every import, the
+import, models and ``ready()`` of each installed app, the URLconf and the
+WSGI handler. ``manage.py profile_startup`` runs it in fresh interpreters,
+through :func:`main`, and reports where the start up time goes.
+"""
+
+import importlib.util
+import json
+import sys
+import time
+import types
+from importlib import _bootstrap
+
+# Modules handed out by lazy_import, by name.
+_lazy_modules = {}
+
+
+class _MissingModule(types.ModuleType):
+    """Stands for a lazily imported module that is not installed, the
+    error is raised on first use like an import inside a function would.
+    """
+
+    def __getattr__(self, attribute):
+        raise ImportError('No module named %r' % self.__name__)
+
+
+def lazy_import(name):
+    """Import a module when one of its attributes is first read.
+
+    :param name: Absolute name of the module.
+    :type name: str
+
+    :rtype: module
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        return _MissingModule(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    _lazy_modules[name] = module
+    return module
+
+
+def is_loaded(module):
+    """Whether a module of :func:`lazy_import` has been executed yet."""
+    return type(module) is types.ModuleType
+
+
+def deferred_modules():
+    """Names of the lazily imported modules still waiting for a first use.
+
+    :rtype: list
+    """
+    return sorted(
+        name for name in _lazy_modules
+        if not is_loaded(sys.modules.get(name, _lazy_modules[name])))
+
+
+class ImportTimer(object):
+    """Times each module imported while installed.
+
+    The self time of a module excludes the modules it imported in turn,
+    the cumulative time includes them.
+    """
+
+    def __init__(self):
+        self.self_times = {}
+        self.cumulative_times = {}
+        self._nested = []
+        self._find_and_load = None
+
+    def install(self):
+        self._find_and_load = _bootstrap._find_and_load
+        _bootstrap._find_and_load = self._timed_find_and_load
+
+    def uninstall(self):
+        _bootstrap._find_and_load = self._find_and_load
+
+    def _timed_find_and_load(self, name, import_):
+        if name in sys.modules:
+            return self._find_and_load(name, import_)
+        self._nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._find_and_load(name, import_)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._nested.pop()
+            self.cumulative_times[name] = elapsed
+            self.self_times[name] = elapsed - nested
+            if self._nested:
+                self._nested[-1] += elapsed
+
+    def packages(self):
+        """Self time of the imports summed per top level package.
+
+        :rtype: dict
+        """
+        totals = {}
+        for name, elapsed in self.self_times.items():
+            package = name.partition('.')[0]
+            totals[package] = totals.get(package, 0.0) + elapsed
+        return totals
+
+
+def _time_apps(timings):
+    """Wrap app loading so that each step of each app is timed.
+
+    :returns: A function restoring the original methods.
+    """
+    from django.apps import AppConfig
+
+    create = AppConfig.create.__func__
+    import_models = AppConfig.import_models
+
+    def record(label, step, start):
+        timings.setdefault(label, {})[step] = time.perf_counter() - start
+
+    def timed_create(cls, entry):
+        start = time.perf_counter()
+        config = create(cls, entry)
+        record(config.label, 'import', start)
+        ready = config.ready
+
+        def timed_ready():
+            start = time.perf_counter()
+            ready()
+            record(config.label, 'ready', start)
+
+        config.ready = timed_ready
+        return config
+
+    def timed_import_models(config):
+        start = time.perf_counter()
+        import_models(config)
+        record(config.label, 'models', start)
+
+    AppConfig.create = classmethod(timed_create)
+    AppConfig.import_models = timed_import_models
+
+    def restore():
+        AppConfig.create = classmethod(create)
+        AppConfig.import_models = import_models
+
+    return restore
+
+
+def profile_setup(timer):
+    """Set Django up, timing each phase and each installed app.
+
+    Must run in a process where Django is not set up yet.
+
+    :param timer: Installed import timer.
+    :type timer: ImportTimer
+
+    :rtype: dict
+    """
+    phases = {}
+    start = phase_start = time.perf_counter()
+    from django.conf import settings
+
+    settings.INSTALLED_APPS
+    phases['settings'] = time.perf_counter() - phase_start
+
+    import django
+
+    apps = {}
+    restore = _time_apps(apps)
+    phase_start = time.perf_counter()
+    try:
+        django.setup(set_prefix=False)
+    finally:
+        restore()
+    phases['apps'] = time.perf_counter() - phase_start
+
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connections
+    from django.urls import get_resolver
+
+    phase_start = time.perf_counter()
+    get_resolver().url_patterns
+    phases['urls'] = time.perf_counter() - phase_start
+
+    phase_start = time.perf_counter()
+    WSGIHandler()
+    phases['wsgi'] = time.perf_counter() - phase_start
+    phases['total'] = time.perf_counter() - start
+    connections.close_all()
+
+    return {
+        'phases': phases,
+        'apps': apps,
+        'packages': timer.packages(),
+        'modules': len(timer.self_times),
+        'deferred': deferred_modules(),
+    }
+
+
+def main():
+    """Profile the start up of this process, printing the report as JSON."""
+    timer = ImportTimer()
+    timer.install()
+    try:
+        report = profile_setup(timer)
+    finally:
+        timer.uninstall()
+    # Last line, apps may print while they load.
+    sys.stdout.write('\n%s\n' % json.dumps(report))
@@ -0,0 +1,36 @@
+function serverSideTableOptions(url) {
+    // Options switching a DataTable to server-side processing against one of
+    // the base.views.datatables endpoints. The cursor returned with each page
+    // is sent back when the next page is requested, so the server can seek
+    // to it instead of counting through every skipped row.
+    let lastPage = null;
+
+    return {
+        serverSide: true,
+        processing: true,
+        searchDelay: 400,
+        ajax: {
+            url: url,
+            data: function (params) {
+                if (lastPage && lastPage.cursor &&
+                    params.start === lastPage.start + lastPage.length) {
+                    params.after = lastPage.cursor;
+                }
+                lastPage = { start: params.start, length: params.length };
+                return params;
+            },
+            dataSrc: function (json) {
+                if (lastPage) {
+                    lastPage.cursor = json.cursor;
+                }
+                return json.data;
+            }
+        },
+        drawCallback: function () {
+            // Rows are created after htmx scanned the page
+            if (window.htmx) {
+                htmx.process(this.api().table().body());
+            }
+        }
+    };
+}
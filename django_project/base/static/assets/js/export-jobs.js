@@ -0,0 +1,54 @@
+// Links marked with data-export-job queue their export on the celery
+// worker instead of downloading it inline, then poll the job until the
+// file can be downloaded. Without javascript the link still downloads the
+// export directly.
+(function ($) {
+    const POLL_INTERVAL = 2000;
+
+    function csrfToken() {
+        const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+        return match ? decodeURIComponent(match[1]) : '';
+    }
+
+    function poll(link, label, job) {
+        if (job.status === 'done') {
+            link.html(label).removeClass('is-loading');
+            window.location = job.download_url;
+            return;
+        }
+        if (job.status === 'failed') {
+            link.html(label).removeClass('is-loading');
+            alert('The export could not be prepared: ' + job.error);
+            return;
+        }
+        link.text('Preparing export... ' + job.progress + '%');
+        setTimeout(function () {
+            $.getJSON(job.status_url, function (next) {
+                poll(link, label, next);
+            });
+        }, POLL_INTERVAL);
+    }
+
+    $(document).on('click', 'a[data-export-job]', function (event) {
+        const link = $(this);
+        event.preventDefault();
+        if (link.hasClass('is-loading')) {
+            return;
+        }
+        const label = link.html();
+        link.addClass('is-loading');
+        $.ajax({
+            url: link.attr('href'),
+            method: 'POST',
+            dataType: 'json',
+            headers: {'X-CSRFToken': csrfToken()},
+            success: function (job) {
+                poll(link, label, job);
+            },
+            error: function () {
+                link.html(label).removeClass('is-loading');
+                alert('The export could not be queued.');
+            }
+        });
+    });
+})(jQuery);
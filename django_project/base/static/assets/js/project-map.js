@@ -0,0 +1,47 @@
+// Thin client of the project map: Leaflet fetches the vector tiles of the
+// visible area from base.views.maps.map_tile. Clustered features carry a
+// point_count, drawn as a circle growing with the number of points.
+(function () {
+    const element = document.getElementById('project-map');
+    if (!element || !window.L) {
+        return;
+    }
+    const center = element.dataset.center.split(',').map(Number);
+    const layer = element.dataset.layer;
+    const map = L.map(element).setView(center, Number(element.dataset.zoom));
+
+    L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+        attribution: '&copy; OpenStreetMap contributors',
+        maxZoom: 19
+    }).addTo(map);
+
+    function style(properties) {
+        const count = properties.point_count || 1;
+        return {
+            radius: count > 1 ? Math.min(6 + 3 * Math.log(count), 28) : 5,
+            fill: true,
+            fillColor: count > 1 ? '#2b7a4b' : '#1f6fb2',
+            fillOpacity: 0.7,
+            color: '#ffffff',
+            weight: 1
+        };
+    }
+
+    const styles = {};
+    styles[layer] = style;
+    L.vectorGrid.protobuf(element.dataset.tileUrl, {
+        rendererFactory: L.canvas.tile,
+        vectorTileLayerStyles: styles,
+        interactive: true,
+        maxNativeZoom: 20
+    }).on('click', function (event) {
+        const properties = event.layer.properties;
+        if (properties.point_count > 1) {
+            map.setView(event.latlng, map.getZoom() + 2);
+        } else if (properties.name) {
+            const content = document.createElement('span');
+            content.textContent = properties.name;
+            L.popup().setLatLng(event.latlng).setContent(content).openOn(map);
+        }
+    }).addTo(map);
+}());
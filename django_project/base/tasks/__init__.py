@@ -0,0 +1,8 @@
+# coding=utf-8
+
+from .audit import *  # noqa
+from .charts import *  # noqa
+from .edge_cache import *  # noqa
+from .exports import *  # noqa
+from .maintenance import *  # noqa
+from .sms import *  # noqa
@@ -0,0 +1,96 @@
+# coding=utf-8
+import logging
+import time
+
+from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from celery.signals import worker_shutdown
+from django.db import transaction
+
+from base.audit import (
+    audit_buffer,
+    audit_failed_buffer,
+    audit_setting,
+    build_events,
+)
+
+logger = logging.getLogger(__name__)
+
+__all__ = ['flush_audit_events']
+
+
+@shared_task(
+    name='base.flush_audit_events', ignore_result=True, acks_late=True,
+    soft_time_limit=audit_setting('RUN_SECONDS') + 60,
+    time_limit=audit_setting('RUN_SECONDS') + 90)
+def flush_audit_events(max_batches=None, failed=False):
+    """Bulk insert the audit events queued by the buffered backend.
+
+    A batch stays claimed in Redis until its transaction commits. A batch
+    that cannot be written is moved to the failed buffer before the error
+    is raised, and the batches of a worker that died while writing them
+    are put back in the buffer by the next flush.
+
+    A flush stops claiming batches after ``AUDIT_BUFFER_RUN_SECONDS`` and
+    queues a new one for the rest of the buffer. A batch interrupted by
+    the soft time limit goes back to the head of the buffer.
+
+    :param max_batches: Stop after this many batches, drains the whole
+        buffer when not given.
+    :type max_batches: int
+
+    :param failed: Write the batches of the failed buffer instead.
+    :type failed: bool
+
+    :returns: Number of events written.
+    :rtype: int
+    """
+    buffer = audit_failed_buffer if failed else audit_buffer
+    recovered = buffer.recover()
+    if recovered:
+        logger.warning('Recovered %s unacknowledged audit events', recovered)
+    batch_size = audit_setting('BATCH_SIZE')
+    written = batches = 0
+    deadline = time.monotonic() + audit_setting('RUN_SECONDS')
+    remaining = False
+    while max_batches is None or batches < max_batches:
+        if time.monotonic() > deadline:
+            remaining = True
+            break
+        claim, documents = buffer.claim(batch_size)
+        if claim is None:
+            break
+        try:
+            with transaction.atomic():
+                for model, events in build_events(documents).items():
+                    model.objects.bulk_create(events, batch_size=batch_size)
+        except SoftTimeLimitExceeded:
+            buffer.release(claim)
+            logger.warning(
+                'Time limit reached, put %s audit events back',
+                len(documents))
+            remaining = True
+            break
+        except Exception:
+            buffer.release(claim, audit_failed_buffer)
+            logger.exception(
+                'Could not write %s audit events, moved them to %s',
+                len(documents), audit_failed_buffer.key)
+            raise
+        buffer.ack(claim)
+        written += len(documents)
+        batches += 1
+    if remaining:
+        flush_audit_events.delay(failed=failed)
+    if written:
+        logger.info('Flushed %s audit events', written)
+    return written
+
+
+@worker_shutdown.connect
+def flush_audit_events_on_shutdown(**kwargs):
+    """Write whatever is still queued before the worker goes away."""
+    try:
+        flush_audit_events()
+    except Exception:
+        logger.exception('Could not flush audit events on shutdown')
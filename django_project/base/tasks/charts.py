@@ -0,0 +1,39 @@
+# coding=utf-8
+from celery import shared_task
+from django.core.cache import cache
+
+from base.charts import (
+    _SCHEDULED_KEY,
+    chart_setting,
+    render_charts,
+    report_projects,
+)
+
+__all__ = ['render_report_charts']
+
+
+@shared_task(
+    name='base.render_report_charts', ignore_result=True, acks_late=True,
+    soft_time_limit=chart_setting('RENDER_TIME_LIMIT'),
+    time_limit=chart_setting('RENDER_TIME_LIMIT') + 30)
+def render_report_charts(project_slug=None, force=False):
+    """Render the indicator report charts whose data changed.
+
+    Without a project, one task per project report is queued, so that
+    each report gets the whole time limit.
+
+    :param project_slug: Only render the report of this project, ``''``
+        standing for the report of all projects.
+    :type project_slug: str
+
+    :returns: Number of reports rendered, or of tasks queued.
+    :rtype: int
+    """
+    if project_slug is None:
+        # Writes made while rendering schedule the next run.
+        cache.delete(_SCHEDULED_KEY)
+        slugs = report_projects()
+        for slug in slugs:
+            render_report_charts.delay(slug, force=force)
+        return len(slugs)
+    return int(render_charts(project_slug, force=force))
@@ -0,0 +1,15 @@
+# coding=utf-8
+from celery import shared_task
+
+from base.edge_cache import refresh
+
+__all__ = ['refresh_edge_cache']
+
+
+@shared_task(
+    name='base.refresh_edge_cache', ignore_result=True, acks_late=True)
+def refresh_edge_cache(paths=None):
+    """Replace the nginx micro-cache copies of ``paths``, see
+    :mod:`base.edge_cache`.
+    """
+    return refresh(paths)
@@ -0,0 +1,154 @@
+# coding=utf-8
+import glob
+import logging
+import os
+from datetime import timedelta
+
+from celery import shared_task
+from django.core.mail import send_mail
+from django.utils import timezone
+
+from base.exports import csv_lines, export_rows, export_setting, write_xlsx
+from base.models import ExportJob
+from base.models.export import reports_root
+
+logger = logging.getLogger(__name__)
+
+__all__ = ['run_export_job', 'prune_export_jobs']
+
+
+class _Progress(object):
+    """Pass rows through, recording on the job how many went by."""
+
+    def __init__(self, job_id, rows, every):
+        self.job_id = job_id
+        self.rows = rows
+        self.every = every
+        self.written = 0
+
+    def __iter__(self):
+        for row in self.rows:
+            yield row
+            self.written += 1
+            if self.written % self.every == 0:
+                ExportJob.objects.filter(pk=self.job_id).update(
+                    rows_written=self.written)
+
+
+def _notify(job, download_url):
+    if not job.user.email or not download_url:
+        return
+    try:
+        send_mail(
+            'Your %s export is ready' % job.export,
+            'The export you requested can be downloaded from %s until %s.'
+            % (download_url, (timezone.now() + timedelta(
+                days=export_setting('JOB_RETENTION_DAYS'))).date()),
+            None,
+            [job.user.email])
+    except Exception:
+        logger.exception('Could not notify %s about export job %s',
+                         job.user.email, job.pk)
+
+
+@shared_task(
+    name='base.run_export_job', bind=True, ignore_result=True,
+    time_limit=export_setting('JOB_TIME_LIMIT') + 60,
+    soft_time_limit=export_setting('JOB_TIME_LIMIT'))
+def run_export_job(self, job_id, download_url=None):
+    """Write the artifact of an export job to ``REPORTS_ROOT``.
+
+    :param job_id: Primary key of the ExportJob.
+    :type job_id: int
+
+    :param download_url: Absolute URL of the download, mailed to the user
+        once the artifact is ready.
+    :type download_url: str
+    """
+    from base.views.exports import EXPORT_VIEWS
+
+    # Claimed in one statement, so that a redelivered message or a
+    # second task for the same job does nothing.
+    claimed = ExportJob.objects.filter(
+        pk=job_id, status=ExportJob.PENDING).update(
+        status=ExportJob.RUNNING, started=timezone.now(),
+        task_id=self.request.id or '')
+    if not claimed:
+        return
+    job = ExportJob.objects.select_related('user').get(pk=job_id)
+
+    partial = None
+    chunk_size = export_setting('CHUNK_SIZE')
+    try:
+        view = EXPORT_VIEWS[job.export](kwargs=job.parameters)
+        queryset = view.get_queryset()
+        ExportJob.objects.filter(pk=job.pk).update(
+            rows_total=queryset.count())
+
+        job.filename = '%s-%s' % (
+            job.pk, view.get_filename(job.export_format))
+        os.makedirs(reports_root(), exist_ok=True)
+        partial = job.path + '.part'
+        rows = _Progress(
+            job.pk, export_rows(queryset, view.columns, chunk_size),
+            chunk_size)
+        if job.export_format == 'csv':
+            with open(partial, 'w', newline='', encoding='utf-8') as output:
+                output.writelines(csv_lines(view.columns, rows))
+        else:
+            with open(partial, 'wb') as output:
+                write_xlsx(view.columns, rows, title=view.title,
+                           output=output)
+        os.rename(partial, job.path)
+    except Exception as error:
+        logger.exception('Export job %s failed', job.pk)
+        if partial and os.path.exists(partial):
+            os.remove(partial)
+        ExportJob.objects.filter(pk=job.pk).update(
+            status=ExportJob.FAILED, finished=timezone.now(),
+            error=str(error) or error.__class__.__name__)
+        return
+
+    ExportJob.objects.filter(pk=job.pk).update(
+        status=ExportJob.DONE, finished=timezone.now(),
+        filename=job.filename, rows_written=rows.written)
+    _notify(job, download_url)
+
+
+@shared_task(
+    name='base.prune_export_jobs', ignore_result=True, acks_late=True)
+def prune_export_jobs():
+    """Delete export jobs, and their artifacts, past their retention.
+
+    Jobs still running after the hard time limit of
+    :func:`run_export_job` belong to a worker that was killed, they are
+    marked failed and their partial artifact is removed.
+
+    :returns: Number of jobs deleted.
+    :rtype: int
+    """
+    stale = ExportJob.objects.filter(
+        status=ExportJob.RUNNING,
+        started__lt=timezone.now() - timedelta(
+            seconds=run_export_job.time_limit))
+    for job_id in stale.values_list('pk', flat=True):
+        for partial in glob.glob(
+                os.path.join(reports_root(), '%s-*.part' % job_id)):
+            os.remove(partial)
+    timed_out = stale.update(
+        status=ExportJob.FAILED, finished=timezone.now(),
+        error='The export did not finish within its time limit.')
+    if timed_out:
+        logger.warning('Marked %s timed out export jobs failed', timed_out)
+
+    expired = ExportJob.objects.filter(
+        created__lt=timezone.now() - timedelta(
+            days=export_setting('JOB_RETENTION_DAYS')))
+    count = 0
+    for job in expired.iterator():
+        job.delete_file()
+        job.delete()
+        count += 1
+    if count:
+        logger.info('Pruned %s export jobs', count)
+    return count
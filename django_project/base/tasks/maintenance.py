@@ -0,0 +1,126 @@
+# coding=utf-8
+import logging
+import random
+
+from celery import Task, shared_task
+from django.conf import settings
+
+from base.maintenance import (
+    clear_sessions,
+    clear_temp_files,
+    maintenance_setting,
+    measured_run,
+    prune_audit_log,
+    record_run,
+    run_lock,
+    warm_dashboard,
+)
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    'clear_expired_sessions',
+    'clear_media_temp_files',
+    'maintain_survey_partitions',
+    'prune_audit_events',
+    'refresh_rollups',
+    'warm_dashboard_cache',
+]
+
+
+class PeriodicTask(Task):
+    """Base of the tasks started by celery beat.
+
+    A message sent without an ETA, as beat sends them, is sent again
+    after a random delay of up to ``jitter`` seconds so that the jobs due
+    at the same minute do not all hit the database at once. The run then
+    holds a lock for up to ``time_limit`` seconds, a run finding it taken
+    is skipped, and its outcome is recorded, see :mod:`base.maintenance`.
+    The jobs are safe to repeat, so they are acknowledged late.
+    """
+    ignore_result = True
+    acks_late = True
+    jitter = None
+    soft_time_limit = 15 * 60
+    time_limit = 16 * 60
+
+    def __call__(self, *args, **kwargs):
+        jitter = self.jitter
+        if jitter is None:
+            jitter = maintenance_setting('JITTER')
+        request = self.request
+        if jitter and not (
+                request.called_directly or request.is_eager or request.eta):
+            self.apply_async(
+                args, kwargs, countdown=random.uniform(0, jitter))
+            return None
+        with run_lock(self.name, self.time_limit) as acquired:
+            if not acquired:
+                record_run(self.name, 'skipped')
+                logger.warning('%s is still running, skipped', self.name)
+                return None
+            with measured_run(self.name):
+                return self.run(*args, **kwargs)
+
+
+@shared_task(name='base.refresh_rollups', base=PeriodicTask)
+def refresh_rollups():
+    """Rebuild the dashboard rollups, correcting any drift of the
+    incremental refreshes.
+
+    :returns: Number of subcomponents refreshed.
+    :rtype: int
+    """
+    from base.rollups import refresh_all
+
+    return refresh_all()
+
+
+@shared_task(name='base.clear_media_temp_files', base=PeriodicTask)
+def clear_media_temp_files():
+    """Delete the old files of ``MEDIA_ROOT/temp``."""
+    deleted = clear_temp_files()
+    if deleted:
+        logger.info('Deleted %s temporary files', deleted)
+    return deleted
+
+
+@shared_task(name='base.clear_expired_sessions', base=PeriodicTask)
+def clear_expired_sessions():
+    clear_sessions()
+
+
+@shared_task(name='base.prune_audit_events', base=PeriodicTask)
+def prune_audit_events():
+    """Delete the audit events past ``MAINTENANCE_AUDIT_LOG_DAYS``."""
+    deleted = prune_audit_log()
+    if deleted:
+        logger.info('Pruned %s audit events', deleted)
+    return deleted
+
+
+@shared_task(name='base.maintain_survey_partitions', base=PeriodicTask)
+def maintain_survey_partitions():
+    """Create the coming survey response partitions, archive the old
+    ones and prune the message ids recorded before them, as
+    ``manage.py survey_partitions`` does.
+    """
+    from base.partitions import (
+        archive_partitions,
+        ensure_partitions,
+        prune_message_keys,
+    )
+
+    keep = getattr(settings, 'SURVEY_PARTITIONS_KEEP', None)
+    created = ensure_partitions(
+        getattr(settings, 'SURVEY_PARTITIONS_AHEAD', 3), keep_months=keep)
+    if keep is not None:
+        archive_partitions(keep)
+        prune_message_keys()
+    return len(created)
+
+
+@shared_task(name='base.warm_dashboard_cache', base=PeriodicTask)
+def warm_dashboard_cache():
+    """Render charts and map tiles before the working day starts."""
+    return warm_dashboard()
@@ -0,0 +1,89 @@
+# coding=utf-8
+import logging
+import time
+
+from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+
+from base.sms import (
+    failed_buffer,
+    inbound_buffer,
+    ingest,
+    load_surveys,
+    sms_setting,
+)
+
+logger = logging.getLogger(__name__)
+
+__all__ = ['ingest_sms']
+
+
+@shared_task(
+    name='base.ingest_sms', ignore_result=True, acks_late=True,
+    soft_time_limit=sms_setting('RUN_SECONDS') + 60,
+    time_limit=sms_setting('RUN_SECONDS') + 90)
+def ingest_sms(max_batches=None):
+    """Parse and store the messages queued by the SMS webhook.
+
+    A batch stays claimed in Redis until its transaction commits. A batch
+    that cannot be written is moved to the failed buffer before the error
+    is raised, so that it can be replayed with
+    ``manage.py replay_sms --failed`` instead of being lost, and the
+    batches of a worker that died while writing them are put back in the
+    buffer by the next run. Messages already stored are skipped, so a
+    batch delivered twice is harmless.
+
+    A run stops claiming batches after ``SMS_RUN_SECONDS`` and queues a
+    new task for the rest of the buffer. A batch interrupted by the soft
+    time limit goes back to the head of the buffer.
+
+    :param max_batches: Stop after this many batches, drains the whole
+        buffer when not given.
+    :type max_batches: int
+
+    :returns: Number of messages handled.
+    :rtype: int
+    """
+    recovered = inbound_buffer.recover()
+    if recovered:
+        logger.warning('Recovered %s unacknowledged messages', recovered)
+    batch_size = sms_setting('BATCH_SIZE')
+    surveys = load_surveys()
+    handled = batches = 0
+    start = time.monotonic()
+    deadline = start + sms_setting('RUN_SECONDS')
+    remaining = False
+    while max_batches is None or batches < max_batches:
+        if time.monotonic() > deadline:
+            remaining = True
+            break
+        claim, messages = inbound_buffer.claim(batch_size)
+        if claim is None:
+            break
+        try:
+            responses, dead_letters = ingest(messages, surveys)
+        except SoftTimeLimitExceeded:
+            inbound_buffer.release(claim)
+            logger.warning(
+                'Time limit reached, put %s messages back', len(messages))
+            remaining = True
+            break
+        except Exception:
+            inbound_buffer.release(claim, failed_buffer)
+            logger.exception(
+                'Could not ingest %s messages, moved them to %s',
+                len(messages), failed_buffer.key)
+            raise
+        inbound_buffer.ack(claim)
+        handled += len(messages)
+        batches += 1
+        if dead_letters:
+            logger.warning('%s messages could not be parsed', dead_letters)
+    if remaining:
+        ingest_sms.delay()
+    if handled:
+        elapsed = time.monotonic() - start
+        logger.info(
+            'Ingested %s messages in %.2fs (%.0f/s)', handled, elapsed,
+            handled / elapsed if elapsed else 0)
+    return handled
@@ -0,0 +1,12 @@
+# coding=utf-8
+from django import template
+
+from base.cache import cache_version as _cache_version
+
+register = template.Library()
+
+
+@register.simple_tag
+def cache_version(namespace):
+    """Returns the version to add to ``{% cache %}`` fragment keys."""
+    return _cache_version(namespace)
@@ -0,0 +1,15 @@
+# coding=utf-8
+from django import template
+
+from base.charts import project_charts
+
+register = template.Library()
+
+
+@register.simple_tag
+def report_charts(project_slug=None):
+    """The pre-rendered indicator charts of a project, see
+    :mod:`base.charts`.
+    """
+    charts, _ = project_charts(project_slug)
+    return charts
@@ -0,0 +1,21 @@
+# coding=utf-8
+from django import template
+from django.urls import reverse
+
+from base.cache import TRALARD_NAMESPACE, cache_version
+
+register = template.Library()
+
+
+@register.simple_tag
+def map_tile_url(layer):
+    """Leaflet URL template of the tiles of ``layer``, see
+    :mod:`base.maptiles`.
+
+    Carries the current data version so browsers cache the tiles until
+    the data changes.
+    """
+    url = reverse('map-tile', kwargs={'layer': layer, 'z': 0, 'x': 0, 'y': 0})
+    return '%s?v=%s' % (
+        url.replace('/0/0/0.pbf', '/{z}/{x}/{y}.pbf'),
+        cache_version(TRALARD_NAMESPACE))
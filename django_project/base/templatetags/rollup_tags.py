@@ -0,0 +1,27 @@
+# coding=utf-8
+from django import template
+
+from base.models import DashboardRollup
+from base.rollups import dashboard_totals as _dashboard_totals
+from base.rollups import subcomponent_rollups as _subcomponent_rollups
+
+register = template.Library()
+
+
+@register.simple_tag
+def subcomponent_rollups(subcomponents):
+    """Loads the rollups of every listed subcomponent in one query."""
+    return _subcomponent_rollups(
+        subcomponent.pk for subcomponent in subcomponents)
+
+
+@register.simple_tag
+def dashboard_totals():
+    """Returns the counters shown on the dashboard header cards."""
+    return _dashboard_totals()
+
+
+@register.filter
+def rollup_for(rollups, obj):
+    """Picks the rollup of ``obj``, falling back to empty counters."""
+    return rollups.get(obj.pk) or DashboardRollup(object_id=obj.pk)
@@ -0,0 +1,36 @@
+# coding=utf-8
+from datetime import timedelta
+
+from django import template
+from django.utils import timezone
+
+from base import counters
+from base.models import Survey
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/survey_results.html')
+def survey_results(days=30):
+    """Responses of the active surveys over the last ``days`` days.
+
+    Reads the survey counters, two queries whatever the number of
+    responses.
+    """
+    surveys = list(Survey.objects.filter(active=True))
+    start = timezone.now().astimezone(timezone.utc).date() - timedelta(
+        days=days - 1)
+    recent = counters.totals([survey.pk for survey in surveys], start=start)
+    return {
+        'days': days,
+        'surveys': [
+            (survey, recent.get(survey.pk, 0)) for survey in surveys],
+    }
+
+
+@register.simple_tag
+def survey_summary(survey, start=None, end=None, district=None):
+    """Response and answer counts of ``survey``, see
+    :func:`base.counters.results`.
+    """
+    return counters.results(survey.pk, start, end, district)
@@ -0,0 +1,52 @@
+# coding=utf-8
+"""Test helpers enforcing query budgets, see base.middleware."""
+
+from contextlib import contextmanager
+
+from base.instrumentation import Recorder, recording
+from base.middleware import query_budget
+
+
+def _describe(recorder):
+    return '\n'.join(
+        '%sx %s' % (count, sql) for sql, count in recorder.duplicates)
+
+
+class QueryBudgetMixin(object):
+    """Assertions on the queries recorded by the instrumentation."""
+
+    def assertWithinQueryBudget(self, response, budget=None):
+        """Fail when the request behind a test client response went over
+        its budget.
+
+        :param response: Response returned by the test client.
+
+        :param budget: Maximum number of queries, defaults to the entry of
+            the view in ``QUERY_BUDGETS``.
+        :type budget: int
+        """
+        request = response.wsgi_request
+        if budget is None:
+            budget = query_budget(request)
+        self.assertIsNotNone(
+            budget, 'No query budget is set for %s' % request.path)
+        recorder = request.instrumentation
+        self.assertLessEqual(
+            recorder.query_count, budget,
+            '%s ran %s queries, over its budget of %s. Repeated:\n%s' % (
+                request.path, recorder.query_count, budget,
+                _describe(recorder)))
+
+    @contextmanager
+    def assertNoDuplicateQueries(self, allowed=0):
+        """Fail when the block runs the same statement more than once.
+
+        :param allowed: Number of repetitions tolerated.
+        :type allowed: int
+        """
+        recorder = Recorder()
+        with recording(recorder):
+            yield recorder
+        self.assertLessEqual(
+            recorder.duplicate_count, allowed,
+            'Repeated queries:\n%s' % _describe(recorder))
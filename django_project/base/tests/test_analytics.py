@@ -0,0 +1,87 @@
+# coding=utf-8
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from base import analytics
+
+BENEFICIARIES = [
+    (1, 'ppcr', 'Roads', 'Bridge', 'Mongu', 'Club', 10, 6, 4,
+     date(2021, 1, 5)),
+    (2, 'ppcr', 'Roads', 'Culvert', 'Kalabo', 'Club', 5, 1, 4,
+     date(2021, 4, 2)),
+    (3, 'tralard', 'Fishing', 'Ponds', 'Mongu', 'Cooperative', None, None,
+     None, None),
+]
+
+
+class AnalyticsTests(SimpleTestCase):
+    def frame(self, name, rows):
+        return analytics.typed_frame(rows, analytics.FRAMES[name][1])
+
+    def test_typed_frame(self):
+        frame = self.frame('beneficiaries', BENEFICIARIES)
+        self.assertEqual(str(frame['subcomponent'].dtype), 'category')
+        self.assertEqual(str(frame['total'].dtype), 'int32')
+        self.assertEqual(frame['total'].tolist(), [10, 5, 0])
+        self.assertEqual(str(frame['registered'].dtype), 'datetime64[ns]')
+
+    def test_beneficiary_indicators(self):
+        frame = self.frame('beneficiaries', BENEFICIARIES)
+        result = analytics.beneficiary_indicators(
+            analytics.for_project(frame, 'ppcr'))
+        self.assertEqual(list(result.index), ['Roads'])
+        self.assertEqual(result.loc['Roads', 'organisations'], 2)
+        self.assertEqual(result.loc['Roads', 'beneficiaries'], 15)
+        self.assertAlmostEqual(
+            result.loc['Roads', 'female_share'], 7 / 15, places=5)
+
+        result = analytics.beneficiary_indicators(frame, by='ward')
+        self.assertEqual(result['beneficiaries'].to_dict(), {
+            'Kalabo': 5, 'Mongu': 10})
+
+    def test_beneficiaries_over_time(self):
+        frame = self.frame('beneficiaries', BENEFICIARIES)
+        result = analytics.beneficiaries_over_time(frame)
+        self.assertEqual(result['beneficiaries'].tolist(), [10, 5])
+        self.assertEqual(result['cumulative'].tolist(), [10, 15])
+
+    def test_fund_and_training_indicators(self):
+        funds = self.frame('funds', [
+            (1, 'ppcr', 'Roads', 'Bridge', Decimal('100.50'), 'ZMW', True,
+             date(2021, 1, 5)),
+            (2, 'ppcr', 'Roads', 'Bridge', Decimal('99.50'), 'ZMW', False,
+             None),
+            (3, 'ppcr', 'Roads', 'Culvert', Decimal('40'), 'USD', True,
+             None),
+        ])
+        result = analytics.fund_indicators(funds)
+        self.assertEqual(result.loc[('Roads', 'ZMW'), 'amount'], 200)
+        self.assertEqual(
+            result.loc[('Roads', 'ZMW'), 'approved_amount'], 100.5)
+        self.assertEqual(result.loc[('Roads', 'USD'), 'amount'], 40)
+        self.assertEqual(result.loc[('Roads', 'USD'), 'approved_share'], 1)
+
+        trainings = self.frame('trainings', [
+            (1, 'ppcr', 'Roads', 'Bridge', 'Safety', True, None, None),
+            (2, 'ppcr', 'Roads', 'Bridge', 'Safety', None, None, None),
+        ])
+        result = analytics.training_indicators(trainings)
+        self.assertEqual(result.loc['Safety', 'completion_rate'], 0.5)
+
+    @mock.patch('base.analytics.cache_version')
+    @mock.patch('base.analytics.query_frame')
+    def test_frames_are_cached_per_data_version(
+            self, query_frame, cache_version):
+        analytics.clear_frames()
+        self.addCleanup(analytics.clear_frames)
+        cache_version.return_value = 1
+        first = analytics.load_frame('funds')
+        self.assertIs(analytics.load_frame('funds'), first)
+        self.assertEqual(query_frame.call_count, 1)
+
+        cache_version.return_value = 2
+        analytics.load_frame('funds')
+        self.assertEqual(query_frame.call_count, 2)
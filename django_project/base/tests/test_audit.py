@@ -0,0 +1,169 @@
+# coding=utf-8
+import json
+from unittest import mock
+
+from celery.exceptions import SoftTimeLimitExceeded
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError
+from django.test import SimpleTestCase, TestCase, override_settings
+from easyaudit.models import LoginEvent
+from redis.exceptions import RedisError
+
+from base.audit import BufferedAuditBackend
+from base.tasks import flush_audit_events
+
+
+class FakeBuffer(object):
+    """In memory stand in for :class:`base.buffers.RedisBuffer`."""
+
+    def __init__(self, name):
+        self.key = 'buffer:%s' % name
+        self.documents = []
+        self.claims = {}
+        self.claimed = 0
+
+    def push(self, *documents):
+        self.documents.extend(
+            json.dumps(doc, cls=DjangoJSONEncoder) for doc in documents)
+        return len(self.documents)
+
+    def claim(self, batch_size):
+        if not self.documents:
+            return None, []
+        self.claimed += 1
+        claim = '%s:claim:%s' % (self.key, self.claimed)
+        self.claims[claim] = self.documents[:batch_size]
+        del self.documents[:batch_size]
+        return claim, [json.loads(doc) for doc in self.claims[claim]]
+
+    def ack(self, claim):
+        del self.claims[claim]
+
+    def release(self, claim, target=None):
+        documents = self.claims.pop(claim)
+        if target is None:
+            self.documents[:0] = documents
+        else:
+            target.documents.extend(documents)
+        return len(documents)
+
+    def recover(self, timeout=None):
+        return sum(self.release(claim) for claim in list(self.claims))
+
+    def __len__(self):
+        return len(self.documents)
+
+
+def login_info(username):
+    return {
+        'login_type': LoginEvent.LOGIN,
+        'username': username,
+        'remote_ip': '127.0.0.1',
+        'datetime': '2021-01-04T06:31:00+00:00',
+    }
+
+
+class BufferTestMixin(object):
+    def setUp(self):
+        self.buffer = FakeBuffer('audit-events')
+        self.failed = FakeBuffer('audit-events-failed')
+        for target, buffer in (('base.audit.audit_buffer', self.buffer),
+                               ('base.tasks.audit.audit_buffer', self.buffer),
+                               ('base.tasks.audit.audit_failed_buffer',
+                                self.failed)):
+            patcher = mock.patch(target, buffer)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+@override_settings(AUDIT_BUFFER_BATCH_SIZE=3, AUDIT_BUFFER_MAX_LENGTH=4)
+class BackendTests(BufferTestMixin, SimpleTestCase):
+    def setUp(self):
+        super(BackendTests, self).setUp()
+        patcher = mock.patch('base.tasks.flush_audit_events')
+        self.flush = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.backend = BufferedAuditBackend()
+
+    def test_first_event_schedules_a_flush(self):
+        self.backend.login(login_info('alice'))
+        self.assertEqual(len(self.buffer), 1)
+        self.flush.apply_async.assert_called_once_with(countdown=10)
+        self.flush.delay.assert_not_called()
+
+    def test_full_batch_is_flushed_now(self):
+        for _ in range(3):
+            self.backend.login(login_info('alice'))
+        self.flush.apply_async.assert_called_once_with(countdown=10)
+        self.flush.delay.assert_called_once_with()
+
+    def test_long_buffer_is_flushed_inline(self):
+        for _ in range(5):
+            self.backend.login(login_info('alice'))
+        self.flush.assert_called_once_with(max_batches=1)
+
+    @mock.patch('easyaudit.backends.ModelBackend.login')
+    def test_redis_unavailable(self, login):
+        with mock.patch.object(self.buffer, 'push', side_effect=RedisError):
+            self.backend.login(login_info('alice'))
+        login.assert_called_once_with(login_info('alice'))
+        self.flush.apply_async.assert_not_called()
+
+
+@override_settings(AUDIT_BUFFER_BATCH_SIZE=2)
+class FlushTests(BufferTestMixin, TestCase):
+    def test_events_are_written(self):
+        for username in ('alice', 'bob', 'carol'):
+            self.buffer.push({'kind': 'login', 'info': login_info(username)})
+        self.assertEqual(flush_audit_events(), 3)
+        self.assertEqual(
+            sorted(LoginEvent.objects.values_list('username', flat=True)),
+            ['alice', 'bob', 'carol'])
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(self.buffer.claims, {})
+
+    def test_max_batches(self):
+        for username in ('alice', 'bob', 'carol'):
+            self.buffer.push({'kind': 'login', 'info': login_info(username)})
+        self.assertEqual(flush_audit_events(max_batches=1), 2)
+        self.assertEqual(len(self.buffer), 1)
+
+    def test_failed_batch_is_kept(self):
+        self.buffer.push({'kind': 'login', 'info': login_info('alice')})
+        with mock.patch.object(
+                LoginEvent.objects, 'bulk_create',
+                side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                flush_audit_events()
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(len(self.failed), 1)
+        self.assertFalse(LoginEvent.objects.exists())
+
+        self.assertEqual(flush_audit_events(failed=True), 1)
+        self.assertEqual(len(self.failed), 0)
+        self.assertTrue(LoginEvent.objects.filter(username='alice').exists())
+
+    def test_unacknowledged_batch_is_recovered(self):
+        self.buffer.push({'kind': 'login', 'info': login_info('alice')})
+        self.buffer.claim(2)
+        self.assertEqual(flush_audit_events(), 1)
+        self.assertEqual(self.buffer.claims, {})
+
+    @mock.patch('base.tasks.audit.flush_audit_events.delay')
+    def test_flush_hands_over_after_its_run_time(self, delay):
+        self.buffer.push({'kind': 'login', 'info': login_info('alice')})
+        with override_settings(AUDIT_BUFFER_RUN_SECONDS=-1):
+            self.assertEqual(flush_audit_events(), 0)
+        self.assertEqual(len(self.buffer), 1)
+        delay.assert_called_once_with(failed=False)
+
+    @mock.patch('base.tasks.audit.flush_audit_events.delay')
+    def test_batch_is_put_back_at_the_time_limit(self, delay):
+        self.buffer.push({'kind': 'login', 'info': login_info('alice')})
+        with mock.patch.object(
+                LoginEvent.objects, 'bulk_create',
+                side_effect=SoftTimeLimitExceeded):
+            self.assertEqual(flush_audit_events(), 0)
+        self.assertEqual((len(self.buffer), self.buffer.claims), (1, {}))
+        self.assertEqual(len(self.failed), 0)
+        delay.assert_called_once_with(failed=False)
@@ -0,0 +1,90 @@
+# coding=utf-8
+from datetime import date
+
+from django.contrib.gis.geos import MultiPolygon, Point, Polygon
+from django.test import TestCase
+from django.urls import reverse
+
+from base import boundaries, counters, sms
+from base.models import (
+    AdminBoundary,
+    SimplifiedBoundary,
+    Survey,
+    SurveyQuestion,
+    SurveyResponse,
+)
+
+
+def square(x, y, size=1):
+    return MultiPolygon(Polygon.from_bbox(
+        (x, y, x + size, y + size)), srid=4326)
+
+
+class BoundaryTests(TestCase):
+    def setUp(self):
+        self.province = AdminBoundary.objects.create(
+            level=AdminBoundary.PROVINCE, name='Western', code='W',
+            geom=square(22, -17, 2))
+        for name, x in (('Mongu', 22), ('Kalabo', 23)):
+            AdminBoundary.objects.create(
+                level=AdminBoundary.DISTRICT, name=name, code=name[:3],
+                parent=self.province, geom=square(x, -17))
+        self.survey = Survey.objects.create(name='Floods', keyword='FLOOD')
+        SurveyQuestion.objects.create(
+            survey=self.survey, position=1, code='affected',
+            text='Affected?', options=['YES', 'NO'])
+
+    def test_districts_of_points(self):
+        self.assertEqual(
+            boundaries.districts_of_points(
+                [(22.5, -16.5), None, (23.5, -16.5), (30, -10)]),
+            ['Mongu', '', 'Kalabo', ''])
+
+    def test_simplify(self):
+        self.assertEqual(boundaries.simplify_boundaries(zooms=[4, 8]), 6)
+        self.assertEqual(
+            [item.boundary.name
+             for item in boundaries.simplified_boundaries('district', 9)],
+            ['Kalabo', 'Mongu'])
+        self.assertEqual(
+            set(SimplifiedBoundary.objects.values_list('zoom', flat=True)),
+            {4, 8})
+
+    def test_ingest_locates_messages(self):
+        sms.ingest([sms.normalize_message({
+            'id': '1', 'from': '+260971', 'text': 'FLOOD yes',
+            'timestamp': '2021-06-01T10:00:00Z',
+            'lat': '-16.5', 'lon': '23.5'})])
+        self.assertEqual(SurveyResponse.objects.get().district, 'Kalabo')
+        self.assertEqual(
+            dict(counters.by_district(self.survey.pk)), {'Kalabo': 1})
+
+    def test_assign_responses_rebuilds_counters(self):
+        sms.ingest([sms.normalize_message({
+            'id': '1', 'from': '+260971', 'text': 'FLOOD yes',
+            'timestamp': '2021-06-01T10:00:00Z'})])
+        SurveyResponse.objects.update(location=Point(22.5, -16.5, srid=4326))
+        self.assertEqual(boundaries.assign_responses(), 1)
+        self.assertEqual(
+            dict(counters.by_district(self.survey.pk)), {'Mongu': 1})
+        self.assertEqual(
+            SurveyResponse.objects.within(self.province).count(), 1)
+        self.assertEqual(boundaries.assign_responses(), 0)
+
+    def test_choropleth_api(self):
+        boundaries.simplify_boundaries()
+        sms.ingest([sms.normalize_message({
+            'id': '1', 'from': '+260971', 'text': 'FLOOD yes',
+            'timestamp': '2021-06-01T10:00:00Z', 'district': 'Mongu'})])
+        response = self.client.get(reverse('boundaries'), {
+            'zoom': 7, 'survey': self.survey.pk,
+            'start': date(2021, 6, 1).isoformat()})
+        self.assertEqual(response.status_code, 200)
+        features = response.json()['features']
+        self.assertEqual(
+            [(feature['properties']['name'],
+              feature['properties']['responses']) for feature in features],
+            [('Kalabo', 0), ('Mongu', 1)])
+        self.assertEqual(features[0]['geometry']['type'], 'MultiPolygon')
+        self.assertEqual(self.client.get(
+            reverse('boundaries'), {'level': 'ward'}).status_code, 400)
@@ -0,0 +1,49 @@
+# coding=utf-8
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import SimpleTestCase
+
+from base.cache import TRALARD_NAMESPACE, bump_cache_version, cache_version
+
+FRAGMENT = Template(
+    '{% load cache cache_tags %}'
+    '{% cache_version "tralard" as tralard_version %}'
+    '{% cache 60 fragment tralard_version %}{{ value }}{% endcache %}')
+
+
+class CacheVersionTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def render(self, value):
+        return FRAGMENT.render(Context({'value': value}))
+
+    def test_version_is_stable_until_bumped(self):
+        version = cache_version(TRALARD_NAMESPACE)
+        self.assertEqual(cache_version(TRALARD_NAMESPACE), version)
+        bump_cache_version(TRALARD_NAMESPACE)
+        self.assertEqual(cache_version(TRALARD_NAMESPACE), version + 1)
+
+    def test_bump_before_any_read(self):
+        bump_cache_version(TRALARD_NAMESPACE)
+        version = cache_version(TRALARD_NAMESPACE)
+        bump_cache_version(TRALARD_NAMESPACE)
+        self.assertEqual(cache_version(TRALARD_NAMESPACE), version + 1)
+
+    def test_lost_version_does_not_revive_old_fragments(self):
+        version = cache_version(TRALARD_NAMESPACE)
+        cache.delete('cache-version:%s' % TRALARD_NAMESPACE)
+        self.assertGreaterEqual(cache_version(TRALARD_NAMESPACE), version)
+
+    def test_bump_invalidates_cached_fragments(self):
+        self.assertEqual(self.render('first'), 'first')
+        self.assertEqual(self.render('second'), 'first')
+        bump_cache_version(TRALARD_NAMESPACE)
+        self.assertEqual(self.render('second'), 'second')
+        self.assertEqual(self.render('third'), 'second')
+
+    def test_other_namespaces_are_kept(self):
+        self.assertEqual(self.render('first'), 'first')
+        bump_cache_version('reports')
+        self.assertEqual(self.render('second'), 'first')
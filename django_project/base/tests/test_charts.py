@@ -0,0 +1,86 @@
+# coding=utf-8
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from base import charts
+from base.models import ReportChart
+from base.tasks import render_report_charts
+
+
+class FakeChart(object):
+    def __init__(self, spec):
+        self.spec = spec
+        self.pages = 0
+
+    def to_dict(self):
+        return self.spec
+
+    def save(self, output, format):
+        self.pages += 1
+        output.write('<html>%s</html>' % self.spec)
+
+
+class ChartTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        patcher = override_settings(MEDIA_ROOT=self.media_root)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        self.version = 1
+        for target, value in (
+                ('base.charts.cache_version', lambda _: self.version),
+                ('base.charts.schedule_render', mock.DEFAULT),
+                ('base.analytics.indicator_report', mock.DEFAULT)):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_save_chart_is_content_addressed(self):
+        chart = FakeChart({'mark': 'bar'})
+        spec_path, html_path = charts.save_chart('charts/x', 'funds', chart)
+        self.assertRegex(spec_path, r'^charts/x/funds\.[0-9a-f]{16}\.json$')
+        self.assertEqual(html_path, spec_path[:-4] + 'html')
+        self.assertTrue(
+            os.path.exists(os.path.join(self.media_root, html_path)))
+
+        self.assertEqual(
+            charts.save_chart('charts/x', 'funds', chart),
+            (spec_path, html_path))
+        self.assertEqual(chart.pages, 1)
+        self.assertNotEqual(
+            charts.save_chart('charts/x', 'funds', FakeChart({'mark': 'x'})),
+            (spec_path, html_path))
+
+    @mock.patch('base.charts.build_charts')
+    def test_render_only_when_the_data_changed(self, build_charts):
+        build_charts.side_effect = lambda tables: {
+            'funds': FakeChart({'version': self.version})}
+        self.assertTrue(charts.render_charts('ppcr'))
+        self.assertFalse(charts.render_charts('ppcr'))
+        first = ReportChart.objects.get(project_slug='ppcr')
+
+        self.version = 2
+        self.assertEqual(charts.project_charts('ppcr'), ([first], False))
+        self.assertTrue(charts.render_charts('ppcr'))
+        chart = ReportChart.objects.get(project_slug='ppcr')
+        self.assertEqual(chart.data_version, 2)
+        self.assertNotEqual(chart.spec_path, first.spec_path)
+        self.assertEqual(build_charts.call_count, 2)
+        self.assertEqual(charts.project_charts('ppcr'), ([chart], True))
+
+    @mock.patch('base.tasks.charts.render_charts', return_value=True)
+    @mock.patch('base.tasks.charts.report_projects', return_value=['', 'ppcr'])
+    def test_one_task_per_report(self, report_projects, render_charts):
+        with mock.patch.object(render_report_charts, 'delay') as delay:
+            self.assertEqual(render_report_charts(force=True), 2)
+        self.assertEqual(
+            [call[0][0] for call in delay.call_args_list], ['', 'ppcr'])
+        render_charts.assert_not_called()
+
+        self.assertEqual(render_report_charts('ppcr'), 1)
+        render_charts.assert_called_once_with('ppcr', force=False)
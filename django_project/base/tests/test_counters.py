@@ -0,0 +1,118 @@
+# coding=utf-8
+from datetime import date, datetime
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from base import counters, sms
+from base.models import (
+    Survey,
+    SurveyAnswerCounter,
+    SurveyQuestion,
+    SurveyResponse,
+)
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        self.survey = Survey.objects.create(name='Floods', keyword='FLOOD')
+        SurveyQuestion.objects.create(
+            survey=self.survey, position=1, code='affected',
+            text='Affected?', options=['YES', 'NO'])
+        SurveyQuestion.objects.create(
+            survey=self.survey, position=2, code='households',
+            text='How many?')
+
+    def ingest(self, message_id, text, timestamp, district=''):
+        return sms.ingest([sms.normalize_message({
+            'id': message_id, 'from': '+260971', 'text': text,
+            'timestamp': timestamp, 'district': district})])
+
+    def ingest_sample(self):
+        self.ingest('1', 'FLOOD yes 3', '2021-06-01T10:00:00Z', 'Mongu')
+        self.ingest('2', 'FLOOD no', '2021-06-01T23:30:00Z', 'Mongu')
+        self.ingest('3', 'FLOOD yes', '2021-06-02T08:00:00+02:00', 'Kalabo')
+        # Retried delivery, counted once.
+        self.ingest('3', 'FLOOD yes', '2021-06-02T08:00:00+02:00', 'Kalabo')
+
+    def test_increments(self):
+        response = SurveyResponse(
+            survey=self.survey, answers={'affected': 'YES'},
+            received=datetime(2021, 6, 1, 23, tzinfo=timezone.utc))
+        self.assertEqual(counters.increments([response, response]), {
+            (self.survey.pk, '', '', '', date(2021, 6, 1)): 2,
+            (self.survey.pk, 'affected', 'YES', '', date(2021, 6, 1)): 2,
+        })
+
+    def test_ingest_updates_counters(self):
+        self.ingest_sample()
+        self.assertEqual(counters.results(self.survey.pk), {
+            'responses': 3,
+            'questions': {
+                'affected': {'YES': 2, 'NO': 1},
+                'households': {'3': 1},
+            },
+        })
+        self.assertEqual(
+            counters.daily(self.survey.pk),
+            [(date(2021, 6, 1), 2), (date(2021, 6, 2), 1)])
+        self.assertEqual(
+            counters.daily(self.survey.pk, 'affected', 'YES'),
+            [(date(2021, 6, 1), 1), (date(2021, 6, 2), 1)])
+        self.assertEqual(
+            dict(counters.by_district(self.survey.pk)),
+            {'Kalabo': 1, 'Mongu': 2})
+        self.assertEqual(
+            counters.results(
+                self.survey.pk, start=date(2021, 6, 2))['responses'], 1)
+        self.assertEqual(
+            counters.totals([self.survey.pk]), {self.survey.pk: 3})
+
+    def test_rebuild_matches_incremental_counts(self):
+        self.ingest_sample()
+        expected = sorted(SurveyAnswerCounter.objects.values_list(
+            'survey_id', 'question', 'answer', 'district', 'day', 'count'))
+        SurveyAnswerCounter.objects.update(count=0)
+        counters.rebuild()
+        self.assertEqual(sorted(SurveyAnswerCounter.objects.values_list(
+            'survey_id', 'question', 'answer', 'district', 'day', 'count')),
+            expected)
+
+    def test_rebuild_since(self):
+        self.ingest_sample()
+        SurveyResponse.objects.filter(district='Kalabo').update(
+            district='Mongu')
+        counters.rebuild(since=date(2021, 6, 2))
+        self.assertEqual(
+            dict(counters.by_district(self.survey.pk)), {'Mongu': 3})
+
+    def test_api(self):
+        self.ingest_sample()
+        response = self.client.get(
+            reverse('survey-results', kwargs={'pk': self.survey.pk}),
+            {'district': 'Mongu'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['responses'], 2)
+        self.assertEqual(
+            response.json()['questions']['affected'], {'YES': 1, 'NO': 1})
+
+        response = self.client.get(
+            reverse('survey-results-daily', kwargs={'pk': self.survey.pk}),
+            {'question': 'affected', 'answer': 'yes', 'start': '2021-06-02'})
+        self.assertEqual(response.json(), [{'day': '2021-06-02', 'count': 1}])
+
+        response = self.client.get(
+            reverse('survey-results-districts',
+                    kwargs={'pk': self.survey.pk}))
+        self.assertEqual(response.json(), [
+            {'district': 'Kalabo', 'count': 1},
+            {'district': 'Mongu', 'count': 2}])
+
+    def test_api_errors(self):
+        url = reverse('survey-results', kwargs={'pk': self.survey.pk})
+        self.assertEqual(
+            self.client.get(url, {'start': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse(
+            'survey-results', kwargs={'pk': self.survey.pk + 1})).status_code,
+            404)
@@ -0,0 +1,104 @@
+# coding=utf-8
+from django.db.models import Q
+from django.http import QueryDict
+from django.test import SimpleTestCase
+
+from base.datatables import Column, DataTablesQuery, parse_nested
+
+COLUMNS = [
+    Column('name'),
+    Column('sub_project', field='sub_project__name'),
+    Column('registered_date', searchable=False),
+]
+
+
+def make_query(query_string):
+    return DataTablesQuery(QueryDict(query_string), COLUMNS)
+
+
+class DataTablesQueryTests(SimpleTestCase):
+    def test_parse_nested(self):
+        params = QueryDict(
+            'searchBuilder[logic]=AND'
+            '&searchBuilder[criteria][0][condition]=starts'
+            '&searchBuilder[criteria][0][value][]=ab'
+            '&searchBuilder[criteria][1][logic]=OR')
+        self.assertEqual(parse_nested(params, 'searchBuilder'), {
+            'logic': 'AND',
+            'criteria': [
+                {'condition': 'starts', 'value': ['ab']},
+                {'logic': 'OR'},
+            ],
+        })
+
+    def test_paging_is_bounded(self):
+        query = make_query('draw=3&start=20&length=-1')
+        self.assertEqual(query.draw, 3)
+        self.assertEqual(query.start, 20)
+        self.assertEqual(query.length, 500)
+
+    def test_ordering_ends_with_primary_key(self):
+        query = make_query(
+            'columns[0][data]=name&columns[1][data]=sub_project'
+            '&order[0][column]=1&order[0][dir]=desc')
+        self.assertEqual(
+            query.ordering(), [('sub_project__name', True), ('pk', True)])
+
+    def test_search_only_uses_searchable_columns(self):
+        query = make_query(
+            'search[value]=jo&columns[0][data]=name'
+            '&columns[2][data]=registered_date'
+            '&columns[2][search][value]=2020')
+        expected = Q(name__istartswith='jo')
+        expected |= Q(sub_project__name__istartswith='jo')
+        self.assertEqual(query.search_filter(), expected)
+
+    def test_search_builder(self):
+        query = make_query(
+            'searchBuilder[logic]=OR'
+            '&searchBuilder[criteria][0][origData]=name'
+            '&searchBuilder[criteria][0][condition]=!contains'
+            '&searchBuilder[criteria][0][value][]=farm'
+            '&searchBuilder[criteria][1][origData]=sub_project'
+            '&searchBuilder[criteria][1][condition]=null')
+        expected = ~Q(name__icontains='farm')
+        expected |= Q(sub_project__name__isnull=True)
+        self.assertEqual(query.search_builder_filter(), expected)
+
+    def test_keyset_filter(self):
+        query = make_query('')
+        condition = query.keyset_filter(
+            [('name', False), ('pk', False)], ['bee', 7])
+        self.assertEqual(
+            condition,
+            Q(name__gt='bee') | (Q(name='bee') & Q(pk__gt=7)))
+
+    def test_cursor_only_applies_to_the_next_page(self):
+        class Row(object):
+            pk = 7
+            name = 'bee'
+
+        ordering = [('name', False), ('pk', False)]
+        cursor = make_query('start=0&length=10').encode_cursor(
+            Row(), ordering)
+
+        next_page = make_query('start=10&length=10&after=%s' % cursor)
+        self.assertEqual(next_page.decode_cursor(ordering), ['bee', 7])
+
+        jump = make_query('start=30&length=10&after=%s' % cursor)
+        self.assertIsNone(jump.decode_cursor(ordering))
+
+    def test_cursor_survives_a_page_length_change(self):
+        class Row(object):
+            pk = 7
+            name = 'bee'
+
+        ordering = [('name', False), ('pk', False)]
+        cursor = make_query('start=0&length=10').encode_cursor(
+            Row(), ordering)
+
+        longer = make_query('start=10&length=25&after=%s' % cursor)
+        self.assertEqual(longer.decode_cursor(ordering), ['bee', 7])
+
+        skipped = make_query('start=25&length=25&after=%s' % cursor)
+        self.assertIsNone(skipped.decode_cursor(ordering))
@@ -0,0 +1,75 @@
+# coding=utf-8
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from base import db
+from core.settings.utils import database_config
+
+
+class DatabaseConfigTests(SimpleTestCase):
+    def test_direct_connection(self):
+        config = database_config({
+            'DATABASE_HOST': 'db', 'DATABASE_CONN_MAX_AGE': '0'})
+        self.assertEqual(config['HOST'], 'db')
+        self.assertEqual(config['PORT'], 5432)
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertNotIn('DISABLE_SERVER_SIDE_CURSORS', config)
+
+    def test_pgbouncer(self):
+        config = database_config({
+            'DATABASE_HOST': 'pgbouncer', 'DATABASE_POOLER': 'pgbouncer'})
+        self.assertEqual(config['PORT'], 6432)
+        self.assertEqual(config['CONN_MAX_AGE'], 60)
+        self.assertTrue(config['DISABLE_SERVER_SIDE_CURSORS'])
+
+
+def fake_connection(last_used, usable=True):
+    connection = mock.Mock(alias='default', last_used=last_used)
+    connection.is_usable.return_value = usable
+    return connection
+
+
+@override_settings(DATABASE_HEALTH_CHECK_AFTER=30)
+@mock.patch('base.db.record_metric')
+@mock.patch('base.db.time.monotonic', return_value=100.0)
+class CheckConnectionsTests(SimpleTestCase):
+    def check(self, *connections):
+        with mock.patch('base.db.connections') as handler:
+            handler.all.return_value = connections
+            db.check_connections()
+
+    def test_recently_used_connection_is_not_checked(self, *mocks):
+        connection = fake_connection(last_used=90.0)
+        self.check(connection)
+        connection.is_usable.assert_not_called()
+
+    def test_idle_connection_is_checked(self, *mocks):
+        connection = fake_connection(last_used=10.0)
+        self.check(connection)
+        connection.is_usable.assert_called_once_with()
+        connection.close.assert_not_called()
+
+    def test_broken_connection_is_closed(self, monotonic, record_metric):
+        connection = fake_connection(last_used=10.0, usable=False)
+        self.check(connection)
+        connection.close.assert_called_once_with()
+        record_metric.assert_called_with('reconnects')
+
+
+@override_settings(DATABASE_METRICS_TIMEOUT=60)
+@mock.patch('base.db.cache')
+class RecordMetricTests(SimpleTestCase):
+    def test_first_increment_sets_the_expiry(self, cache):
+        cache.add.return_value = True
+        db.record_metric('reconnects')
+        key = db._metrics_key('reconnects')
+        cache.add.assert_called_once_with(key, 1, timeout=60)
+        cache.incr.assert_not_called()
+
+    def test_increment_refreshes_the_expiry(self, cache):
+        cache.add.return_value = False
+        db.record_metric('reconnects')
+        key = db._metrics_key('reconnects')
+        cache.incr.assert_called_once_with(key)
+        cache.touch.assert_called_once_with(key, 60)
@@ -0,0 +1,84 @@
+# coding=utf-8
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import include, path
+from rest_framework import viewsets
+from rest_framework.routers import SimpleRouter
+
+from base import edge_cache, signals
+from base.tasks import refresh_edge_cache
+
+
+class ThingViewSet(viewsets.ReadOnlyModelViewSet):
+    pass
+
+
+class ThingStatsViewSet(viewsets.GenericViewSet):
+    def retrieve(self, request, pk=None):
+        pass
+
+
+# Stands for tralard.api_router.
+router = SimpleRouter()
+router.register('things', ThingViewSet, basename='thing')
+router.register(r'things/(?P<thing_pk>\d+)/parts', ThingViewSet,
+                basename='part')
+router.register('thing-stats', ThingStatsViewSet, basename='thing-stats')
+
+urlpatterns = [path('api/v1/test/', include(router.urls))]
+
+
+class EdgeCacheTests(SimpleTestCase):
+    @mock.patch('urllib.request.urlopen')
+    def test_disabled_without_url(self, urlopen):
+        self.assertEqual(edge_cache.refresh(), 0)
+        urlopen.assert_not_called()
+
+    @override_settings(EDGE_CACHE_URL='http://web:8080/')
+    @mock.patch('urllib.request.urlopen')
+    def test_refresh_sends_the_refresh_header(self, urlopen):
+        urlopen.side_effect = [mock.MagicMock(), OSError('refused')]
+        self.assertEqual(edge_cache.refresh(['/api/v1/a/', '/docs/']), 1)
+        request = urlopen.call_args_list[0][0][0]
+        self.assertEqual(request.full_url, 'http://web:8080/api/v1/a/')
+        self.assertEqual(request.get_header('X-cache-refresh'), '1')
+
+    @override_settings(
+        EDGE_CACHE_URL='http://web:8080', EDGE_CACHE_HOST='example.org')
+    @mock.patch('urllib.request.urlopen')
+    def test_refresh_sends_the_public_host(self, urlopen):
+        self.assertEqual(edge_cache.refresh(['/api/v1/a/']), 1)
+        request = urlopen.call_args[0][0]
+        self.assertEqual(request.full_url, 'http://web:8080/api/v1/a/')
+        self.assertEqual(request.get_header('Host'), 'example.org')
+
+    @override_settings(
+        ROOT_URLCONF=__name__, EDGE_CACHE_ROUTER_URLCONF=__name__)
+    def test_listing_paths(self):
+        self.assertEqual(edge_cache.listing_paths(), ['/api/v1/test/things/'])
+        self.assertEqual(edge_cache.listing_paths('base.missing'), [])
+
+    @override_settings(
+        EDGE_CACHE_URL='http://web:8080', ROOT_URLCONF=__name__,
+        EDGE_CACHE_ROUTER_URLCONF=__name__)
+    @mock.patch('urllib.request.urlopen')
+    @mock.patch('base.charts.schedule_render')
+    @mock.patch('base.cache.bump_cache_version')
+    def test_tralard_write_refreshes_the_listings(
+            self, bump, schedule_render, urlopen):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        sender = SimpleNamespace(_meta=SimpleNamespace(app_label='tralard'))
+        with mock.patch(
+                'base.signals.transaction.on_commit',
+                side_effect=lambda callback: callback()), \
+                mock.patch.object(
+                    refresh_edge_cache, 'apply_async',
+                    side_effect=lambda **options: refresh_edge_cache()):
+            signals.tralard_changed(sender)
+        self.assertEqual(
+            [call[0][0].full_url for call in urlopen.call_args_list],
+            ['http://web:8080/api/v1/test/things/'])
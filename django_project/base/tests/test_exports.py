@@ -0,0 +1,156 @@
+# coding=utf-8
+import datetime
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.http import Http404
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from base.exports import ExportColumn, cell_value, csv_lines, write_xlsx
+from base.models import ExportJob
+from base.tasks import prune_export_jobs, run_export_job
+from base.views.exports import ExportView
+
+COLUMNS = [
+    ExportColumn('Name', 'name'),
+    ExportColumn('SubProject', 'sub_project__name'),
+    ExportColumn('Total', format=lambda obj: obj.total * 2),
+]
+
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class ExportTests(SimpleTestCase):
+    def test_column_follows_relations(self):
+        obj = Obj(name='Bee', sub_project=Obj(name='Honey'), total=2)
+        self.assertEqual(
+            [column.value(obj) for column in COLUMNS], ['Bee', 'Honey', 4])
+
+    def test_column_stops_at_missing_relation(self):
+        obj = Obj(name='Bee', sub_project=None, total=2)
+        self.assertIsNone(COLUMNS[1].value(obj))
+
+    @override_settings(USE_TZ=True, TIME_ZONE='Africa/Lusaka')
+    def test_cell_value(self):
+        aware = timezone.make_aware(datetime.datetime(2021, 3, 1, 12))
+        self.assertEqual(
+            cell_value(aware), datetime.datetime(2021, 3, 1, 12))
+        self.assertEqual(
+            cell_value(Obj(amount=Decimal('1.50'), currency='ZMW')),
+            Decimal('1.50'))
+        self.assertEqual(cell_value(Obj), str(Obj))
+        self.assertIs(cell_value(True), True)
+
+    def test_csv_lines(self):
+        lines = csv_lines(COLUMNS, iter([['Bee, Ltd', None, 4]]))
+        self.assertEqual(next(lines), 'Name,SubProject,Total\r\n')
+        self.assertEqual(next(lines), '"Bee, Ltd",,4\r\n')
+        self.assertEqual(list(lines), [])
+
+    def test_write_xlsx(self):
+        from openpyxl import load_workbook
+
+        output = write_xlsx(
+            COLUMNS, iter([['Bee', 'Honey', 4], ['Ant', None, 2]]),
+            title='Beneficiary List')
+        sheet = load_workbook(output)['Beneficiary List']
+        self.assertEqual(
+            [list(row) for row in sheet.iter_rows(values_only=True)],
+            [['Name', 'SubProject', 'Total'],
+             ['Bee', 'Honey', 4],
+             ['Ant', None, 2]])
+        output.close()
+
+
+class ExportJobTests(SimpleTestCase):
+    def test_progress(self):
+        job = ExportJob(status=ExportJob.RUNNING, rows_written=50)
+        self.assertEqual(job.progress, 0)
+        job.rows_total = 200
+        self.assertEqual(job.progress, 25)
+        job.rows_written = 200
+        self.assertEqual(job.progress, 99)
+        job.status = ExportJob.DONE
+        self.assertEqual(job.progress, 100)
+
+    @override_settings(REPORTS_ROOT='/tmp/reports')
+    def test_path(self):
+        self.assertIsNone(ExportJob().path)
+        self.assertEqual(
+            ExportJob(filename='3-FundList.csv').path,
+            '/tmp/reports/3-FundList.csv')
+
+
+class UserExportView(ExportView):
+    name = 'users'
+    columns = [ExportColumn('Username', 'username')]
+    title = 'User List'
+
+    def get_queryset(self):
+        if self.kwargs.get('missing'):
+            raise Http404
+        return get_user_model().objects.order_by('pk')
+
+
+@mock.patch.dict('base.views.exports.EXPORT_VIEWS', users=UserExportView)
+class ExportTaskTests(TestCase):
+    def setUp(self):
+        self.reports_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.reports_root)
+        patcher = override_settings(REPORTS_ROOT=self.reports_root)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        self.user = get_user_model().objects.create_user('alice')
+
+    def job(self, **parameters):
+        return ExportJob.objects.create(
+            user=self.user, export='users', export_format='csv',
+            parameters=parameters)
+
+    def test_job_is_written_once(self):
+        job = self.job()
+        run_export_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.DONE)
+        self.assertEqual((job.rows_total, job.rows_written), (1, 1))
+        with open(job.path, encoding='utf-8') as artifact:
+            self.assertEqual(artifact.read(), 'Username\r\nalice\r\n')
+
+        finished = job.finished
+        run_export_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.finished, finished)
+
+    def test_failing_queryset_fails_the_job(self):
+        job = self.job(missing=True)
+        run_export_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.FAILED)
+        self.assertEqual(job.error, 'Http404')
+        self.assertEqual(os.listdir(self.reports_root), [])
+
+    def test_killed_jobs_are_failed(self):
+        job = self.job()
+        ExportJob.objects.filter(pk=job.pk).update(
+            status=ExportJob.RUNNING,
+            started=timezone.now() - datetime.timedelta(days=1))
+        partial = os.path.join(self.reports_root, '%s-User.csv.part' % job.pk)
+        open(partial, 'w').close()
+        recent = self.job()
+        ExportJob.objects.filter(pk=recent.pk).update(
+            status=ExportJob.RUNNING, started=timezone.now())
+
+        self.assertEqual(prune_export_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.FAILED)
+        self.assertFalse(os.path.exists(partial))
+        recent.refresh_from_db()
+        self.assertEqual(recent.status, ExportJob.RUNNING)
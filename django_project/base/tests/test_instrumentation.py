@@ -0,0 +1,85 @@
+# coding=utf-8
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from base.cache_backends import InstrumentedLocMemCache
+from base.instrumentation import Recorder, fingerprint, recording
+from base.middleware import InstrumentationMiddleware, QueryBudgetExceeded
+
+
+def run_query(recorder, sql):
+    recorder(lambda *args: None, sql, None, False, {})
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_literals_and_in_lists(self):
+        self.assertEqual(
+            fingerprint(
+                "SELECT * FROM t WHERE a = 12 AND b = 'x''y'\n"
+                "  AND c IN (%s, %s, %s)"),
+            'SELECT * FROM t WHERE a = %s AND b = %s AND c IN (...)')
+        self.assertEqual(
+            fingerprint('SELECT 1 FROM t WHERE id IN (%s)'),
+            fingerprint('SELECT 2 FROM t WHERE id IN (%s, %s)'))
+
+
+class RecorderTests(SimpleTestCase):
+    def test_duplicates(self):
+        recorder = Recorder()
+        for pk in range(3):
+            run_query(recorder, 'SELECT * FROM fund WHERE id = %s' % pk)
+        run_query(recorder, 'SELECT * FROM project')
+        self.assertEqual(recorder.query_count, 4)
+        self.assertEqual(
+            recorder.duplicates, [('SELECT * FROM fund WHERE id = %s', 3)])
+        self.assertEqual(recorder.duplicate_count, 2)
+
+    def test_cache_hits(self):
+        cache = InstrumentedLocMemCache('instrumentation-test', {})
+        cache.set('a', 1)
+        with recording(Recorder()) as recorder:
+            self.assertEqual(cache.get('a'), 1)
+            self.assertEqual(cache.get('b', 'default'), 'default')
+            cache.get_many(['a', 'b', 'c'])
+        self.assertEqual(recorder.cache_hits, 2)
+        self.assertEqual(recorder.cache_misses, 3)
+        self.assertEqual(recorder.cache_hit_ratio, 0.4)
+
+    def test_template_time_counts_outer_render_only(self):
+        InstrumentationMiddleware(lambda request: None)
+        with recording(Recorder()) as recorder:
+            Template('{{ value }}').render(Context({'value': 1}))
+        self.assertGreater(recorder.template_time, 0)
+        self.assertEqual(recorder.template_depth, 0)
+
+
+def view_running(count):
+    def view(request):
+        for _ in range(count):
+            run_query(request.instrumentation, 'SELECT * FROM fund')
+        return HttpResponse()
+    return view
+
+
+@override_settings(QUERY_BUDGETS={'/dashboard/': 2})
+class MiddlewareTests(SimpleTestCase):
+    def request(self, count):
+        middleware = InstrumentationMiddleware(view_running(count))
+        return middleware(RequestFactory().get('/dashboard/'))
+
+    @override_settings(DEBUG=True)
+    def test_headers_in_debug(self):
+        response = self.request(2)
+        self.assertEqual(response['X-Query-Count'], '2')
+        self.assertEqual(response['X-Duplicate-Query-Count'], '1')
+
+    @override_settings(QUERY_BUDGETS_STRICT=True)
+    def test_budget_is_enforced(self):
+        self.request(2)
+        with self.assertRaises(QueryBudgetExceeded):
+            self.request(3)
+
+    @override_settings(QUERY_BUDGETS_STRICT=False)
+    def test_budget_is_only_logged_otherwise(self):
+        self.assertEqual(self.request(3).status_code, 200)
@@ -0,0 +1,105 @@
+# coding=utf-8
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from base import maintenance
+from base.maptiles import tiles_covering
+from base.tasks import clear_media_temp_files, refresh_rollups
+
+
+class PeriodicTaskTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    @mock.patch('base.rollups.refresh_all', return_value=3)
+    def test_run_is_recorded(self, refresh_all):
+        self.assertEqual(refresh_rollups(), 3)
+        metrics = maintenance.run_metrics('base.refresh_rollups')
+        self.assertEqual(metrics['runs'], 1)
+        self.assertEqual(metrics['failures'], 0)
+        self.assertEqual(metrics['last_status'], 'success')
+
+    @mock.patch('base.rollups.refresh_all', side_effect=RuntimeError)
+    def test_failure_is_recorded(self, refresh_all):
+        with self.assertRaises(RuntimeError):
+            refresh_rollups()
+        metrics = maintenance.run_metrics('base.refresh_rollups')
+        self.assertEqual(metrics['failures'], 1)
+        self.assertEqual(metrics['last_status'], 'failure')
+        with maintenance.run_lock('base.refresh_rollups', 60) as acquired:
+            self.assertTrue(acquired)
+
+    @mock.patch('base.rollups.refresh_all', return_value=3)
+    def test_overlapping_run_is_skipped(self, refresh_all):
+        with maintenance.run_lock('base.refresh_rollups', 60):
+            self.assertIsNone(refresh_rollups())
+        refresh_all.assert_not_called()
+        self.assertEqual(
+            maintenance.run_metrics('base.refresh_rollups')['skipped'], 1)
+
+    @mock.patch('base.rollups.refresh_all', return_value=3)
+    def test_beat_messages_are_delayed(self, refresh_all):
+        with mock.patch.object(refresh_rollups, 'apply_async') as send:
+            refresh_rollups.push_request(called_directly=False)
+            try:
+                self.assertIsNone(refresh_rollups())
+            finally:
+                refresh_rollups.pop_request()
+        refresh_all.assert_not_called()
+        countdown = send.call_args[1]['countdown']
+        self.assertTrue(0 <= countdown <= 5 * 60)
+
+        refresh_rollups.push_request(
+            called_directly=False, eta='2021-01-04T06:31:00')
+        try:
+            self.assertEqual(refresh_rollups(), 3)
+        finally:
+            refresh_rollups.pop_request()
+
+
+class MaintenanceTests(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        patcher = override_settings(MEDIA_ROOT=self.media_root)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+    def touch(self, relative_path, age_hours):
+        path = os.path.join(self.media_root, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'w').close()
+        mtime = time.time() - age_hours * 60 * 60
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_clear_temp_files(self):
+        old = self.touch('temp/upload/old.csv', 30)
+        recent = self.touch('temp/recent.csv', 1)
+        kept = self.touch('uploads/old.png', 30)
+        self.assertEqual(clear_media_temp_files(), 1)
+        self.assertFalse(os.path.exists(old))
+        self.assertFalse(os.path.exists(os.path.dirname(old)))
+        self.assertTrue(os.path.exists(recent))
+        self.assertTrue(os.path.exists(kept))
+
+    def test_missing_temp_directory(self):
+        self.assertEqual(maintenance.clear_temp_files(), 0)
+
+    def test_tiles_covering(self):
+        zambia = (21.99, -18.08, 33.71, -8.22)
+        self.assertEqual(tiles_covering(zambia, 0), [(0, 0)])
+        self.assertEqual(tiles_covering(zambia, 4), [(8, 8), (9, 8)])
+        self.assertEqual(
+            tiles_covering(zambia, 5),
+            [(17, 16), (17, 17), (18, 16), (18, 17)])
+        self.assertEqual(
+            tiles_covering((-180, -90, 180, 90), 1),
+            [(0, 0), (0, 1), (1, 0), (1, 1)])
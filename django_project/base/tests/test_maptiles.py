@@ -0,0 +1,64 @@
+# coding=utf-8
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from base import maptiles
+
+SOURCE = ('tralard_beneficiary', 'location', 4326, ['id', 'name'])
+
+
+@mock.patch('base.maptiles.layer_source', return_value=SOURCE)
+class TileSqlTests(SimpleTestCase):
+    def test_low_zooms_are_clustered(self, layer_source):
+        sql = maptiles.tile_sql('beneficiaries', 5)
+        self.assertIn('ST_SnapToGrid', sql)
+        self.assertIn('count(*) AS point_count', sql)
+        self.assertNotIn('"name"', sql)
+        self.assertIn('ST_Transform(ST_TileEnvelope(%(z)s, %(x)s, %(y)s), '
+                      '4326)', sql)
+
+    def test_high_zooms_send_points(self, layer_source):
+        sql = maptiles.tile_sql('beneficiaries', 15)
+        self.assertNotIn('ST_SnapToGrid', sql)
+        self.assertIn('source."name"', sql)
+
+    def test_valid_tile(self, layer_source):
+        self.assertTrue(maptiles.valid_tile(0, 0, 0))
+        self.assertTrue(maptiles.valid_tile(3, 7, 7))
+        self.assertFalse(maptiles.valid_tile(3, 8, 0))
+        self.assertFalse(maptiles.valid_tile(30, 0, 0))
+
+
+class TileViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user('mapper'))
+
+    def test_unknown_layer(self):
+        response = self.client.get('/map/tiles/roads/0/0/0.pbf')
+        self.assertEqual(response.status_code, 404)
+
+    @mock.patch('base.maptiles.cache_version', return_value=7)
+    @mock.patch('base.maptiles.render_tile', return_value=b'tile')
+    def test_tiles_are_cached_per_data_version(
+            self, render_tile, cache_version):
+        url = '/map/tiles/beneficiaries/3/4/2.pbf'
+        response = self.client.get(url, {'v': '7'})
+        self.assertEqual(response.content, b'tile')
+        self.assertEqual(
+            response['Content-Type'], 'application/vnd.mapbox-vector-tile')
+        self.assertIn('max-age=86400', response['Cache-Control'])
+        self.client.get(url)
+        self.assertEqual(render_tile.call_count, 1)
+
+        cache_version.return_value = 8
+        response = self.client.get(url, {'v': '7'})
+        self.assertIn('max-age=60', response['Cache-Control'])
+        self.assertEqual(render_tile.call_count, 2)
+
+    def test_out_of_range_tile(self):
+        response = self.client.get('/map/tiles/beneficiaries/1/2/0.pbf')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,104 @@
+# coding=utf-8
+from datetime import datetime, timedelta
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from base import partitions
+from base.models import SmsMessageKey, Survey, SurveyResponse
+
+
+class PartitionNameTests(SimpleTestCase):
+    def test_months(self):
+        date = datetime(2021, 12, 31, 23, 30, tzinfo=timezone.utc)
+        month = partitions.month_start(date)
+        self.assertEqual(month, datetime(2021, 12, 1, tzinfo=timezone.utc))
+        self.assertEqual(
+            partitions.next_month(month),
+            datetime(2022, 1, 1, tzinfo=timezone.utc))
+        self.assertEqual(
+            partitions.partition_name(month),
+            'base_surveyresponse_p2021_12')
+
+
+class PartitionTests(TestCase):
+    def setUp(self):
+        self.survey = Survey.objects.create(name='Floods', keyword='FLOOD')
+
+    def respond(self, message_id, received):
+        return SurveyResponse.objects.create(
+            survey=self.survey, message_id=message_id, sender='+260971',
+            text='FLOOD YES', received=received)
+
+    def partition_of(self, response):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT tableoid::regclass::text FROM base_surveyresponse '
+                'WHERE id = %s', [response.pk])
+            return cursor.fetchone()[0]
+
+    def test_upcoming_months_have_partitions(self):
+        partitions.ensure_partitions(months_ahead=2)
+        current = partitions.month_start(timezone.now())
+        months = partitions.existing_partitions()
+        self.assertIn(current, months)
+        self.assertIn(
+            partitions.next_month(partitions.next_month(current)), months)
+        response = self.respond('1', timezone.now())
+        self.assertEqual(
+            self.partition_of(response), partitions.partition_name(current))
+
+    def test_rows_move_out_of_the_default_partition(self):
+        received = partitions.month_start(
+            timezone.now()) - timedelta(days=400)
+        response = self.respond('1', received)
+        self.assertEqual(
+            self.partition_of(response), partitions.DEFAULT_PARTITION)
+
+        partitions.ensure_partitions(months_ahead=0)
+        self.assertEqual(
+            self.partition_of(response), partitions.partition_name(received))
+        self.assertEqual(
+            SurveyResponse.objects.month(
+                received.year, received.month).count(), 1)
+
+        archived = partitions.archive_partitions(keep_months=6, drop=True)
+        self.assertIn(partitions.partition_name(received), archived)
+        self.assertFalse(SurveyResponse.objects.exists())
+
+    def test_message_ids_before_the_oldest_partition_are_pruned(self):
+        self.assertEqual(partitions.prune_message_keys(), 0)
+        partitions.ensure_partitions(months_ahead=0)
+        SmsMessageKey.objects.bulk_create(
+            [SmsMessageKey(message_id='old'), SmsMessageKey(message_id='new')])
+        SmsMessageKey.objects.filter(message_id='old').update(
+            created=timezone.now() - timedelta(days=400))
+        self.assertEqual(partitions.prune_message_keys(), 1)
+        self.assertEqual(
+            list(SmsMessageKey.objects.values_list('message_id', flat=True)),
+            ['new'])
+
+    def test_late_rows_of_archived_months(self):
+        received = partitions.month_start(
+            timezone.now()) - timedelta(days=400)
+        name = partitions.partition_name(received)
+        self.respond('1', received)
+        partitions.ensure_partitions(months_ahead=0)
+        self.assertIn(name, partitions.archive_partitions(keep_months=6))
+
+        # E.g. a dead letter replayed after its month was archived.
+        late = self.respond('2', received)
+        created = partitions.ensure_partitions(months_ahead=0, keep_months=6)
+        self.assertNotIn(name, created)
+        self.assertEqual(self.partition_of(late), partitions.DEFAULT_PARTITION)
+        self.assertEqual(partitions.archive_partitions(keep_months=6), [])
+
+        # Created again without a keep window, the late rows are merged
+        # into the archived table.
+        self.assertIn(name, partitions.ensure_partitions(months_ahead=0))
+        self.assertIn(name, partitions.archive_partitions(keep_months=6))
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM %s.%s' % (
+                partitions.ARCHIVE_SCHEMA, name))
+            self.assertEqual(cursor.fetchone()[0], 2)
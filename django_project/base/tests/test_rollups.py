@@ -0,0 +1,122 @@
+# coding=utf-8
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from base import signals
+from base.models import DashboardRollup
+from base.rollups import dashboard_totals, refresh_projects
+from base.templatetags.rollup_tags import rollup_for, subcomponent_rollups
+
+
+def _run_now(func):
+    func()
+
+
+class RollupTests(TestCase):
+    def subcomponent(self, pk, project_pk, sub_projects, funds):
+        return DashboardRollup.objects.create(
+            scope=DashboardRollup.SUBCOMPONENT, object_id=pk,
+            project_pk=project_pk, sub_project_count=sub_projects,
+            approved_sub_project_count=1, beneficiary_count=10,
+            total_fund=Decimal(funds))
+
+    @mock.patch('base.rollups.bump_cache_version')
+    @mock.patch('base.rollups.transaction.on_commit', side_effect=_run_now)
+    def test_refresh_projects_updates_in_place(self, on_commit, bump):
+        first = self.subcomponent(1, 7, 2, '100.50')
+        self.subcomponent(2, 7, 3, '50')
+        refresh_projects([7])
+        project = DashboardRollup.objects.get(
+            scope=DashboardRollup.PROJECT, object_id=7)
+        self.assertEqual(project.subcomponent_count, 2)
+        self.assertEqual(project.sub_project_count, 5)
+        self.assertEqual(project.total_fund, Decimal('150.50'))
+
+        first.sub_project_count = 4
+        first.save()
+        refresh_projects([7])
+        refreshed = DashboardRollup.objects.get(
+            scope=DashboardRollup.PROJECT, object_id=7)
+        self.assertEqual(refreshed.pk, project.pk)
+        self.assertEqual(refreshed.sub_project_count, 7)
+        self.assertEqual(bump.call_count, 2)
+
+    def test_template_tags(self):
+        self.subcomponent(1, 7, 2, '100')
+        DashboardRollup.objects.create(
+            scope=DashboardRollup.PROJECT, object_id=7, project_pk=7,
+            subcomponent_count=1, sub_project_count=2,
+            beneficiary_count=10, total_fund=Decimal('100'))
+        with self.assertNumQueries(1):
+            rollups = subcomponent_rollups([
+                SimpleNamespace(pk=1), SimpleNamespace(pk=2)])
+        self.assertEqual(
+            rollup_for(rollups, SimpleNamespace(pk=1)).sub_project_count, 2)
+        missing = rollup_for(rollups, SimpleNamespace(pk=2))
+        self.assertEqual(missing.sub_project_count, 0)
+        self.assertEqual(dashboard_totals()['subproject_count'], 2)
+        self.assertEqual(
+            dashboard_totals()['total_subproject_funds'], Decimal('100'))
+
+
+class RollupSignalTests(SimpleTestCase):
+    def tearDown(self):
+        signals._pending.subcomponent_ids = set()
+
+    @mock.patch('base.rollups.refresh_subcomponents')
+    def test_refreshes_are_coalesced_per_transaction(self, refresh):
+        callbacks = []
+        with mock.patch(
+                'base.signals.transaction.on_commit',
+                side_effect=callbacks.append):
+            signals.schedule_rollup_refresh([1, None])
+            signals.schedule_rollup_refresh([2, 1])
+        for callback in callbacks:
+            callback()
+        self.assertEqual(
+            [call[0][0] for call in refresh.call_args_list], [{1, 2}, set()])
+
+    @mock.patch('base.signals.transaction.on_commit')
+    def test_only_tralard_models_invalidate_the_cache(self, on_commit):
+        signals.tralard_changed(DashboardRollup)
+        on_commit.assert_not_called()
+
+    def moved(self, model_name, previous_parent, **fields):
+        sender = mock.MagicMock()
+        sender._meta.model_name = model_name
+        sender._default_manager.filter.return_value.values_list \
+            .return_value.first.return_value = previous_parent
+        instance = SimpleNamespace(pk=5, **fields)
+        signals.remember_parent(sender, instance)
+        return sender, instance
+
+    @mock.patch('base.rollups.refresh_subcomponents')
+    def test_moving_a_sub_project_refreshes_both_parents(self, refresh):
+        sender, instance = self.moved('subproject', 1, subcomponent_id=2)
+        callbacks = []
+        with mock.patch(
+                'base.signals.transaction.on_commit',
+                side_effect=callbacks.append):
+            signals.sub_project_changed(sender, instance)
+        callbacks[0]()
+        refresh.assert_called_once_with({1, 2})
+
+    @mock.patch('base.rollups.refresh_subcomponents')
+    @mock.patch('base.signals.apps.get_model')
+    def test_moving_a_beneficiary_refreshes_both_parents(
+            self, get_model, refresh):
+        sub_projects = get_model.return_value.objects
+        sub_projects.filter.return_value.values_list.return_value = [3, 4]
+        sender, instance = self.moved('beneficiary', 7, sub_project_id=8)
+        callbacks = []
+        with mock.patch(
+                'base.signals.transaction.on_commit',
+                side_effect=callbacks.append):
+            signals.sub_project_child_changed(sender, instance)
+        callbacks[0]()
+        self.assertEqual(
+            sorted(sub_projects.filter.call_args[1]['pk__in']), [7, 8])
+        refresh.assert_called_once_with({3, 4})
@@ -0,0 +1,68 @@
+# coding=utf-8
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from base import schema
+from base.views.schema import schema_file
+
+
+class SchemaTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        patcher = override_settings(SCHEMA_ROOT=self.root)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+    def write(self, schema_format, content):
+        path = schema.schema_path(schema_format)
+        with open(path, 'wb') as output:
+            output.write(content)
+        return path
+
+    def test_schema_is_read_once_per_change(self):
+        path = self.write('json', b'{"swagger": "2.0"}')
+        content, etag = schema.load_schema('json')
+        self.assertEqual(content, b'{"swagger": "2.0"}')
+        with mock.patch('base.schema.open', create=True) as opened:
+            self.assertEqual(schema.load_schema('json'), (content, etag))
+        opened.assert_not_called()
+
+        self.write('json', b'{"swagger": "2.0", "paths": {}}')
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 1))
+        changed, changed_etag = schema.load_schema('json')
+        self.assertEqual(changed, b'{"swagger": "2.0", "paths": {}}')
+        self.assertNotEqual(changed_etag, etag)
+
+    def test_missing_schema_is_built(self):
+        with mock.patch(
+                'base.schema.build_schema',
+                side_effect=lambda: self.write('yaml', b'swagger: 2.0\n')
+        ) as build:
+            content, _ = schema.load_schema('yaml')
+            schema.load_schema('yaml')
+        self.assertEqual(content, b'swagger: 2.0\n')
+        self.assertEqual(build.call_count, 1)
+
+    def test_endpoint_supports_conditional_requests(self):
+        self.write('json', b'{"swagger": "2.0"}')
+        factory = RequestFactory()
+        response = schema_file(factory.get('/swagger.json'), 'json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.content, b'{"swagger": "2.0"}')
+
+        response = schema_file(factory.get(
+            '/swagger.json', HTTP_IF_NONE_MATCH=response['ETag']), 'json')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_unknown_format(self):
+        with self.assertRaises(Http404):
+            schema_file(RequestFactory().get('/swagger.xml'), 'xml')
@@ -0,0 +1,251 @@
+# coding=utf-8
+import json
+from datetime import timedelta
+from unittest import mock
+
+from celery.exceptions import SoftTimeLimitExceeded
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from base import sms
+from base.counters import ANSWER_LENGTH
+from base.models import (
+    SmsDeadLetter,
+    Survey,
+    SurveyAnswerCounter,
+    SurveyQuestion,
+    SurveyResponse,
+)
+from base.tasks import ingest_sms
+from base.tests.test_audit import FakeBuffer
+from base.views.sms import sms_inbound
+
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def make_survey(keyword, *questions):
+    survey = Obj(keyword=keyword, questions=mock.Mock())
+    survey.questions.all.return_value = [
+        Obj(code=code, options=options) for code, options in questions]
+    return survey
+
+
+class ParseTests(SimpleTestCase):
+    def setUp(self):
+        self.survey = make_survey(
+            'FLOOD', ('affected', ['yes', 'no']), ('households', []))
+        self.surveys = {'FLOOD': self.survey}
+
+    def test_normalize_aliases(self):
+        message = sms.normalize_message({
+            'id': 'abc', 'from': '+260971', 'text': 'flood yes 3',
+            'timestamp': '2021-06-01T10:00:00Z'})
+        self.assertEqual(message, {
+            'message_id': 'abc',
+            'sender': '+260971',
+            'text': 'flood yes 3',
+            'received': '2021-06-01T10:00:00+00:00',
+            'district': '',
+            'location': None,
+        })
+
+    def test_normalize_derives_a_stable_key(self):
+        data = {
+            'from': '+260971', 'text': 'flood yes', 'timestamp': 1622541600}
+        first = sms.normalize_message(data)
+        self.assertEqual(first, sms.normalize_message(dict(data)))
+        self.assertEqual(len(first['message_id']), 40)
+
+    def test_normalize_rejects_incomplete_messages(self):
+        for data in ({'text': 'flood yes', 'id': '1'},
+                     {'from': '+260971', 'text': 'flood yes'},
+                     {'from': '1', 'text': 'x', 'timestamp': 'soon'},
+                     {'from': '1', 'text': 'x', 'timestamp': 10 ** 20},
+                     'flood yes'):
+            with self.assertRaises(sms.InvalidMessage):
+                sms.normalize_message(data)
+
+    def test_normalize_rejects_timestamps_outside_the_window(self):
+        future = timezone.now() + timedelta(days=1)
+        for timestamp, error in ((0, 'too old'),
+                                 (future.isoformat(), 'in the future')):
+            with self.assertRaisesMessage(sms.InvalidMessage, error):
+                sms.normalize_message({
+                    'from': '+260971', 'text': 'flood yes',
+                    'timestamp': timestamp})
+
+        old = (timezone.now() - timedelta(days=100)).isoformat()
+        sms.normalize_message({'from': '1', 'text': 'x', 'timestamp': old})
+        with override_settings(SURVEY_PARTITIONS_KEEP=1):
+            with self.assertRaisesMessage(sms.InvalidMessage, 'too old'):
+                sms.normalize_message(
+                    {'from': '1', 'text': 'x', 'timestamp': old})
+
+    def test_parse(self):
+        survey, answers = sms.parse_message(' Flood yes,12 ', self.surveys)
+        self.assertIs(survey, self.survey)
+        self.assertEqual(answers, {'affected': 'YES', 'households': '12'})
+
+    def test_parse_partial_answers(self):
+        _, answers = sms.parse_message('FLOOD NO', self.surveys)
+        self.assertEqual(answers, {'affected': 'NO'})
+
+    def test_parse_errors(self):
+        for text, error in (('', 'empty message'),
+                            ('DROUGHT yes', 'unknown keyword DROUGHT'),
+                            ('FLOOD', 'no answers'),
+                            ('FLOOD yes 1 2', '3 answers to 2 questions'),
+                            ('FLOOD maybe', 'invalid answer MAYBE'),
+                            ('FLOOD yes %s' % ('9' * (ANSWER_LENGTH + 1)),
+                             'answer to households longer than %s' %
+                             ANSWER_LENGTH)):
+            with self.assertRaisesMessage(sms.InvalidMessage, error):
+                sms.parse_message(text, self.surveys)
+
+
+@override_settings(SMS_GATEWAY_TOKEN='secret')
+class WebhookTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch('base.views.sms.schedule_ingest')
+        self.schedule = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('base.views.sms.inbound_buffer')
+        self.buffer = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.buffer.push.return_value = 2
+
+    def post(self, payload, token='secret'):
+        request = RequestFactory().post(
+            '/sms/inbound/', json.dumps(payload),
+            content_type='application/json',
+            HTTP_X_GATEWAY_TOKEN=token)
+        return sms_inbound(request)
+
+    def test_messages_are_queued(self):
+        response = self.post({'messages': [
+            {'id': '1', 'from': '+260971', 'text': 'FLOOD yes'},
+            {'id': '2', 'from': '+260972', 'text': 'FLOOD no'},
+            {'id': '3', 'text': 'FLOOD no'},
+        ]})
+        self.assertEqual(response.status_code, 202)
+        body = json.loads(response.content.decode())
+        self.assertEqual(body['accepted'], 2)
+        self.assertEqual(body['rejected'][0]['index'], 2)
+        self.assertEqual(len(self.buffer.push.call_args[0]), 2)
+        self.schedule.assert_called_once_with(2, 2)
+
+    def test_invalid_token(self):
+        response = self.post({'id': '1'}, token='wrong')
+        self.assertEqual(response.status_code, 403)
+        self.buffer.push.assert_not_called()
+
+    def test_redis_unavailable(self):
+        self.buffer.push.side_effect = RedisError
+        response = self.post(
+            {'id': '1', 'from': '+260971', 'text': 'FLOOD yes'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+
+
+class IngestTests(TestCase):
+    def setUp(self):
+        survey = Survey.objects.create(name='Floods', keyword='flood')
+        SurveyQuestion.objects.create(
+            survey=survey, position=1, code='affected', text='Affected?',
+            options=['YES', 'NO'])
+
+    def message(self, message_id, text):
+        return sms.normalize_message({
+            'id': message_id, 'from': '+260971', 'text': text,
+            'timestamp': '2021-06-01T10:00:00Z'})
+
+    def test_ingest_dedupes_and_dead_letters(self):
+        messages = [
+            self.message('1', 'FLOOD yes'),
+            self.message('1', 'FLOOD yes'),
+            self.message('2', 'DROUGHT yes'),
+        ]
+        sms.ingest(messages)
+        sms.ingest(messages)
+        response = SurveyResponse.objects.get()
+        self.assertEqual(response.answers, {'affected': 'YES'})
+        self.assertEqual(
+            SmsDeadLetter.objects.get().reason, 'unknown keyword DROUGHT')
+
+    def test_ingest_dead_letters_long_answers(self):
+        SurveyQuestion.objects.create(
+            survey=Survey.objects.get(), position=2, code='households',
+            text='Households?')
+        responses, dead_letters = sms.ingest([
+            self.message('1', 'FLOOD yes 12'),
+            self.message('2', 'FLOOD yes %s' % ('9' * 33)),
+        ])
+        self.assertEqual((responses, dead_letters), (1, 1))
+        self.assertEqual(SurveyResponse.objects.get().message_id, '1')
+        self.assertEqual(SmsDeadLetter.objects.get().message_id, '2')
+        self.assertEqual(
+            SurveyAnswerCounter.objects.get(question='households').answer,
+            '12')
+
+    def patch_buffers(self):
+        inbound = FakeBuffer('sms-inbound')
+        failed = FakeBuffer('sms-failed')
+        for target, buffer in (('base.tasks.sms.inbound_buffer', inbound),
+                               ('base.tasks.sms.failed_buffer', failed)):
+            patcher = mock.patch(target, buffer)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return inbound, failed
+
+    def test_ingest_sms_acknowledges_written_batches(self):
+        inbound, failed = self.patch_buffers()
+        inbound.push(self.message('1', 'FLOOD yes'))
+        inbound.push(self.message('2', 'FLOOD no'))
+        self.assertEqual(ingest_sms(), 2)
+        self.assertEqual(SurveyResponse.objects.count(), 2)
+        self.assertEqual((len(inbound), inbound.claims), (0, {}))
+
+    def test_ingest_sms_keeps_failed_batches(self):
+        inbound, failed = self.patch_buffers()
+        inbound.push(self.message('1', 'FLOOD yes'))
+        with mock.patch('base.tasks.sms.ingest', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                ingest_sms()
+        self.assertEqual((len(inbound), inbound.claims), (0, {}))
+        self.assertEqual(len(failed), 1)
+
+    def test_ingest_sms_recovers_unacknowledged_batches(self):
+        inbound, failed = self.patch_buffers()
+        inbound.push(self.message('1', 'FLOOD yes'))
+        inbound.claim(10)
+        self.assertEqual(ingest_sms(), 1)
+        self.assertEqual(SurveyResponse.objects.count(), 1)
+
+    @mock.patch('base.tasks.sms.ingest_sms.delay')
+    def test_ingest_sms_hands_over_after_its_run_time(self, delay):
+        inbound, failed = self.patch_buffers()
+        inbound.push(self.message('1', 'FLOOD yes'))
+        with override_settings(SMS_RUN_SECONDS=-1):
+            self.assertEqual(ingest_sms(), 0)
+        self.assertEqual(len(inbound), 1)
+        delay.assert_called_once_with()
+
+    @mock.patch('base.tasks.sms.ingest_sms.delay')
+    def test_ingest_sms_puts_back_batches_at_the_time_limit(self, delay):
+        inbound, failed = self.patch_buffers()
+        inbound.push(self.message('1', 'FLOOD yes'))
+        with mock.patch(
+                'base.tasks.sms.ingest', side_effect=SoftTimeLimitExceeded):
+            self.assertEqual(ingest_sms(), 0)
+        self.assertEqual((len(inbound), inbound.claims), (1, {}))
+        self.assertEqual(len(failed), 0)
+        delay.assert_called_once_with()
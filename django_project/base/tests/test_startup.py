@@ -0,0 +1,72 @@
+# coding=utf-8
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+
+from django.test import SimpleTestCase
+
+from base.management.commands.profile_startup import fastest
+from base.startup import ImportTimer, deferred_modules, is_loaded, lazy_import
+
+
+class StartupTests(SimpleTestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        sys.path.insert(0, self.path)
+        self.addCleanup(sys.path.remove, self.path)
+        self.modules = []
+
+    def tearDown(self):
+        for name in self.modules:
+            sys.modules.pop(name, None)
+
+    def module(self, name, source):
+        with open(os.path.join(self.path, '%s.py' % name), 'w') as output:
+            output.write(source)
+        importlib.invalidate_caches()
+        self.modules.append(name)
+
+    def test_lazy_import_runs_the_module_on_first_use(self):
+        self.module('startup_probe', 'VALUE = 42\n')
+        module = lazy_import('startup_probe')
+        self.assertFalse(is_loaded(module))
+        self.assertIn('startup_probe', deferred_modules())
+        self.assertEqual(module.VALUE, 42)
+        self.assertTrue(is_loaded(module))
+        self.assertNotIn('startup_probe', deferred_modules())
+        self.assertIs(lazy_import('startup_probe'), module)
+
+    def test_missing_module_fails_on_first_use(self):
+        module = lazy_import('startup_probe_missing')
+        with self.assertRaises(ImportError):
+            module.VALUE
+
+    def test_import_timer(self):
+        self.module('startup_outer', 'import startup_inner\n')
+        self.module('startup_inner', 'import time\ntime.sleep(0.05)\n')
+        timer = ImportTimer()
+        timer.install()
+        try:
+            import startup_outer  # noqa
+        finally:
+            timer.uninstall()
+        self.assertGreaterEqual(timer.self_times['startup_inner'], 0.05)
+        self.assertLess(timer.self_times['startup_outer'], 0.05)
+        self.assertGreaterEqual(
+            timer.cumulative_times['startup_outer'], 0.05)
+        self.assertGreaterEqual(timer.packages()['startup_inner'], 0.05)
+
+    def test_fastest_run_is_kept(self):
+        report = fastest([{
+            'phases': {'apps': 2.0}, 'apps': {'base': {'ready': 0.2}},
+            'packages': {'pandas': 1.0}, 'modules': 10, 'deferred': [],
+        }, {
+            'phases': {'apps': 1.5}, 'apps': {'base': {'ready': 0.3}},
+            'packages': {'pandas': 1.2}, 'modules': 10, 'deferred': [],
+        }])
+        self.assertEqual(report['phases'], {'apps': 1.5})
+        self.assertEqual(report['apps'], {'base': {'ready': 0.2}})
+        self.assertEqual(report['packages'], {'pandas': 1.0})
@@ -0,0 +1,28 @@
+# coding=utf-8
+from celery.app.routes import MapRoute
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from base import tasks
+from core.celery import app
+
+
+class TaskRouteTests(SimpleTestCase):
+    def test_every_task_has_a_queue(self):
+        queues = {'interactive', 'bulk', 'reports', 'maintenance'}
+        app.loader.import_default_modules()
+        names = [name for name in app.tasks if not name.startswith('celery.')]
+        self.assertIn('base.ingest_sms', names)
+        self.assertIn(
+            'report_builder.tasks.report_builder_file_async_report_save',
+            names)
+        route = MapRoute(settings.CELERY_TASK_ROUTES)
+        for name in names:
+            options = route(name)
+            self.assertIsNotNone(options, name)
+            self.assertIn(options['queue'], queues)
+
+    def test_export_jobs_are_acknowledged_early(self):
+        self.assertFalse(tasks.run_export_job.acks_late)
+        self.assertTrue(tasks.ingest_sms.acks_late)
+        self.assertTrue(tasks.refresh_rollups.acks_late)
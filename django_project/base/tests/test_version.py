@@ -0,0 +1,40 @@
+# coding=utf-8
+import json
+from unittest import mock
+
+from django.template.loader import get_template
+from django.test import RequestFactory, SimpleTestCase
+
+from base.version import get_version
+from base.views.version import version
+
+
+class VersionTests(SimpleTestCase):
+    def tearDown(self):
+        get_version.cache_clear()
+
+    def test_file_is_read_once(self):
+        get_version.cache_clear()
+        with mock.patch(
+                'base.version.open',
+                mock.mock_open(read_data='1.2.3\n'), create=True) as opened:
+            self.assertEqual(get_version(), '1.2.3')
+            self.assertEqual(get_version(), '1.2.3')
+        self.assertEqual(opened.call_count, 1)
+
+    def test_missing_file(self):
+        get_version.cache_clear()
+        with mock.patch(
+                'base.version.open', side_effect=IOError, create=True):
+            self.assertEqual(get_version(), 'unknown')
+
+    def test_endpoint(self):
+        response = version(RequestFactory().get('/version'))
+        self.assertEqual(
+            json.loads(response.content.decode()),
+            {'version': get_version()})
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_navigation_loads_the_tag(self):
+        # Compiling fails on a block tag whose library is not loaded.
+        get_template('includes/navigation.html')
@@ -1,6 +1,63 @@
 # coding=utf-8
-from django.conf.urls import url
+from django.urls import path, re_path
+
+from base.views.charts import report_charts
+from base.views.datatables import BeneficiaryTableView, SubProjectTableView
+from base.views.exports import (
+    BeneficiaryExportView,
+    ExportJobDownloadView,
+    ExportJobView,
+    FundExportView,
+    TrainingExportView,
+)
+from base.views.maps import map_tile
+from base.views.sms import sms_inbound
+from base.views.version import version
+
+SUBCOMPONENT_EXPORT = (
+    r'^exports/project/(?P<project_slug>[-\w]+)/subcomponent/'
+    r'(?P<subcomponent_slug>[-\w]+)/%s\.(?P<export_format>csv|xlsx)$')
 
 urlpatterns = [
-    
+    path('version', version, name='version'),
+    path('sms/inbound/', sms_inbound, name='sms-inbound'),
+    path(
+        'map/tiles/<slug:layer>/<int:z>/<int:x>/<int:y>.pbf',
+        map_tile,
+        name='map-tile'),
+    path('charts/', report_charts, name='report-charts'),
+    path(
+        'charts/project/<slug:project_slug>/',
+        report_charts,
+        name='project-report-charts'),
+    path(
+        'datatables/project/<slug:project_slug>/subcomponent/'
+        '<slug:subcomponent_slug>/beneficiaries/',
+        BeneficiaryTableView.as_view(),
+        name='datatables-beneficiaries'),
+    path(
+        'datatables/project/<slug:project_slug>/subcomponent/'
+        '<slug:subcomponent_slug>/sub-projects/',
+        SubProjectTableView.as_view(),
+        name='datatables-sub-projects'),
+    re_path(
+        SUBCOMPONENT_EXPORT % 'beneficiaries',
+        BeneficiaryExportView.as_view(),
+        name='export-beneficiaries'),
+    re_path(
+        SUBCOMPONENT_EXPORT % 'funds',
+        FundExportView.as_view(),
+        name='export-funds'),
+    re_path(
+        SUBCOMPONENT_EXPORT % 'trainings',
+        TrainingExportView.as_view(),
+        name='export-trainings'),
+    path(
+        'exports/jobs/<int:pk>/',
+        ExportJobView.as_view(),
+        name='export-job'),
+    path(
+        'exports/jobs/<int:pk>/download/',
+        ExportJobDownloadView.as_view(),
+        name='export-job-download'),
 ]
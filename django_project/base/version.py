@@ -0,0 +1,24 @@
+# coding=utf-8
+"""Release version of the running code."""
+
+from functools import lru_cache
+from pathlib import Path
+
+VERSION_FILE = Path(__file__).resolve().parent.parent / 'VERSION'
+
+
+@lru_cache(maxsize=None)
+def get_version():
+    """Read the release from the VERSION file.
+
+    The file only changes with a deploy, which restarts the workers, so
+    it is read once per process and then served from memory.
+
+    :returns: The release, or ``'unknown'`` when the file is missing.
+    :rtype: str
+    """
+    try:
+        with open(str(VERSION_FILE)) as version_file:
+            return version_file.read().strip() or 'unknown'
+    except IOError:
+        return 'unknown'
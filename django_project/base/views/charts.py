@@ -0,0 +1,25 @@
+# coding=utf-8
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+
+from base.charts import project_charts
+
+
+@login_required
+def report_charts(request, project_slug=None):
+    """Charts of a project's indicator report, as rendered by the worker.
+
+    Answers from the chart table only. While the worker renders the first
+    charts of a report the response is a ``202`` without charts, clients
+    poll until they are listed.
+    """
+    charts, current = project_charts(project_slug)
+    return JsonResponse({
+        'current': current,
+        'charts': [{
+            'name': chart.name,
+            'spec': chart.spec_url,
+            'page': chart.html_url,
+            'rendered': chart.rendered,
+        } for chart in charts],
+    }, status=200 if charts else 202)
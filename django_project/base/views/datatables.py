@@ -0,0 +1,83 @@
+# coding=utf-8
+"""JSON endpoints feeding DataTables in server-side processing mode."""
+
+from django.apps import apps
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import JsonResponse
+from django.urls import reverse
+from django.views import View
+
+from base.datatables import Column, DataTablesQuery
+
+
+class DataTablesView(LoginRequiredMixin, View):
+    """Base view answering DataTables server-side requests.
+
+    Subclasses declare their ``columns`` and implement ``get_queryset``;
+    only the requested page is fetched from the database.
+    """
+    columns = []
+
+    def get_columns(self):
+        return self.columns
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        query = DataTablesQuery(request.GET, self.get_columns())
+        return JsonResponse(query.response(self.get_queryset()))
+
+
+def _logo_url(obj):
+    return obj.logo.url if obj.logo else None
+
+
+class BeneficiaryTableView(DataTablesView):
+    columns = [
+        Column('name'),
+        Column('sub_project', field='sub_project__name'),
+        Column('total_beneficiaries', searchable=False),
+        Column('registered_date', searchable=False),
+        Column('slug', searchable=False, orderable=False),
+        Column('logo_url', searchable=False, orderable=False,
+               render=_logo_url),
+    ]
+
+    def get_columns(self):
+        slugs = (self.kwargs['project_slug'], self.kwargs['subcomponent_slug'])
+
+        def url(name):
+            return lambda obj: reverse(
+                'tralard:%s' % name, args=slugs + (obj.slug,))
+
+        return self.columns + [
+            Column('detail_url', searchable=False, orderable=False,
+                   render=url('beneficiary-detail')),
+            Column('update_url', searchable=False, orderable=False,
+                   render=url('beneficiary-update')),
+        ]
+
+    def get_queryset(self):
+        Beneficiary = apps.get_model('tralard', 'Beneficiary')
+        return Beneficiary.objects.filter(
+            sub_project__subcomponent__project__slug=self.kwargs[
+                'project_slug'],
+            sub_project__subcomponent__slug=self.kwargs['subcomponent_slug'],
+        ).select_related('sub_project')
+
+
+class SubProjectTableView(DataTablesView):
+    columns = [
+        Column('name'),
+        Column('ward', field='ward__name'),
+        Column('approved', searchable=False),
+        Column('slug', searchable=False, orderable=False),
+    ]
+
+    def get_queryset(self):
+        SubProject = apps.get_model('tralard', 'SubProject')
+        return SubProject.objects.filter(
+            subcomponent__project__slug=self.kwargs['project_slug'],
+            subcomponent__slug=self.kwargs['subcomponent_slug'],
+        ).select_related('ward')
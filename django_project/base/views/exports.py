@@ -0,0 +1,207 @@
+# coding=utf-8
+"""Downloads of the beneficiary, fund and training lists.
+
+A ``GET`` on an export streams it right away. A ``POST`` instead queues an
+:class:`~base.models.ExportJob` for the Celery worker and answers with its
+status, which the client polls until the artifact can be downloaded.
+"""
+
+import os
+
+from django.apps import apps
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import transaction
+from django.http import (
+    FileResponse,
+    Http404,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.views import View
+
+from base.exports import (
+    EXPORT_FORMATS,
+    ExportColumn,
+    csv_lines,
+    export_rows,
+    write_xlsx,
+)
+from base.models import ExportJob
+from base.tasks import run_export_job
+
+
+class ExportView(LoginRequiredMixin, View):
+    """Base view exporting a queryset as CSV or XLSX.
+
+    Subclasses declare their ``name``, ``columns`` and ``title``, implement
+    ``get_queryset`` and are registered in ``EXPORT_VIEWS`` so that the
+    worker can rebuild them from an export job.
+    """
+    name = None
+    columns = []
+    title = 'Export'
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def get_filename(self, export_format):
+        return '%s-%s.%s' % (
+            self.title.replace(' ', ''),
+            timezone.localdate().strftime('%d-%m-%Y'),
+            export_format)
+
+    def get(self, request, export_format, *args, **kwargs):
+        if export_format not in EXPORT_FORMATS:
+            raise Http404
+        rows = export_rows(self.get_queryset(), self.columns)
+        filename = self.get_filename(export_format)
+
+        if export_format == 'csv':
+            response = StreamingHttpResponse(
+                csv_lines(self.columns, rows),
+                content_type=EXPORT_FORMATS['csv'])
+            response['Content-Disposition'] = (
+                'attachment; filename="%s"' % filename)
+        else:
+            response = FileResponse(
+                write_xlsx(self.columns, rows, title=self.title),
+                as_attachment=True,
+                filename=filename,
+                content_type=EXPORT_FORMATS['xlsx'])
+        # Pass rows on as they come instead of buffering them in nginx.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def post(self, request, export_format, *args, **kwargs):
+        if export_format not in EXPORT_FORMATS:
+            raise Http404
+        job = ExportJob.objects.create(
+            user=request.user,
+            export=self.name,
+            export_format=export_format,
+            parameters={
+                key: value for key, value in self.kwargs.items()
+                if key != 'export_format'})
+        download_url = request.build_absolute_uri(
+            reverse('export-job-download', args=[job.pk]))
+        transaction.on_commit(
+            lambda: run_export_job.delay(job.pk, download_url))
+        return JsonResponse(job_status(job), status=202)
+
+
+class SubComponentExportView(ExportView):
+    """Export of the rows belonging to the sub projects of a subcomponent.
+
+    ``sub_project_path`` is the lookup from the exported model to its sub
+    project.
+    """
+    model_name = None
+    sub_project_path = 'sub_project'
+
+    def get_queryset(self):
+        model = apps.get_model('tralard', self.model_name)
+        lookup = '%s__subcomponent' % self.sub_project_path
+        return model.objects.filter(**{
+            '%s__project__slug' % lookup: self.kwargs['project_slug'],
+            '%s__slug' % lookup: self.kwargs['subcomponent_slug'],
+        }).order_by('pk')
+
+
+class BeneficiaryExportView(SubComponentExportView):
+    name = 'beneficiaries'
+    model_name = 'Beneficiary'
+    title = 'Beneficiary List'
+    columns = [
+        ExportColumn('Name', 'name'),
+        ExportColumn('SubProject', 'sub_project__name'),
+        ExportColumn('Ward', 'ward__name'),
+        ExportColumn('Organisation Type', 'org_type'),
+        ExportColumn('Total Beneficiaries', 'total_beneficiaries'),
+        ExportColumn('Total Females', 'total_females'),
+        ExportColumn('Total Males', 'total_males'),
+        ExportColumn('Email', 'email'),
+        ExportColumn('Cell', 'cell'),
+        ExportColumn('Registered Date', 'registered_date'),
+    ]
+
+
+class FundExportView(SubComponentExportView):
+    name = 'funds'
+    model_name = 'Fund'
+    title = 'Fund List'
+    columns = [
+        ExportColumn('Amount', 'amount'),
+        ExportColumn('Currency', 'amount_currency'),
+        ExportColumn('Approved', 'approved'),
+        ExportColumn('SubProject', 'sub_project__name'),
+        ExportColumn('Funding Date', 'funding_date'),
+    ]
+
+
+class TrainingExportView(SubComponentExportView):
+    name = 'trainings'
+    model_name = 'Training'
+    title = 'Training List'
+    columns = [
+        ExportColumn('Title', 'title'),
+        ExportColumn('SubProject', 'sub_project__name'),
+        ExportColumn('Training Type', 'training_type'),
+        ExportColumn('Completed', 'completed'),
+        ExportColumn('Moderator', 'moderator'),
+        ExportColumn('Start Date', 'start_date'),
+        ExportColumn('End Date', 'end_date'),
+    ]
+
+
+EXPORT_VIEWS = {
+    view.name: view
+    for view in (BeneficiaryExportView, FundExportView, TrainingExportView)
+}
+
+
+def job_status(job):
+    """JSON describing the progress of an export job.
+
+    :type job: ExportJob
+    :rtype: dict
+    """
+    return {
+        'id': job.pk,
+        'export': job.export,
+        'format': job.export_format,
+        'status': job.status,
+        'progress': job.progress,
+        'rows_written': job.rows_written,
+        'rows_total': job.rows_total,
+        'error': job.error,
+        'status_url': reverse('export-job', args=[job.pk]),
+        'download_url': (
+            reverse('export-job-download', args=[job.pk])
+            if job.status == ExportJob.DONE else None),
+    }
+
+
+class ExportJobView(LoginRequiredMixin, View):
+    """Status of an export job of the current user."""
+
+    def get(self, request, pk):
+        job = get_object_or_404(ExportJob, pk=pk, user=request.user)
+        return JsonResponse(job_status(job))
+
+
+class ExportJobDownloadView(LoginRequiredMixin, View):
+    """Artifact of a finished export job of the current user."""
+
+    def get(self, request, pk):
+        job = get_object_or_404(
+            ExportJob, pk=pk, user=request.user, status=ExportJob.DONE)
+        if not os.path.exists(job.path):
+            raise Http404
+        return FileResponse(
+            open(job.path, 'rb'),
+            as_attachment=True,
+            filename=job.filename.split('-', 1)[1],
+            content_type=EXPORT_FORMATS[job.export_format])
@@ -0,0 +1,32 @@
+# coding=utf-8
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+
+from base.maptiles import UnknownLayer, get_tile, valid_tile
+
+MVT_CONTENT_TYPE = 'application/vnd.mapbox-vector-tile'
+
+
+@login_required
+@require_GET
+def map_tile(request, layer, z, x, y):
+    """A vector tile of the project map.
+
+    The map page requests tiles with the data version it was rendered
+    with; those are cached by browsers for a day since any write to the
+    tralard models changes the version, and so the URL.
+    """
+    if not valid_tile(z, x, y):
+        raise Http404('No such tile')
+    try:
+        tile, version = get_tile(layer, z, x, y)
+    except UnknownLayer:
+        raise Http404('No such layer')
+    response = HttpResponse(tile, content_type=MVT_CONTENT_TYPE)
+    if request.GET.get('v') == str(version):
+        patch_cache_control(response, private=True, max_age=24 * 60 * 60)
+    else:
+        patch_cache_control(response, private=True, max_age=60)
+    return response
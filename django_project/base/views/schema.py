@@ -0,0 +1,29 @@
+# coding=utf-8
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_safe
+
+from base.schema import SCHEMA_FORMATS, load_schema
+
+
+def _schema_etag(request, schema_format):
+    if schema_format not in SCHEMA_FORMATS:
+        return None
+    return load_schema(schema_format)[1]
+
+
+@require_safe
+@condition(etag_func=_schema_etag)
+def schema_file(request, schema_format):
+    """The OpenAPI schema written by ``manage.py build_schema``.
+
+    Conditional requests carrying the ETag of the current schema get a
+    ``304``, the schema only changes when a deploy rebuilt it.
+    """
+    if schema_format not in SCHEMA_FORMATS:
+        raise Http404
+    content, _ = load_schema(schema_format)
+    response = HttpResponse(
+        content, content_type=SCHEMA_FORMATS[schema_format])
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
@@ -0,0 +1,79 @@
+# coding=utf-8
+import json
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from redis.exceptions import RedisError
+
+from base.sms import (
+    InvalidMessage,
+    inbound_buffer,
+    normalize_message,
+    schedule_ingest,
+    sms_setting,
+)
+
+
+def _authorized(request):
+    token = sms_setting('GATEWAY_TOKEN')
+    if not token:
+        # Only a development setup may run without a shared secret.
+        return settings.DEBUG
+    return constant_time_compare(
+        request.META.get('HTTP_X_GATEWAY_TOKEN', ''), token)
+
+
+@csrf_exempt
+@require_POST
+def sms_inbound(request):
+    """Queue the messages posted by the SMS gateway.
+
+    Accepts one message as form data or JSON, a JSON list of messages or
+    ``{"messages": [...]}``. Messages are validated and pushed to Redis
+    without touching the database, and parsed later by
+    :func:`base.tasks.ingest_sms`. Answers ``503`` when Redis is
+    unavailable so that the gateway retries the delivery.
+    """
+    if not _authorized(request):
+        return JsonResponse({'error': 'invalid gateway token'}, status=403)
+
+    if request.content_type == 'application/json':
+        try:
+            payload = json.loads(request.body.decode('utf-8'))
+        except ValueError:
+            return JsonResponse({'error': 'invalid JSON'}, status=400)
+    else:
+        payload = request.POST.dict()
+    if isinstance(payload, dict):
+        payload = payload.get('messages', [payload])
+    if not isinstance(payload, list):
+        return JsonResponse({'error': 'expected a list of messages'},
+                            status=400)
+    if len(payload) > sms_setting('MAX_MESSAGES'):
+        return JsonResponse(
+            {'error': 'at most %s messages per request' %
+             sms_setting('MAX_MESSAGES')},
+            status=413)
+
+    messages = []
+    rejected = []
+    for index, data in enumerate(payload):
+        try:
+            messages.append(normalize_message(data))
+        except InvalidMessage as error:
+            rejected.append({'index': index, 'error': str(error)})
+
+    if messages:
+        try:
+            length = inbound_buffer.push(*messages)
+        except RedisError:
+            response = JsonResponse(
+                {'error': 'temporarily unavailable'}, status=503)
+            response['Retry-After'] = '5'
+            return response
+        schedule_ingest(length, len(messages))
+    return JsonResponse(
+        {'accepted': len(messages), 'rejected': rejected}, status=202)
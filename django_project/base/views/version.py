@@ -0,0 +1,14 @@
+# coding=utf-8
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+
+from base.version import get_version
+
+
+@never_cache
+def version(request):
+    """Release of the running code, for health checks and deploy scripts.
+
+    Answers without touching the database or the filesystem.
+    """
+    return JsonResponse({'version': get_version()})
@@ -43,6 +43,15 @@ MEDIA_ROOT = '/home/web/media'
 # trailing slash.
 # Examples: "http://example.com/media/", "http://media.example.com/"
 # MEDIA_URL = '/media/'
+
+# Absolute filesystem path to the directory background exports are written
+# to. It is not served by nginx: downloads go through base.views.exports so
+# only the user who requested an export can fetch it.
+REPORTS_ROOT = '/home/web/reports'
+
+# Absolute filesystem path to the directory the OpenAPI schema is written to
+# by the build_schema command, see base.schema.
+SCHEMA_ROOT = '/home/web/schema'
 # setting full MEDIA_URL to be able to use it for the feeds
 MEDIA_URL = '/media/'
 
@@ -75,6 +84,7 @@ STATICFILES_FINDERS = (
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'base.middleware.InstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -101,6 +111,7 @@ INSTALLED_APPS = (
     'django.contrib.syndication',
     'django.contrib.staticfiles',
     'django.contrib.gis',
+    'django.contrib.postgres',
 )
 
 TEMPLATES = [
@@ -123,6 +134,9 @@ TEMPLATES = [
 
                 'django.template.context_processors.static',
                 'django.template.context_processors.media',
+
+                'base.context_processors.datatables',
+                'base.context_processors.version',
             ],
         },
     },
@@ -151,7 +165,11 @@ LOGGING = {
             'level': 'ERROR',
             'filters': ['require_debug_false'],
             'class': 'django.utils.log.AdminEmailHandler'
-        }
+        },
+        'console': {
+            'level': 'INFO',
+            'class': 'logging.StreamHandler',
+        },
     },
     'loggers': {
         'django.request': {
@@ -159,5 +177,11 @@ LOGGING = {
             'level': 'ERROR',
             'propagate': True,
         },
+        # One JSON line of query, template and cache metrics per request
+        'base.instrumentation': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     }
 }
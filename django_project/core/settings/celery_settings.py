@@ -1,9 +1,77 @@
-
-# CELERYBEAT_SCHEDULE = {
-#     'task_title': {
-#         'task': '#',
-#         'schedule': 3600.0,  # update every 60 minutes
-#     }
-# }
+from celery.schedules import crontab
 
 CELERY_TIMEZONE = 'Africa/Johannesburg'
+
+# Each queue has its own worker service in docker-compose.yml, so a long
+# export never holds up the short tasks somebody is waiting for:
+# interactive: short tasks with a user or a phone on the other end
+# bulk: batch writes behind the request path
+# reports: exports and report rendering, minutes long
+# maintenance: the periodic jobs of the beat schedule
+CELERY_TASK_DEFAULT_QUEUE = 'interactive'
+CELERY_TASK_ROUTES = {
+    'base.ingest_sms': {'queue': 'interactive'},
+    'base.refresh_edge_cache': {'queue': 'interactive'},
+    'base.flush_audit_events': {'queue': 'bulk'},
+    'base.run_export_job': {'queue': 'reports'},
+    'base.render_report_charts': {'queue': 'reports'},
+    'base.warm_dashboard_cache': {'queue': 'reports'},
+    'base.clear_expired_sessions': {'queue': 'maintenance'},
+    'base.clear_media_temp_files': {'queue': 'maintenance'},
+    'base.maintain_survey_partitions': {'queue': 'maintenance'},
+    'base.prune_audit_events': {'queue': 'maintenance'},
+    'base.prune_export_jobs': {'queue': 'maintenance'},
+    'base.refresh_rollups': {'queue': 'maintenance'},
+    # Asynchronous reports of django-report-builder.
+    'report_builder.tasks.*': {'queue': 'reports'},
+}
+# A worker only reserves the task it runs, long tasks cannot strand short
+# ones in its prefetch buffer. The interactive worker raises it on its
+# command line.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Tasks that can safely run twice are declared with acks_late: their
+# message is only acknowledged once they finished, so the tasks of a worker
+# that died are delivered again. Export jobs are not, a job found running
+# is never restarted.
+
+# Periodic tasks, run by the beat service. The base.* maintenance tasks
+# start after a random delay and skip a run while the previous one is still
+# going, see base.tasks.maintenance.PeriodicTask.
+CELERY_BEAT_SCHEDULE = {
+    'refresh-rollups': {
+        'task': 'base.refresh_rollups',
+        'schedule': crontab(hour=2, minute=0),
+    },
+    'prune-audit-events': {
+        'task': 'base.prune_audit_events',
+        'schedule': crontab(hour=2, minute=30),
+    },
+    'clear-expired-sessions': {
+        'task': 'base.clear_expired_sessions',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'prune-export-jobs': {
+        'task': 'base.prune_export_jobs',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'maintain-survey-partitions': {
+        'task': 'base.maintain_survey_partitions',
+        'schedule': crontab(hour=4, minute=0),
+    },
+    'clear-media-temp-files': {
+        'task': 'base.clear_media_temp_files',
+        'schedule': crontab(hour='*/2', minute=0),
+    },
+    # Before the working day starts, the jitter keeps it before 07:00.
+    'warm-dashboard-cache': {
+        'task': 'base.warm_dashboard_cache',
+        'schedule': crontab(hour=6, minute=30, day_of_week='mon-fri'),
+    },
+    # Catches the messages whose ingestion could not be scheduled by the
+    # webhook.
+    'ingest-sms': {
+        'task': 'base.ingest_sms',
+        'schedule': 60.0,
+        'options': {'expires': 50},
+    },
+}
@@ -62,6 +62,27 @@ DJANGO_EASY_AUDIT_WATCH_AUTH_EVENTS = True
 # Defines whether to log URL requests made to the project
 DJANGO_EASY_AUDIT_WATCH_REQUEST_EVENTS = True
 
+# Static and media files are served by nginx, do not audit them
+DJANGO_EASY_AUDIT_UNREGISTERED_URLS_EXTRA = [
+    r'^/static/', r'^/media/', r'^/select2/', r'^/sms/inbound/',
+]
+
+# Queue audit events in Redis and let the celery worker insert them in
+# bulk, see base.audit
+# nginx proxies over HTTP, the client address is in X-Real-IP
+DJANGO_EASY_AUDIT_REMOTE_ADDR_HEADER = 'HTTP_X_REAL_IP'
+
+DJANGO_EASY_AUDIT_LOGGING_BACKEND = 'base.audit.BufferedAuditBackend'
+AUDIT_BUFFER_BATCH_SIZE = 500
+AUDIT_BUFFER_MAX_LENGTH = 100000
+AUDIT_BUFFER_FLUSH_INTERVAL = 10
+
+# Cache alias providing the redis connection used by base.buffers
+REDIS_BUFFER_CACHE_ALIAS = 'select2'
+# Seconds after which a batch claimed by a consumer that never acknowledged
+# it is put back in its buffer, longer than the task time limits.
+REDIS_BUFFER_CLAIM_TIMEOUT = 10 * 60
+
 SOCIALACCOUNT_PROVIDERS = {
     'github': {
         'SCOPE': ['user:email', 'public_repo', 'read:org']
@@ -107,17 +128,7 @@ CELERY_TASK_TIME_LIMIT = 5 * 60
 CELERY_TASK_SOFT_TIME_LIMIT = 60
 # http://docs.celeryproject.org/en/latest/userguide/configuration.html#beat-scheduler
 # CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
-# django-allauth
-
-# CELERY_BEAT_SCHEDULE = {
-#     "delete_temporary_files": {
-#         "task": "itez.beneficiary.tasks.delete_temporary_files",
-#         "schedule": crontab(
-#             hour="*/2", minute="00", day_of_week="mon,tue,wed,thu,fri,sat,sun"
-#         ),
-#         "args": (f"{MEDIA_ROOT}/temp"),
-#     },
-# }
+# The beat schedule is in celery_settings.CELERY_BEAT_SCHEDULE
 
 ELASTIC_MIN_SCORE = 0.5
 CONTACT_US_EMAIL = os.environ['CONTACT_US_EMAIL']
@@ -219,6 +230,54 @@ REPORT_BUILDER_INCLUDE = [
     'tralard.beneficiary',
     
 ]
+# Build report files in the celery worker and email the user when done
+REPORT_BUILDER_ASYNC_REPORT = True
+REPORT_BUILDER_EMAIL_NOTIFICATION = True
+
+# Page large DataTables on the server, see base.views.datatables
+DATATABLES_SERVER_SIDE = True
+
+# Rows fetched per server-side cursor round trip by the CSV/XLSX exports,
+# see base.exports
+EXPORT_CHUNK_SIZE = 2000
+# Limits of the background export jobs, see base.tasks.exports
+EXPORT_JOB_TIME_LIMIT = 60 * 60
+EXPORT_JOB_RETENTION_DAYS = 7
+
+# Persistent database connections idle for longer than this many seconds
+# are checked before being reused, see base.db
+DATABASE_HEALTH_CHECK_AFTER = 30
+# Seconds the connection counters of a worker are kept after its last
+# update, see base.db.record_metric
+DATABASE_METRICS_TIMEOUT = 60 * 60 * 24
+
+# Maximum number of queries per view, by view name or path, checked by
+# base.middleware.InstrumentationMiddleware
+QUERY_BUDGETS = {
+    # The dashboard reads its counters from base.models.DashboardRollup
+    '/': 30,
+    'datatables-beneficiaries': 5,
+    'datatables-sub-projects': 5,
+    'export-job': 3,
+    # Only validates and queues messages in Redis
+    'sms-inbound': 0,
+}
+
+# nginx micro-cache refreshed after writes, see base.edge_cache
+EDGE_CACHE_URL = os.environ.get('EDGE_CACHE_URL')
+# Public host name, nginx keys the cache and Django builds links on it
+EDGE_CACHE_HOST = os.environ.get('EDGE_CACHE_HOST')
+
+# Inbound SMS survey responses, see base.sms
+SMS_GATEWAY_TOKEN = os.environ.get('SMS_GATEWAY_TOKEN')
+SMS_BATCH_SIZE = 1000
+SMS_FLUSH_INTERVAL = 2
+SMS_MAX_MESSAGES = 1000
+
+# Monthly partitions of the survey responses, see base.partitions. Older
+# partitions are only archived when SURVEY_PARTITIONS_KEEP is set.
+SURVEY_PARTITIONS_AHEAD = 3
+SURVEY_PARTITIONS_KEEP = None
 
 # Admin interface
 GRAPPELLI_ADMIN_TITLE = 'sms-survery-dashboard Admin'
@@ -242,6 +301,14 @@ MAP_WIDGETS = {
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.coreapi.AutoSchema'
 }
+# The documentation pages load the schema built by the build_schema
+# command instead of generating it again, see base.views.schema
+SWAGGER_SETTINGS = {
+    'SPEC_URL': '/swagger.json',
+}
+REDOC_SETTINGS = {
+    'SPEC_URL': '/swagger.json',
+}
 # https://github.com/apragacz/django-rest-registration
 REST_REGISTRATION = {
     'REGISTER_VERIFICATION_ENABLED': False,
@@ -253,11 +320,17 @@ REST_REGISTRATION = {
 # Redirect to login page if user is not authorized
 ROLEPERMISSIONS_REDIRECT_TO_LOGIN = True
 
-# Select2 configuration
+# Cache configuration, select2 keeps its own alias
 CACHES = {
+    # Shared by every uwsgi and celery worker, see base.cache for the
+    # versioned invalidation of cached fragments
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "unique-snowflake",
+        "BACKEND": "base.cache_backends.InstrumentedRedisCache",
+        "LOCATION": os.environ.get("CELERY_BROKER_URL"),
+        "KEY_PREFIX": "sms-survey",
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+        },
     },
     "select2": {
         "BACKEND": "django_redis.cache.RedisCache",
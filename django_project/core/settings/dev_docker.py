@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 """Settings for when running under docker in development mode."""
 from .dev import *  # noqa
+from .utils import database_config
 
 DEBUG = os.environ.get("DEBUG",  False) == 'True'
 ALLOWED_HOSTS = ['*',
@@ -13,30 +14,31 @@ DEBUG = os.environ.get("DEBUG",  False) == 'True'
 TEMPLATE_DEBUG = DEBUG
 LOGGING_OUTPUT_ENABLED = DEBUG
 LOGGING_LOG_SQL = DEBUG
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.contrib.gis.db.backends.postgis',
-        'NAME': os.environ.get('DATABASE_NAME'),
-        'USER': os.environ.get('DATABASE_USERNAME'),
-        'PASSWORD': os.environ.get('DATABASE_PASSWORD'),
-        'HOST': os.environ.get('DATABASE_HOST'),
-        'PORT': 5432,
-        'TEST_NAME': 'unittests',
-    }
+# Show every statement, and the repeated ones per request, when debugging
+LOGGING['loggers']['django.db.backends']['level'] = (
+    'DEBUG' if LOGGING_LOG_SQL else 'INFO')
+LOGGING['loggers']['base.instrumentation'] = {
+    'handlers': ['console'],
+    'level': 'DEBUG' if LOGGING_LOG_SQL else 'INFO',
+    'propagate': False,
 }
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
-        'LOCATION': 'cache:11211',
-    }
+# Persistent connections, optionally through pgbouncer, see
+# core.settings.utils.database_config
+DATABASES = {
+    'default': database_config(),
 }
 
 CACHES = {
+    # Shared by every uwsgi and celery worker, see base.cache for the
+    # versioned invalidation of cached fragments
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "unique-snowflake",
+        "BACKEND": "base.cache_backends.InstrumentedRedisCache",
+        "LOCATION": os.environ.get("CELERY_BROKER_URL"),
+        "KEY_PREFIX": "sms-survey",
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+        },
     },
     "select2": {
         "BACKEND": "django_redis.cache.RedisCache",
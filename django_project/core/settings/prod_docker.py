@@ -2,6 +2,7 @@
 """Configuration for production server"""
 # noinspection PyUnresolvedReferences
 from .prod import *  # noqa
+from .utils import database_config
 import os
 
 DEBUG = os.environ.get("DEBUG",  False) == 'True' # just to quickly get dev work going until ready for prod rollout
@@ -12,16 +13,10 @@ ADMINS = (
     ('Alison Mukoma', 'mukoamlison@gmail.com'),
 )
 
+# Persistent connections, optionally through pgbouncer, see
+# core.settings.utils.database_config
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.contrib.gis.db.backends.postgis',
-        'NAME': os.environ.get('DATABASE_NAME'),
-        'USER': os.environ.get('DATABASE_USERNAME'),
-        'PASSWORD': os.environ.get('DATABASE_PASSWORD'),
-        'HOST': os.environ.get('DATABASE_HOST'),
-        'PORT': 5432,
-        'TEST_NAME': 'unittests',
-    }
+    'default': database_config(),
 }
 
 
@@ -49,9 +44,15 @@ EMAIL_SUBJECT_PREFIX = '[SMS-SURVEY-DASHBOARD]'
 # }
 
 CACHES = {
+    # Shared by every uwsgi and celery worker, see base.cache for the
+    # versioned invalidation of cached fragments
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "unique-snowflake",
+        "BACKEND": "base.cache_backends.InstrumentedRedisCache",
+        "LOCATION": os.environ.get("CELERY_BROKER_URL"),
+        "KEY_PREFIX": "sms-survey",
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+        },
     },
     "select2": {
         "BACKEND": "django_redis.cache.RedisCache",
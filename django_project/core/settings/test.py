@@ -40,3 +40,19 @@ LOGGING = {
 }
 
 ROLEPERMISSIONS_MODULE = 'roles.settings.roles_test'
+
+# Tests must not depend on a running redis
+CACHES = {
+    'default': {
+        'BACKEND': 'base.cache_backends.InstrumentedLocMemCache',
+    },
+    'select2': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'select2',
+    },
+}
+DJANGO_EASY_AUDIT_LOGGING_BACKEND = 'easyaudit.backends.ModelBackend'
+REPORTS_ROOT = '/tmp/reports'
+SCHEMA_ROOT = '/tmp/schema'
+# Requests going over their QUERY_BUDGETS entry fail the test
+QUERY_BUDGETS_STRICT = True
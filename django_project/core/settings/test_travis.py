@@ -2,17 +2,19 @@
 __author__ = 'timlinux'
 
 # -*- coding: utf-8 -*-
+import os
+
 from .test import *  # noqa
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.contrib.gis.db.backends.postgis',
         'NAME': 'test_db',
-        'USER': 'postgres',
+        'USER': os.environ.get('PGUSER', 'postgres'),
         'PASSWORD': '',
         'HOST': 'localhost',
         # Set to empty string for default.
-        'PORT': '',
+        'PORT': os.environ.get('PGPORT', ''),
     }
 }
 
@@ -35,5 +35,52 @@ def ensure_secret_key_file():
             f.write("SECRET_KEY = " + repr(secret_key) + "\n")
 
 
+def database_config(environ=None):
+    """Build the default database settings from the environment.
+
+    Connections are kept open between requests for
+    ``DATABASE_CONN_MAX_AGE`` seconds (60 by default, 0 closes them after
+    every request). With ``DATABASE_POOLER=pgbouncer`` the settings are
+    made safe for pgbouncer in transaction pooling mode, where consecutive
+    transactions of a client may run on different server connections.
+
+    :param environ: Mapping to read from, defaults to ``os.environ``.
+    :type environ: dict
+
+    :returns: The ``DATABASES['default']`` setting.
+    :rtype: dict
+    """
+    environ = os.environ if environ is None else environ
+    pooler = environ.get('DATABASE_POOLER', '')
+    config = {
+        'ENGINE': 'django.contrib.gis.db.backends.postgis',
+        'NAME': environ.get('DATABASE_NAME'),
+        'USER': environ.get('DATABASE_USERNAME'),
+        'PASSWORD': environ.get('DATABASE_PASSWORD'),
+        'HOST': environ.get('DATABASE_HOST'),
+        'PORT': int(environ.get(
+            'DATABASE_PORT', 6432 if pooler == 'pgbouncer' else 5432)),
+        'CONN_MAX_AGE': int(environ.get('DATABASE_CONN_MAX_AGE', 60)),
+        'OPTIONS': {
+            'connect_timeout': int(
+                environ.get('DATABASE_CONNECT_TIMEOUT', 5)),
+            # Tells uwsgi, celery and hasura apart in pg_stat_activity.
+            'application_name': environ.get(
+                'DATABASE_APPLICATION_NAME', 'sms-survey'),
+            # Notice dead peers on idle persistent connections.
+            'keepalives': 1,
+            'keepalives_idle': 60,
+            'keepalives_interval': 10,
+            'keepalives_count': 3,
+        },
+        'TEST_NAME': 'unittests',
+    }
+    if pooler == 'pgbouncer':
+        # Named cursors outside a transaction are declared WITH HOLD and
+        # outlive the server connection they were opened on.
+        config['DISABLE_SERVER_SIDE_CURSORS'] = True
+    return config
+
+
 # Import the secret key
 ensure_secret_key_file()
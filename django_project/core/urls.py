@@ -5,28 +5,33 @@ from django.contrib import admin
 from django.urls import include, path
 from django.conf.urls.static import static
 
-from drf_yasg2 import openapi
 from rest_framework import permissions
 from drf_yasg2.views import get_schema_view
 from dj_beneficiary import urls as dj_beneficiary_urls
 
+from base.schema import api_info
+from base.version import get_version
+from base.views.schema import schema_file
+
 
 schema_view = get_schema_view(
-   openapi.Info(
-      title="sms-survery-dashboard PPCR - TRALARD API",
-      default_version='v1',
-      description="PPCR - TRALARD Program Data sharing API.",
-   ),
+   api_info,
    public=True,
    permission_classes=[permissions.AllowAny],
 )
+# The documentation pages only change with a release
+schema_ui_cache = {
+    'cache_timeout': 24 * 60 * 60,
+    'cache_kwargs': {'key_prefix': 'schema-ui-%s' % get_version()},
+}
 
 api_docs_urlpatterns = [
     path('api/v1/ppcr-tralard/', include("tralard.api_router")),
+    path('api/v1/ppcr-tralard/', include('base.api_urls')),
     path('accounts/', include('rest_registration.api.urls')),
-    url(r'^swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    url(r'^swagger/$', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    url(r'^docs/$', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    url(r'^swagger\.(?P<schema_format>json|yaml)$', schema_file, name='schema-json'),
+    url(r'^swagger/$', schema_view.with_ui('swagger', **schema_ui_cache), name='schema-swagger-ui'),
+    url(r'^docs/$', schema_view.with_ui('redoc', **schema_ui_cache), name='schema-redoc'),
 ]
 
 
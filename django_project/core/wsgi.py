@@ -37,6 +37,16 @@ import django.core.handlers.wsgi  # noqa
 
 _application = get_wsgi_application()
 
+# Import the URLconf, and every view with it, in the uwsgi master: workers
+# forked or respawned from it start with them loaded instead of importing
+# them on their first request. The master must not keep a connection its
+# workers would share.
+from django.db import connections  # noqa
+from django.urls import get_resolver  # noqa
+
+get_resolver().url_patterns
+connections.close_all()
+
 
 def application(environ, start_response):
     """Factory for the application instance.
@@ -1,2 +1,4 @@
 __author__ = 'Alison Mukoma <mukomalison@gmail.com>Alison '
 __date__ = '15/12/2021'
+
+default_app_config = 'roles.apps.RolesConfig'
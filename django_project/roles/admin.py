@@ -3,11 +3,13 @@ __author__ = 'Alison Mukoma <mukomalison@gmail.com>'
 __date__ = '15/12/2021'
 
 import json
+from functools import lru_cache
 
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.forms import UserChangeForm
 from django.contrib.auth.models import Group, User
 from django.contrib.gis import admin
+from django.contrib.postgres.aggregates import StringAgg
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
@@ -18,6 +20,35 @@ admin.site.unregister(User)
 admin.site.unregister(Group)
 
 
+@lru_cache(maxsize=None)
+def role_permission_map():
+    """Permission names of every role, keyed by role name.
+
+    Roles are declared in code, so the map is built once per process.
+
+    :rtype: dict
+    """
+    return {
+        role.get_name(): [
+            '- %s' % permission
+            for permission in role.permission_names_list()]
+        for role in RolesManager.get_roles()
+    }
+
+
+class RoleListFilter(admin.SimpleListFilter):
+    title = _('role')
+    parameter_name = 'role'
+
+    def lookups(self, request, model_admin):
+        return [(name, name) for name in sorted(role_permission_map())]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(groups__name=self.value())
+        return queryset
+
+
 class RolePermissionsUserForm(UserChangeForm):
     class Media:
         css = {
@@ -39,7 +70,7 @@ class RolePermissionsUserAdmin(RolePermissionsUserAdminMixin, UserAdmin):
         'username', 'email',
         'first_name', 'last_name', 'is_staff',
         'roles', 'date_joined', 'last_login')
-    list_filter = ('date_joined', 'last_login', 'is_staff')
+    list_filter = ('date_joined', 'last_login', 'is_staff', RoleListFilter)
     readonly_fields = ('role_permissions', 'all_roles_permissions')
     fieldsets = (
         (None, {'fields': ('username', 'password')}),
@@ -52,11 +83,18 @@ class RolePermissionsUserAdmin(RolePermissionsUserAdminMixin, UserAdmin):
         )})
     )
 
+    def get_queryset(self, request):
+        return super(RolePermissionsUserAdmin, self).get_queryset(
+            request
+        ).annotate(
+            role_names=StringAgg(
+                'groups__name', delimiter=',', ordering='groups__name')
+        ).prefetch_related('groups', 'user_permissions')
+
     def roles(self, obj):
-        roles = []
-        for group in obj.groups.all():
-            roles.append(group.name)
-        return ','.join(roles)
+        return obj.role_names or ''
+
+    roles.admin_order_field = 'role_names'
 
     def role_permissions(self, obj):
         permissions = []
@@ -71,13 +109,7 @@ class RolePermissionsUserAdmin(RolePermissionsUserAdminMixin, UserAdmin):
 
     def all_roles_permissions(self, obj):
         # get all roles permission in json structure
-        roles_json = {}
-        for role in RolesManager.get_roles():
-            roles_json[role.get_name()] = [
-                '- %s' % permission
-                for permission in list(role.permission_names_list())
-            ]
-        return json.dumps(roles_json)
+        return json.dumps(role_permission_map())
 
     role_permissions.allow_tags = True
 
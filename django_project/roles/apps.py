@@ -4,3 +4,7 @@ from django.apps import AppConfig
 
 class RolesConfig(AppConfig):
     name = 'roles'
+
+    def ready(self):
+        from roles.choices import connect_role_signals
+        connect_role_signals()
@@ -0,0 +1,61 @@
+# coding=utf-8
+"""Role choices offered by the user forms.
+
+The available roles used to be read when ``authentication.forms`` was
+imported, which slowed down every worker start and kept new roles out of
+the forms until a restart. They are now read on first use, kept in the
+shared cache and dropped from it whenever a group is saved or deleted,
+which is also what ``manage.py sync_roles`` does.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+
+CACHE_KEY = 'roles:available'
+
+
+def available_roles():
+    """Display names of the available roles.
+
+    :rtype: list of str
+    """
+    roles = cache.get(CACHE_KEY)
+    if roles is None:
+        from tralard.utils import get_available_roles
+        roles = list(get_available_roles())
+        cache.set(CACHE_KEY, roles, timeout=None)
+    return roles
+
+
+def role_choices():
+    """Choices of the ``groups`` field of the sign up and update forms.
+
+    Pass the function itself as ``choices`` so that it is evaluated when
+    a form is rendered or validated rather than when it is defined.
+    """
+    return [
+        (str(index), role)
+        for index, role in enumerate(available_roles(), start=1)]
+
+
+def role_options():
+    """Roles as the ``key``/``value`` pairs used by the user list."""
+    return [{'key': role, 'value': role} for role in available_roles()]
+
+
+def invalidate_role_choices(**kwargs):
+    # After commit, so that a concurrent request cannot cache the roles
+    # as they were before the change.
+    transaction.on_commit(lambda: cache.delete(CACHE_KEY))
+
+
+def connect_role_signals():
+    from django.contrib.auth.models import Group
+    from django.db.models.signals import post_delete, post_save
+
+    post_save.connect(
+        invalidate_role_choices, sender=Group,
+        dispatch_uid='roles.group_saved')
+    post_delete.connect(
+        invalidate_role_choices, sender=Group,
+        dispatch_uid='roles.group_deleted')
@@ -0,0 +1,195 @@
+# coding=utf-8
+"""Assign roles to many users in one run.
+
+Reads ``username,role`` pairs from a CSV file with a header row, a JSON
+array or JSON lines (``{"username": ..., "role": ...}``), or from stdin
+with ``-``::
+
+    python manage.py bulk_assign_roles enumerators.csv --batch-size 500
+    cat enumerators.jsonl | python manage.py bulk_assign_roles - \\
+        --format json --dry-run
+
+Users are looked up with one ``IN`` query per batch. The role groups and
+default permissions are inserted straight into the ``auth_user_groups``
+and ``auth_user_user_permissions`` tables, each batch in its own
+transaction, which gives the same result as ``assign_role`` without a
+query per user. ``m2m_changed`` is not sent for these rows.
+"""
+
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from rolepermissions.roles import RolesManager
+
+FORMATS = ('csv', 'json')
+
+
+def read_csv(stream):
+    for row in csv.DictReader(stream):
+        yield row.get('username'), row.get('role')
+
+
+def read_json(stream):
+    first = stream.read(1)
+    while first and first.isspace():
+        first = stream.read(1)
+    if first == '[':
+        rows = json.loads(first + stream.read())
+    else:
+        rows = (
+            json.loads(line) for line in _prepend(first, stream)
+            if line.strip())
+    for row in rows:
+        yield row.get('username'), row.get('role')
+
+
+def _prepend(first, stream):
+    lines = iter(stream)
+    yield first + next(lines, '')
+    for line in lines:
+        yield line
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    """ Assign roles to users listed in a CSV or JSON stream.
+    """
+    help = 'Assign roles to the users listed in a CSV or JSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='CSV or JSON file of username/role pairs, '
+                         'or - for stdin.')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Input format, guessed from the file extension by default.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Resolve users and roles without writing anything.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        input_format = options['format']
+        if input_format is None:
+            extension = os.path.splitext(path)[1].lstrip('.').lower()
+            input_format = 'json' if extension in ('json', 'jsonl') else 'csv'
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        self.dry_run = options['dry_run']
+        self.verbosity = options['verbosity']
+        self.roles = {}
+
+        if path == '-':
+            self.run(sys.stdin, input_format, options['batch_size'])
+        else:
+            try:
+                stream = open(path, newline='', encoding='utf-8')
+            except OSError as error:
+                raise CommandError(error)
+            with stream:
+                self.run(stream, input_format, options['batch_size'])
+
+    def run(self, stream, input_format, batch_size):
+        reader = read_json if input_format == 'json' else read_csv
+        totals = {'pairs': 0, 'assigned': 0, 'missing': 0, 'invalid': 0}
+        start = time.monotonic()
+        for number, batch in enumerate(
+                batches(reader(stream), batch_size), start=1):
+            batch_start = time.monotonic()
+            result = self.apply(batch)
+            elapsed = time.monotonic() - batch_start
+            for key, value in result.items():
+                totals[key] += value
+            self.stdout.write(
+                'batch %s: %s pairs, %s assigned, %s unknown users, '
+                '%s invalid rows in %.2fs (%.0f pairs/s)' % (
+                    number, result['pairs'], result['assigned'],
+                    result['missing'], result['invalid'], elapsed,
+                    result['pairs'] / elapsed if elapsed else 0))
+
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            '%s%s pairs, %s assigned, %s unknown users, %s invalid rows '
+            'in %.2fs (%.0f pairs/s)' % (
+                'Dry run: ' if self.dry_run else '',
+                totals['pairs'], totals['assigned'], totals['missing'],
+                totals['invalid'], elapsed,
+                totals['pairs'] / elapsed if elapsed else 0)))
+
+    def resolve_role(self, name):
+        """Group id and default permission ids of a role.
+
+        Returns ``None`` for unknown roles. In a dry run the group and
+        permissions are not created, so only the role itself is checked.
+        """
+        if name not in self.roles:
+            role = RolesManager.retrieve_role(name)
+            if role is None:
+                self.roles[name] = None
+            elif self.dry_run:
+                self.roles[name] = (None, [])
+            else:
+                group, _ = role.get_or_create_group()
+                self.roles[name] = (group.pk, [
+                    permission.pk
+                    for permission in role.get_default_true_permissions()])
+        return self.roles[name]
+
+    def apply(self, batch):
+        result = {
+            'pairs': len(batch), 'assigned': 0, 'missing': 0, 'invalid': 0}
+        usernames = {username for username, _ in batch if username}
+        user_ids = dict(
+            User.objects.filter(username__in=usernames)
+            .values_list('username', 'pk'))
+
+        user_groups = []
+        user_permissions = []
+        for username, role_name in batch:
+            role = self.resolve_role(role_name) if role_name else None
+            if not username or role is None:
+                result['invalid'] += 1
+                self.warn('Skipping %r: invalid role %r' % (
+                    username, role_name))
+                continue
+            if username not in user_ids:
+                result['missing'] += 1
+                self.warn('Skipping %r: no such user' % username)
+                continue
+            result['assigned'] += 1
+            group_id, permission_ids = role
+            user_groups.append(User.groups.through(
+                user_id=user_ids[username], group_id=group_id))
+            user_permissions.extend(
+                User.user_permissions.through(
+                    user_id=user_ids[username], permission_id=permission_id)
+                for permission_id in permission_ids)
+
+        if not self.dry_run:
+            with transaction.atomic():
+                User.groups.through.objects.bulk_create(
+                    user_groups, ignore_conflicts=True)
+                User.user_permissions.through.objects.bulk_create(
+                    user_permissions, ignore_conflicts=True)
+        return result
+
+    def warn(self, message):
+        if self.verbosity > 1:
+            self.stderr.write(message)
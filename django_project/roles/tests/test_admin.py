@@ -0,0 +1,36 @@
+# coding=utf-8
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+
+from roles import admin as roles_admin
+
+
+class RolePermissionsUserAdminTests(SimpleTestCase):
+    def setUp(self):
+        roles_admin.role_permission_map.cache_clear()
+        self.addCleanup(roles_admin.role_permission_map.cache_clear)
+
+    def test_role_permission_map_is_built_once(self):
+        role = mock.Mock()
+        role.get_name.return_value = 'fund_manager'
+        role.permission_names_list.return_value = ['approve_fund']
+        with mock.patch.object(
+                roles_admin.RolesManager, 'get_roles',
+                return_value=[role]) as get_roles:
+            roles_admin.role_permission_map()
+            self.assertEqual(
+                roles_admin.role_permission_map(),
+                {'fund_manager': ['- approve_fund']})
+        self.assertEqual(get_roles.call_count, 1)
+
+    def test_roles_column_reads_the_annotation(self):
+        model_admin = roles_admin.RolePermissionsUserAdmin(
+            User, roles_admin.admin.site)
+        user = User(username='jane')
+        user.role_names = 'fund_manager,project_manager'
+        self.assertEqual(
+            model_admin.roles(user), 'fund_manager,project_manager')
+        user.role_names = None
+        self.assertEqual(model_admin.roles(user), '')
@@ -0,0 +1,65 @@
+# coding=utf-8
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class BulkAssignRolesTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice')
+        self.bob = User.objects.create_user(username='bob')
+
+    def write(self, content, suffix):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w') as stream:
+            stream.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def permissions(self, user):
+        return set(user.user_permissions.values_list('codename', flat=True))
+
+    def test_assign_from_csv(self):
+        path = self.write(
+            'username,role\n'
+            'alice,project_manager\n'
+            'bob,funder\n'
+            'carol,funder\n'
+            'alice,no_such_role\n', '.csv')
+        out = StringIO()
+        call_command('bulk_assign_roles', path, batch_size=2, stdout=out)
+
+        self.assertEqual(
+            list(self.alice.groups.values_list('name', flat=True)),
+            ['project_manager'])
+        self.assertEqual(
+            self.permissions(self.alice), {'permission_1', 'permission_2'})
+        self.assertEqual(
+            self.permissions(self.bob), {'permission_1', 'permission_3'})
+        self.assertIn('batch 2:', out.getvalue())
+        self.assertIn(
+            '4 pairs, 2 assigned, 1 unknown users, 1 invalid rows',
+            out.getvalue())
+
+    def test_assign_is_idempotent(self):
+        path = self.write(json.dumps([
+            {'username': 'alice', 'role': 'funder'}]), '.json')
+        call_command('bulk_assign_roles', path, stdout=StringIO())
+        call_command('bulk_assign_roles', path, stdout=StringIO())
+        self.assertEqual(self.alice.groups.count(), 1)
+
+    def test_json_lines_dry_run(self):
+        path = self.write(
+            '{"username": "alice", "role": "funder"}\n'
+            '{"username": "bob", "role": "funder"}\n', '.jsonl')
+        out = StringIO()
+        call_command(
+            'bulk_assign_roles', path, dry_run=True, stdout=out)
+        self.assertFalse(self.alice.groups.exists())
+        self.assertFalse(self.alice.user_permissions.exists())
+        self.assertIn('Dry run: 2 pairs, 2 assigned', out.getvalue())
@@ -0,0 +1,48 @@
+# coding=utf-8
+from unittest import mock
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase
+
+from roles.choices import CACHE_KEY, role_choices, role_options
+
+
+class RoleChoicesTests(TestCase):
+    def setUp(self):
+        cache.delete(CACHE_KEY)
+        self.utils = mock.Mock()
+        self.utils.get_available_roles.return_value = [
+            'Project Manager', 'Fund Manager']
+        patcher = mock.patch.dict('sys.modules', {'tralard.utils': self.utils})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_choices(self):
+        self.assertEqual(
+            role_choices(), [('1', 'Project Manager'), ('2', 'Fund Manager')])
+        self.assertEqual(role_options()[1], {
+            'key': 'Fund Manager', 'value': 'Fund Manager'})
+
+    def test_roles_are_cached(self):
+        role_choices()
+        role_options()
+        self.assertEqual(self.utils.get_available_roles.call_count, 1)
+
+    def test_group_changes_invalidate(self):
+        role_choices()
+        self.utils.get_available_roles.return_value = ['Project Manager']
+        # TestCase never commits, run the callbacks right away.
+        with mock.patch(
+                'roles.choices.transaction.on_commit',
+                side_effect=lambda callback: callback()):
+            Group.objects.create(name='project_manager')
+        self.assertEqual(role_choices(), [('1', 'Project Manager')])
+
+    def test_form_reads_choices_lazily(self):
+        from authentication.forms import SignUpForm
+
+        self.assertEqual(self.utils.get_available_roles.call_count, 0)
+        self.assertEqual(
+            list(SignUpForm().fields['groups'].choices),
+            [('1', 'Project Manager'), ('2', 'Fund Manager')])